@@ -1,10 +1,14 @@
-set courses; 
+# Generated from solver/model_spec.py, edit the spec instead.
+
+set courses;
 set requirements;
 set timeSlots;
 set uniqueCourses;
 set alternates;
+set travelConflicts default {};
+set travelSections {travelConflicts} within courses;
 
-param costs {j in courses}; 
+param costs {j in courses};
 
 param time {i in timeSlots, j in courses};
 
@@ -20,9 +24,23 @@ param alternatesUpperLimits {i in alternates};
 
 param alternatesMatrix {i in alternates, j in courses};
 
-var x {j in courses} integer >= 0, <=1; 
+param xLower {j in courses} default 0;
+
+param xUpper {j in courses} default 1;
+
+param minCourses default 4;
+
+param maxCourses default 6;
+
+param timeCapacity default 1;
+
+param uniqueCapacity default 1;
 
-maximize Happiness: sum {j in courses} costs[j]*x[j];
+param costWeight default 1;
+
+var x {j in courses} integer >= xLower[j], <= xUpper[j];
+
+maximize Happiness: sum {j in courses} costWeight*costs[j]*x[j];
 
 subject to Alts {i in alternates}:
     alternatesLowerLimits[i] <= sum {j in courses} (alternatesMatrix[i,j]) * x[j] <= alternatesUpperLimits[i];
@@ -31,12 +49,13 @@ subject to Reqs {i in requirements}:
     sum {j in courses} (counts[i,j]) * x[j] >= necessary[i];
 
 subject to TimeConflicts {i in timeSlots}:
-    sum {j in courses} (time[i,j] * x[j]) <= 1;
-    
-# Can be changed according to min and max number of courses desired:     
+    sum {j in courses} (time[i,j] * x[j]) <= timeCapacity;
+
+subject to TravelTime {i in travelConflicts}:
+    sum {j in travelSections[i]} x[j] <= timeCapacity;
+
 subject to EnrollmentBounds:
-    4 <= sum {i in courses} x[i] <= 6; 
-    
-subject to Uniqueness {i in uniqueCourses}:
-    sum {j in courses} (unique[i,j]) * x[j] <= 1;
+    minCourses <= sum {i in courses} x[i] <= maxCourses;
 
+subject to Uniqueness {i in uniqueCourses}:
+    sum {j in courses} (unique[i,j]) * x[j] <= uniqueCapacity;
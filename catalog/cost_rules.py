@@ -0,0 +1,192 @@
+"""Cost Rules
+
+Rankings of the possible courses (the costs row of the model), computed
+from rules compiled once into numpy masks over catalog arrays:
+
+         -- course       one section (the Course Preferences column)
+         -- prefix       code starts with value, eg. "CSCI" or "MATH 131"
+                         (same matching as catalog.index)
+         -- subject      eg. "subject:CSCI"
+         -- campus       eg. "campus:HM"
+         -- instructor   part of an instructor name, eg. "instructor:Stone"
+         -- time         every meeting inside a window, eg. "time:09:00-12:00"
+         -- days         meets only on these days, eg. "days:TR"
+
+A Default Course Preferences entry is a prefix, or one of the other kinds
+written as "kind:value". Precedence is explicit: course rules first, then
+the default preferences in the order of the spreadsheet (lower "priority"
+first), then the base ranking. The costs row comes out of one np.select
+over the masks.
+"""
+
+import numpy as np
+
+from catalog.index import catalog_index, prefix_lookup
+from funcs import meeting_intervals_func, raw_data
+
+rule_kinds = ["course", "prefix", "subject", "campus", "instructor", "time", "days"]
+
+_arrays = {}
+
+_day_bits = {day: 1 << k for k, day in enumerate("MTWRFSU")}
+
+
+def _day_mask(days):
+    mask = 0
+    for day in days:
+        mask |= _day_bits.get(day, 0)
+    return mask
+
+
+def parse_cost_rule(text, ranking, priority=0):
+    """Rule of a Default Course Preferences entry.
+
+    Returns:
+        dict: {"kind", "value", "ranking", "priority"}
+    """
+    text = str(text).strip()
+    kind, _, value = text.partition(":")
+    if value and kind.strip().lower() in rule_kinds:
+        kind, text = kind.strip().lower(), value.strip()
+    else:
+        kind = "prefix"
+    return {"kind": kind, "value": text, "ranking": ranking, "priority": priority}
+
+
+def preference_rules(curr_preferences, curr_default_preferences):
+    """Rules of a student's preferences, in precedence order.
+
+    Returns:
+        list of dicts: see parse_cost_rule
+    """
+    rules = [
+        {"kind": "course", "value": course, "ranking": ranking, "priority": -1}
+        for course, ranking in curr_preferences.items()
+    ]
+    for priority, (text, ranking) in enumerate(curr_default_preferences):
+        rules.append(parse_cost_rule(text, ranking, priority))
+    return rules
+
+
+def build_catalog_arrays(raw_data):
+    """Columns of the whole catalog the rules are evaluated on.
+
+    Returns:
+        dict: "position" ({course: row}) and numpy arrays: codes, subjects,
+        campuses, instructors (lower case, "|" separated), start/end
+        (minutes; first start, last end), days (bit mask of the meeting days)
+    """
+    courses = raw_data["data"]["courses"]
+    codes = list(courses)
+    n = len(codes)
+    start = np.full(n, np.nan)
+    end = np.full(n, np.nan)
+    days = np.zeros(n, dtype=int)
+    instructors = []
+
+    for j, course in enumerate(codes):
+        intervals = meeting_intervals_func(raw_data, course)
+        if intervals:
+            start[j] = min(interval[1] for interval in intervals)
+            end[j] = max(interval[2] for interval in intervals)
+            days[j] = _day_mask(interval[0] for interval in intervals)
+        instructors.append("|".join(courses[course]["courseInstructors"]).lower())
+
+    return {
+        "position": {course: j for j, course in enumerate(codes)},
+        "codes": np.array(codes, dtype=str),
+        "subjects": np.array([course.split()[0] for course in codes]),
+        "campuses": np.array([course.split()[-1].split("-")[0] for course in codes]),
+        "instructors": np.array(instructors, dtype=str),
+        "start": start,
+        "end": end,
+        "days": days,
+    }
+
+
+def catalog_arrays(possible_courses, raw_data=raw_data):
+    """Rows of the catalog arrays (built once per process) for the possible
+    courses, in order.
+
+    Returns:
+        dict of numpy arrays: see build_catalog_arrays
+    """
+    if id(raw_data) not in _arrays:
+        _arrays[id(raw_data)] = build_catalog_arrays(raw_data)
+    arrays = _arrays[id(raw_data)]
+
+    position = arrays["position"]
+    rows = np.array([position[course] for course in possible_courses], dtype=int)
+    return {
+        name: column[rows] for name, column in arrays.items() if name != "position"
+    }
+
+
+def _time_window(value):
+    first, _, last = value.partition("-")
+    return [int(t[:2]) * 60 + int(t[3:5]) for t in (first.strip(), last.strip())]
+
+
+def rule_mask(rule, arrays, index=None):
+    """Courses a rule applies to.
+
+    Returns:
+        numpy array of bools
+    """
+    kind, value = rule["kind"], rule["value"]
+    if kind == "course":
+        return arrays["codes"] == value
+    if kind == "prefix":
+        if index is None:
+            index = catalog_index()
+        return np.isin(arrays["codes"], prefix_lookup(index, value))
+    if kind == "subject":
+        return arrays["subjects"] == value.upper()
+    if kind == "campus":
+        return arrays["campuses"] == value.upper()
+    if kind == "instructor":
+        return np.char.find(arrays["instructors"], value.lower()) >= 0
+    if kind == "time":
+        first, last = _time_window(value)
+        with np.errstate(invalid="ignore"):
+            return (arrays["start"] >= first) & (arrays["end"] <= last)
+    if kind == "days":
+        allowed = _day_mask(value.upper())
+        return (arrays["days"] != 0) & (arrays["days"] & ~allowed == 0)
+    raise ValueError(f"unknown cost rule kind {kind!r}")
+
+
+def compile_cost_rules(rules, arrays, index=None):
+    """Masks of the rules, in precedence order.
+
+    Returns:
+        tuple: (list of masks, list of rankings)
+    """
+    ordered = sorted(rules, key=lambda rule: rule.get("priority", 0))
+    masks = [rule_mask(rule, arrays, index) for rule in ordered]
+    return masks, [rule["ranking"] for rule in ordered]
+
+
+def rule_costs(
+    possible_courses,
+    curr_preferences,
+    curr_default_preferences,
+    base_ranking,
+    raw_data=raw_data,
+):
+    """Row of costs corresponding to each possible course.
+
+    Returns:
+        List: Row of costs corresponding to each possible course (the
+              rankings as typed, so ints stay ints in the .dat file).
+    """
+    arrays = catalog_arrays(possible_courses, raw_data)
+    rules = preference_rules(curr_preferences, curr_default_preferences)
+    masks, rankings = compile_cost_rules(rules, arrays, catalog_index(raw_data))
+    if not masks:
+        return [base_ranking] * len(possible_courses)
+
+    # Index of the first rule that applies (len(rankings): none, base ranking)
+    chosen = np.select(masks, list(range(len(rankings))), default=len(rankings))
+    values = list(rankings) + [base_ranking]
+    return [values[k] for k in chosen.tolist()]
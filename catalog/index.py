@@ -0,0 +1,267 @@
+"""Catalog Index
+
+In-memory index over course_data.json used to resolve the free-form inputs
+of the spreadsheet (preferences, default preferences, previous courses,
+courses you do not want, alternates) to concrete sections up front:
+
+         -- codes: sorted course codes, so every section starting with an
+            input (eg. "CSCI 131" or "CSCI") is found by bisection
+            in O(log n) instead of scanning the catalog
+         -- tokens: courseCode, courseName and courseInstructors words ->
+            courses, for lookups by name or instructor
+         -- trigrams: three letter pieces of the course keys and subject
+            codes -> course keys, for suggestions when an input matches
+            nothing
+         -- known: course codes named as prerequisites, so courses that
+            exist but are not offered this term are not reported as typos
+
+An input matches the sections whose code starts with it at a word
+boundary ("CSCI 131" matches "CSCI 131 HM-01" but not "CSCI 131L HM-01"),
+or, when there are none, every section starting with it.
+"""
+
+import bisect
+import difflib
+import re
+
+from funcs import prereqs_edited, raw_data
+
+_indexes = {}
+
+_code_pattern = re.compile(r"^([A-Za-z]+)\s*0*(\d+)(.*)$")
+
+
+def course_key(course):
+    """Code of a section without its section number
+    (eg. "CSCI 131 HM-01" -> "CSCI 131 HM")."""
+    return course.rsplit("-", 1)[0]
+
+
+def normalize_input(text):
+    """Usual spelling of a typed course code: upper case, single spaces and
+    three digit numbers (eg. "csci  60" -> "CSCI 060").
+
+    Returns:
+        str
+    """
+    text = " ".join(str(text).split()).upper()
+    match = _code_pattern.match(text)
+    if match:
+        subject, number, rest = match.groups()
+        text = f"{subject} {int(number):03d}{rest}"
+    return text
+
+
+def _trigrams(text):
+    text = f"  {text.upper()} "
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def build_catalog_index(raw_data, prereqs=prereqs_edited):
+    """Builds the index of a catalog.
+
+    Returns:
+        dict: {"codes", "tokens", "keys", "trigrams", "known"}
+    """
+    courses = raw_data["data"]["courses"]
+    codes = sorted(courses)
+
+    tokens = {}
+    for course, info in courses.items():
+        words = course.replace("-", " ").split()
+        words += re.findall(r"\w+", info.get("courseName") or "")
+        for instructor in info.get("courseInstructors") or []:
+            words += re.findall(r"\w+", instructor)
+        for word in words:
+            tokens.setdefault(word.upper(), set()).add(course)
+
+    keys = sorted({course_key(course) for course in codes})
+    keys += sorted({course.split()[0] for course in codes})
+    trigrams = {}
+    for key in keys:
+        for trigram in _trigrams(key):
+            trigrams.setdefault(trigram, set()).add(key)
+
+    known = set()
+    for prereq in prereqs.values():
+        for group in prereq[1:]:
+            known.update(group)
+
+    return {
+        "codes": codes,
+        "tokens": tokens,
+        "keys": keys,
+        "trigrams": trigrams,
+        "known": known,
+    }
+
+
+def catalog_index(raw_data=raw_data):
+    """Index of raw_data, built once per process."""
+    if id(raw_data) not in _indexes:
+        _indexes[id(raw_data)] = build_catalog_index(raw_data)
+    return _indexes[id(raw_data)]
+
+
+def prefix_lookup(index, prefix):
+    """Sections whose code starts with prefix (at a word boundary when
+    possible).
+
+    Returns:
+        list: course codes, sorted
+    """
+    codes = index["codes"]
+    start = bisect.bisect_left(codes, prefix)
+    end = bisect.bisect_left(codes, prefix + "\uffff", lo=start)
+    matches = codes[start:end]
+
+    end_of_prefix = len(prefix)
+    boundary = [
+        code for code in matches if code[end_of_prefix : end_of_prefix + 1] in " -"
+    ]
+    return boundary or matches
+
+
+def search_catalog(index, text):
+    """Sections with every word of text in their code, name or instructors
+    (eg. "algorithms stone").
+
+    Returns:
+        list: course codes, sorted
+    """
+    words = re.findall(r"\w+", text.upper())
+    if not words:
+        return []
+    result = set(index["tokens"].get(words[0], ()))
+    for word in words[1:]:
+        result &= index["tokens"].get(word, set())
+    return sorted(result)
+
+
+def suggest_courses(index, text, limit=3):
+    """Course keys spelled like text, for inputs that match nothing.
+
+    Returns:
+        list: up to limit course keys, closest first
+    """
+    text = normalize_input(text)
+    counts = {}
+    for trigram in _trigrams(text):
+        for key in index["trigrams"].get(trigram, ()):
+            counts[key] = counts.get(key, 0) + 1
+
+    candidates = sorted(counts, key=lambda key: -counts[key])[: limit * 10]
+    candidates.sort(key=lambda key: -difflib.SequenceMatcher(None, text, key).ratio())
+    return candidates[:limit]
+
+
+def resolve_input(index, text):
+    """Sections an input stands for.
+
+    Returns:
+        dict: {"input", "resolved" (spelling that matched, or None),
+               "sections", "suggestions"}
+    """
+    text = str(text)
+    for spelling in (text, normalize_input(text)):
+        sections = prefix_lookup(index, spelling)
+        if sections:
+            return {
+                "input": text,
+                "resolved": spelling,
+                "sections": sections,
+                "suggestions": [],
+            }
+
+    suggestions = suggest_courses(index, text)
+    by_name = search_catalog(index, text)
+    for key in sorted({course_key(course) for course in by_name}):
+        if key not in suggestions:
+            suggestions.append(key)
+    return {
+        "input": text,
+        "resolved": None,
+        "sections": [],
+        "suggestions": suggestions[:5],
+    }
+
+
+def resolve_student_inputs(inputs, index=None):
+    """Resolves every course typed in a student's inputs.
+
+    Inputs are rewritten to the spelling that matched (eg. "csci 60" ->
+    "CSCI 060"); preferences must name one section, so a preference that
+    matches none or several is dropped. Courses that match nothing but are
+    known (eg. previous courses not offered this term) are only normalized.
+
+    Args:
+        inputs (dict): from excel_parser.parse_student_inputs
+
+    Returns:
+        tuple: (resolved inputs (a copy), {typed input: set of sections},
+                list of problems: {"field", "input", "message"})
+    """
+    if index is None:
+        index = catalog_index()
+
+    sections = {}
+    problems = []
+
+    def resolve(field, text, report=True):
+        result = resolve_input(index, text)
+        if result["resolved"] is None:
+            if not report or normalize_input(text) in index["known"]:
+                return normalize_input(text)
+            message = f'"{text}" matches no course'
+            if result["suggestions"]:
+                message += ", did you mean " + ", ".join(result["suggestions"]) + "?"
+            problems.append({"field": field, "input": text, "message": message})
+            return None
+        sections[result["resolved"]] = set(result["sections"])
+        return result["resolved"]
+
+    resolved = dict(inputs)
+
+    preferences = {}
+    for course, ranking in inputs["curr_preferences"].items():
+        spelling = resolve("curr_preferences", course)
+        if spelling is None:
+            continue
+        matches = sections[spelling]
+        if len(matches) == 1:
+            preferences[next(iter(matches))] = ranking
+        else:
+            problems.append(
+                {
+                    "field": "curr_preferences",
+                    "input": course,
+                    "message": f'"{course}" is {len(matches)} sections, pick one of '
+                    + ", ".join(sorted(matches)[:5]),
+                }
+            )
+    resolved["curr_preferences"] = preferences
+
+    # Entries written as "kind:value" are cost rules (catalog.cost_rules)
+    resolved["curr_default_preferences"] = [
+        [
+            course
+            if ":" in str(course)
+            else resolve("curr_default_preferences", course) or course,
+            ranking,
+        ]
+        for course, ranking in inputs["curr_default_preferences"]
+    ]
+    resolved["curr_previous_courses"] = {
+        resolve("curr_previous_courses", course, report=False)
+        for course in inputs["curr_previous_courses"]
+    }
+    resolved["curr_bad_courses"] = {
+        resolve("curr_bad_courses", course) or course
+        for course in inputs["curr_bad_courses"]
+    }
+    resolved["curr_alternates"] = [
+        [[resolve("curr_alternates", course) or course for course in courses], limits]
+        for courses, limits in inputs["curr_alternates"]
+    ]
+
+    return resolved, sections, problems
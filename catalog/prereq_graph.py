@@ -0,0 +1,307 @@
+"""Prerequisite Graph
+
+Graph of the courses in prereqs_edited.json (course numbers, eg.
+"CSCI 140", not sections), built once per process with every set stored as
+a bitset (a Python int, bit k for course k):
+
+         -- requires: the alternatives of every course that has
+            prerequisites (a course can be taken once every course of one
+            alternative has been taken; permission of instructor is left
+            out, as in next_sem_possible_courses_due_to_prereqs)
+         -- ancestors: every course that appears, transitively, in the
+            prerequisites of a course
+         -- descendants: every course a course is, transitively, a
+            prerequisite of; its size is the "unlock" count of the course
+
+Queries only walk the bits of the courses that can change (eg. the
+descendants of a course), so they take microseconds and a cohort shares
+one graph:
+
+    python -m catalog.prereq_graph "CSCI 140" --taken "CSCI 005" --semesters 2
+"""
+
+import argparse
+
+from funcs import prereqs_edited
+
+_graphs = {}
+
+
+def course_number(course):
+    """Course of a section (eg. "CSCI 131 HM-01" -> "CSCI 131")."""
+    return " ".join(course.split()[:2])
+
+
+def _bits(mask):
+    """Indices of the bits of mask, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def build_prereq_graph(prereqs=prereqs_edited):
+    """Builds the prerequisite graph.
+
+    Args:
+        prereqs (dict): {section: [description, alternative, ...]}, every
+            alternative a list of courses
+
+    Returns:
+        dict: {"names" (course per bit), "index" ({course: bit}),
+               "requires" ({bit: list of alternative masks}), "gated"
+               (bitset of the courses with prerequisites),
+               "ancestors", "descendants" (list of masks per bit),
+               "unlocks" (list of counts per bit)}
+    """
+    alternatives = {}
+    for section, prereq in prereqs.items():
+        course = course_number(section)
+        groups = alternatives.setdefault(course, [])
+        for group in prereq[1:]:
+            group = [name.strip() for name in group]
+            if group != ["POI"] and group not in groups:
+                groups.append(group)
+
+    names = sorted(
+        set(alternatives)
+        | {name for groups in alternatives.values() for g in groups for name in g}
+    )
+    index = {name: k for k, name in enumerate(names)}
+
+    requires = {}
+    for course, groups in alternatives.items():
+        masks = []
+        for group in groups:
+            mask = 0
+            for name in group:
+                mask |= 1 << index[name]
+            masks.append(mask)
+        requires[index[course]] = masks
+
+    direct = [0] * len(names)
+    for k, masks in requires.items():
+        for mask in masks:
+            direct[k] |= mask
+
+    # Closure by propagation until nothing changes (also ends on cycles)
+    ancestors = list(direct)
+    changed = True
+    while changed:
+        changed = False
+        for k in range(len(names)):
+            closure = direct[k]
+            for j in _bits(direct[k]):
+                closure |= ancestors[j]
+            if closure != ancestors[k]:
+                ancestors[k] = closure
+                changed = True
+
+    descendants = [0] * len(names)
+    for k, mask in enumerate(ancestors):
+        for j in _bits(mask):
+            descendants[j] |= 1 << k
+
+    return {
+        "names": names,
+        "index": index,
+        "requires": requires,
+        "gated": sum(1 << k for k in requires),
+        "ancestors": ancestors,
+        "descendants": descendants,
+        "unlocks": [bin(mask).count("1") for mask in descendants],
+    }
+
+
+def prereq_graph(prereqs=prereqs_edited):
+    """Graph of prereqs, built once per process."""
+    if id(prereqs) not in _graphs:
+        _graphs[id(prereqs)] = build_prereq_graph(prereqs)
+    return _graphs[id(prereqs)]
+
+
+def courses_mask(graph, courses):
+    """Bitset of courses (sections count as their course; courses that are
+    not in the graph are left out)."""
+    mask = 0
+    for course in courses:
+        k = graph["index"].get(course_number(course))
+        if k is not None:
+            mask |= 1 << k
+    return mask
+
+
+def mask_courses(graph, mask):
+    """Courses of a bitset, sorted."""
+    return [graph["names"][k] for k in _bits(mask)]
+
+
+def eligible_mask(graph, have, candidates=None):
+    """Courses that can be taken once the courses in have are taken.
+
+    Args:
+        have (int): bitset of the courses taken
+        candidates (int, optional): bitset of the courses to check,
+            defaults to every course
+
+    Returns:
+        int: bitset of the eligible candidates
+    """
+    requires = graph["requires"]
+    if candidates is None:
+        candidates = (1 << len(graph["names"])) - 1
+
+    eligible = candidates & ~graph["gated"]
+    for k in _bits(candidates & graph["gated"]):
+        if any(mask & ~have == 0 for mask in requires[k]):
+            eligible |= 1 << k
+    return eligible
+
+
+def reachable_mask(graph, have, semesters, candidates=None):
+    """Courses that can be taken within a number of semesters (taking every
+    eligible course each semester).
+
+    Returns:
+        int: bitset of have and the courses reachable from it
+    """
+    for _ in range(semesters):
+        new = eligible_mask(graph, have, candidates) & ~have
+        if not new:
+            break
+        have |= new
+    return have
+
+
+def unlocked_by(graph, course, taken=(), semesters=1):
+    """Courses that taking course makes reachable within a number of
+    semesters, that were not reachable without it.
+
+    Returns:
+        list: courses, sorted
+    """
+    k = graph["index"].get(course_number(course))
+    if k is None:
+        return []
+    have = courses_mask(graph, taken)
+    with_course = have | 1 << k
+
+    # Only the descendants of course can differ, and only their ancestors
+    # decide when they can be taken
+    changing = graph["descendants"][k]
+    candidates = changing
+    for j in _bits(changing):
+        candidates |= graph["ancestors"][j]
+
+    for _ in range(semesters):
+        new = eligible_mask(graph, have, candidates) & ~have
+        new_with_course = eligible_mask(graph, with_course, changing) & ~with_course
+        have |= new
+        with_course |= new | new_with_course
+    return mask_courses(graph, with_course & ~have & ~(1 << k))
+
+
+def prerequisite_chain(graph, target, taken=()):
+    """Shortest prerequisite chain to target: the courses to take in each
+    semester so target can be taken as early as possible.
+
+    Returns:
+        list of lists: courses per semester, ending with [target]; None when
+        target can not be reached ([] when it was already taken)
+    """
+    k = graph["index"].get(course_number(target))
+    if k is None:
+        return [[course_number(target)]]
+    have = courses_mask(graph, taken)
+    if have >> k & 1:
+        return []
+
+    # Semester in which each course can first be taken (0: already taken)
+    candidates = graph["ancestors"][k] | 1 << k
+    level = {j: 0 for j in _bits(have & candidates)}
+    semester = 0
+    while k not in level:
+        semester += 1
+        new = eligible_mask(graph, have, candidates) & ~have
+        if not new:
+            return None
+        for j in _bits(new):
+            level[j] = semester
+        have |= new
+
+    # Walk back along the alternatives that are met the earliest
+    plan = [set() for _ in range(level[k])]
+    todo = [k]
+    while todo:
+        j = todo.pop()
+        if level[j] == 0 or j in plan[level[j] - 1]:
+            continue
+        plan[level[j] - 1].add(j)
+        met = [
+            mask
+            for mask in graph["requires"].get(j, [])
+            if all(i in level and level[i] < level[j] for i in _bits(mask))
+        ]
+        if met:
+            best = min(met, key=lambda mask: bin(mask).count("1"))
+            todo.extend(_bits(best))
+    return [sorted(graph["names"][j] for j in courses) for courses in plan]
+
+
+def unlock_values(possible_courses, curr_previous_courses=(), graph=None):
+    """Number of courses each possible course is, transitively, a
+    prerequisite of (not counting courses already taken).
+
+    Returns:
+        list: count per possible course
+    """
+    if graph is None:
+        graph = prereq_graph()
+    have = courses_mask(graph, curr_previous_courses)
+    index = graph["index"]
+    descendants = graph["descendants"]
+
+    counts = {}
+    values = []
+    for course in possible_courses:
+        number = course_number(course)
+        if number not in counts:
+            k = index.get(number)
+            counts[number] = 0 if k is None else bin(descendants[k] & ~have).count("1")
+        values.append(counts[number])
+    return values
+
+
+def add_unlock_values(costs, possible_courses, curr_previous_courses, weight):
+    """Costs row with weight times the unlock value of each course added.
+
+    Returns:
+        list: the new costs row
+    """
+    values = unlock_values(possible_courses, curr_previous_courses)
+    return [cost + weight * value for cost, value in zip(costs, values)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the prerequisite graph.")
+    parser.add_argument("course", help='eg. "CSCI 140"')
+    parser.add_argument("--taken", nargs="*", default=[], metavar="COURSE")
+    parser.add_argument("--semesters", type=int, default=1)
+    args = parser.parse_args()
+
+    graph = prereq_graph()
+    k = graph["index"].get(course_number(args.course))
+    if k is None:
+        print(f"{args.course} is not in the prerequisite graph")
+    else:
+        ancestors = mask_courses(graph, graph["ancestors"][k])
+        print(f"Prerequisites: {', '.join(ancestors)}")
+        print(f"Unlocks {graph['unlocks'][k]} courses")
+        chain = prerequisite_chain(graph, args.course, args.taken)
+        if chain is None:
+            print("Can not be reached from the courses taken")
+        else:
+            for semester, courses in enumerate(chain, 1):
+                print(f"Semester {semester}: {', '.join(courses)}")
+        unlocked = unlocked_by(graph, args.course, args.taken, args.semesters)
+        print(f"Makes reachable in {args.semesters} semester(s): {', '.join(unlocked)}")
@@ -0,0 +1,294 @@
+"""Shared Catalog
+
+Packs the parsed catalog into one read-only file of numpy arrays that
+worker processes map into memory instead of each loading
+rawData/course_data.json and preReqs/prereqs_edited.json into nested dicts:
+
+         -- sections: codes, names, instructors, courseMutualExclusionKey,
+            credits and seats, one row per section
+         -- meetings: (day, start minute, end minute) of every section, as
+            flat columns with one offset per section
+         -- conflicts: the ten minute time slots of every section (the rows
+            of the time conflict matrix) as a bitset of uint64 words, so the
+            sections that conflict with one are a single vectorized AND
+         -- prerequisites: the bitsets of catalog.prereq_graph (ancestors,
+            descendants and alternatives) as uint64 words
+
+The file is published once per catalog version under
+amplData/cache/shared_catalog/ and mapped with mmap, so every worker reads
+the same pages of the OS page cache: attaching takes no parsing and memory
+does not grow with the number of workers. This module only needs numpy, so
+a worker that imports it does not load funcs.
+
+With build_mode "process", main.build_instance publishes the catalog and
+its build workers attach it (run_task_graph's initializer), and the time
+conflict matrix is built from the slot bitsets instead of the catalog
+dicts:
+
+    with ProcessPoolExecutor(initializer=init_worker, initargs=(path,)) as pool:
+        ...  # worker_catalog() in the tasks
+
+    python -m catalog.shared
+"""
+
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from pipeline.cache import cache_dir, hash_file, hash_inputs
+
+shared_dir = os.path.join(cache_dir, "shared_catalog")
+prereqs_path = os.path.join("preReqs", "prereqs_edited.json")
+
+_day_order = "MTWRFSU"
+
+# Alignment of every array in the file (bytes)
+_alignment = 64
+
+_worker_catalog = None
+
+
+def _words(mask, num_words):
+    """uint64 words of a Python int bitset (lowest bits first)."""
+    return np.frombuffer(mask.to_bytes(num_words * 8, "little"), dtype="<u8")
+
+
+def pack_catalog(raw_data, graph):
+    """Arrays of the shared catalog.
+
+    Args:
+        raw_data (dict): the catalog (funcs.raw_data or a catalog.store term)
+        graph (dict): from catalog.prereq_graph.prereq_graph
+
+    Returns:
+        dict: {name: numpy array}
+    """
+    # Only the publisher needs funcs, workers just map the file
+    from funcs import discrete_times_func, meeting_intervals_func, minutes_func
+
+    courses = raw_data["data"]["courses"]
+    codes = list(courses)
+    times = np.array([minutes_func(t) for t in discrete_times_func()])
+    num_slot_words = (len(times) * 5 + 63) // 64
+
+    offsets = [0]
+    meeting_day, meeting_start, meeting_end = [], [], []
+    slot_words = np.zeros((len(codes), num_slot_words), dtype="<u8")
+    for j, course in enumerate(codes):
+        slots = 0
+        for day, start, end in meeting_intervals_func(raw_data, course):
+            meeting_day.append(_day_order.index(day) if day in _day_order else -1)
+            meeting_start.append(start)
+            meeting_end.append(end)
+            if day in "MTWRF":
+                # Same rule as the time conflict matrix: start < time < end
+                for k in np.flatnonzero((start < times) & (times < end)):
+                    slots |= 1 << int(k * 5 + "MTWRF".index(day))
+        offsets.append(len(meeting_day))
+        slot_words[j] = _words(slots, num_slot_words)
+
+    def column(key, default=""):
+        return [courses[course].get(key) or default for course in codes]
+
+    num_words = (len(graph["names"]) + 63) // 64
+    alternative_offsets = [0]
+    alternatives = []
+    for k in range(len(graph["names"])):
+        alternatives += graph["requires"].get(k, [])
+        alternative_offsets.append(len(alternatives))
+
+    def word_rows(masks):
+        rows = np.zeros((len(masks), num_words), dtype="<u8")
+        for k, mask in enumerate(masks):
+            rows[k] = _words(mask, num_words)
+        return rows
+
+    return {
+        "codes": np.array(codes, dtype=str),
+        "names": np.array(column("courseName"), dtype=str),
+        "instructors": np.array(
+            ["|".join(instructors) for instructors in column("courseInstructors", [])],
+            dtype=str,
+        ),
+        "exclusion_keys": np.array(
+            ["|".join(map(str, key)) for key in column("courseMutualExclusionKey", [])],
+            dtype=str,
+        ),
+        "credits": np.array([float(c or 0) for c in column("courseCredits", 0)]),
+        "seats_total": np.array(column("courseSeatsTotal", 0), dtype=np.int32),
+        "seats_filled": np.array(column("courseSeatsFilled", 0), dtype=np.int32),
+        "meeting_offsets": np.array(offsets, dtype=np.int32),
+        "meeting_day": np.array(meeting_day, dtype=np.int8),
+        "meeting_start": np.array(meeting_start, dtype=np.int16),
+        "meeting_end": np.array(meeting_end, dtype=np.int16),
+        "slot_times": times.astype(np.int16),
+        "slot_words": slot_words,
+        "prereq_names": np.array(graph["names"], dtype=str),
+        "prereq_ancestors": word_rows(graph["ancestors"]),
+        "prereq_descendants": word_rows(graph["descendants"]),
+        "prereq_unlocks": np.array(graph["unlocks"], dtype=np.int32),
+        "prereq_alternative_offsets": np.array(alternative_offsets, dtype=np.int32),
+        "prereq_alternatives": word_rows(alternatives),
+    }
+
+
+def write_shared_catalog(arrays, path):
+    """Writes arrays as one file: a JSON header ({name: [dtype, shape,
+    offset]}) after its 8 byte length, then every array, aligned."""
+    header = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = -(-offset // _alignment) * _alignment
+        header[name] = [array.dtype.str, list(array.shape), offset]
+        offset += array.nbytes
+    header_bytes = json.dumps(header).encode("utf-8")
+    start = -(-(8 + len(header_bytes)) // _alignment) * _alignment
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + f".{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(struct.pack("<Q", len(header_bytes)) + header_bytes)
+        for name, array in arrays.items():
+            f.seek(start + header[name][2])
+            f.write(np.ascontiguousarray(array).tobytes())
+    os.replace(temp_path, path)
+
+
+def publish_catalog(raw_data, graph, catalog_files):
+    """Writes the shared catalog of raw_data, unless this version of the
+    catalog files was already published.
+
+    Returns:
+        str: path of the file to attach (see SharedCatalog)
+    """
+    key = hash_inputs(
+        [hash_file(path) for path in catalog_files],
+        hash_file(prereqs_path),
+        hash_file(__file__),
+        hash_file(os.path.join(os.path.dirname(__file__), "prereq_graph.py")),
+        list(raw_data["data"]["terms"]),
+    )
+    path = os.path.join(shared_dir, key + ".bin")
+    if not os.path.exists(path):
+        write_shared_catalog(pack_catalog(raw_data, graph), path)
+    return path
+
+
+class SharedCatalog:
+    """Read-only view of a shared catalog file, its arrays map the file."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (length,) = struct.unpack_from("<Q", self._map, 0)
+        header = json.loads(self._map[8 : 8 + length])
+        start = -(-(8 + length) // _alignment) * _alignment
+
+        self.arrays = {}
+        for name, (dtype, shape, offset) in header.items():
+            count = int(np.prod(shape)) if shape else 1
+            self.arrays[name] = np.frombuffer(
+                self._map, dtype=dtype, count=count, offset=start + offset
+            ).reshape(shape)
+        self._positions = None
+        self._prereq_positions = None
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def position(self, course):
+        """Row of a section."""
+        if self._positions is None:
+            self._positions = {
+                code: j for j, code in enumerate(self.arrays["codes"].tolist())
+            }
+        return self._positions[course]
+
+    def meeting_intervals(self, course):
+        """Same as funcs.meeting_intervals_func.
+
+        Returns:
+            tuple: sorted (day, start minute, end minute) triples
+        """
+        j = self.position(course)
+        first, last = self.arrays["meeting_offsets"][j : j + 2]
+        return tuple(
+            (_day_order[day], int(start), int(end))
+            for day, start, end in zip(
+                self.arrays["meeting_day"][first:last],
+                self.arrays["meeting_start"][first:last],
+                self.arrays["meeting_end"][first:last],
+            )
+        )
+
+    def conflicts(self, course, courses=None):
+        """Sections that meet at the same time as course (itself included
+        when it meets at all).
+
+        Args:
+            courses (list, optional): sections to check, defaults to all
+
+        Returns:
+            list: the conflicting sections
+        """
+        slots = self.arrays["slot_words"]
+        rows = (
+            np.arange(len(slots))
+            if courses is None
+            else np.array([self.position(c) for c in courses], dtype=int)
+        )
+        overlap = (slots[rows] & slots[self.position(course)]).any(axis=1)
+        return self.arrays["codes"][rows[overlap]].tolist()
+
+    def time_conflict_matrix(self, courses):
+        """Same as funcs.time_conflict_matrix_func for courses (one row per
+        weekday and time slot, one column per section)."""
+        num_rows = len(self.arrays["slot_times"]) * 5
+        rows = np.array([self.position(c) for c in courses], dtype=int)
+        slots = self.arrays["slot_words"][rows].astype("<u8", copy=False)
+        bits = np.unpackbits(slots.view(np.uint8), axis=1, bitorder="little")
+        return bits[:, :num_rows].T.tolist()
+
+    def prereq_mask(self, course, kind="ancestors"):
+        """Bitset of catalog.prereq_graph (kind "ancestors" or
+        "descendants") as a Python int."""
+        if self._prereq_positions is None:
+            self._prereq_positions = {
+                name: k for k, name in enumerate(self.arrays["prereq_names"].tolist())
+            }
+        k = self._prereq_positions[" ".join(course.split()[:2])]
+        return int.from_bytes(self.arrays["prereq_" + kind][k].tobytes(), "little")
+
+    def close(self):
+        self.arrays = {}
+        try:
+            self._map.close()
+        except BufferError:
+            pass  # Arrays still in use, the map closes with the last of them
+
+
+def init_worker(path):
+    """Pool initializer: attaches the shared catalog in the worker."""
+    global _worker_catalog
+    _worker_catalog = SharedCatalog(path)
+
+
+def worker_catalog():
+    """Shared catalog attached by init_worker."""
+    return _worker_catalog
+
+
+if __name__ == "__main__":
+    # The publisher loads the catalog, workers only import what is above
+    from catalog.prereq_graph import prereq_graph
+    from funcs import raw_data
+    from userInput import catalog_files
+
+    path = publish_catalog(raw_data, prereq_graph(), catalog_files)
+    catalog = SharedCatalog(path)
+    print(f"{path}: {os.path.getsize(path) / 1e6:.2f} MB")
+    for name, array in catalog.arrays.items():
+        print(f"    {name:<28}{array.dtype.str:<8}{array.shape}")
@@ -0,0 +1,172 @@
+"""Catalog Store
+
+Holds the course catalogs of several terms side by side (eg. this term's
+rawData/course_data.json and the snapshots of earlier terms), so
+multi-semester planning and what-if comparisons can use them in one
+process:
+
+         -- every snapshot is split into one shard per term (courseTerm of
+            each section), and every shard is kept as a view shaped like
+            course_data.json ({"data": {"courses", "terms"}}), so selecting
+            a term returns an existing dict instead of reloading a file and
+            every function that takes raw_data works on it unchanged
+         -- strings are interned when a snapshot is added, so the codes,
+            names, instructors, days and times repeated across terms are
+            stored once
+         -- offerings: course (code without section number) -> terms, for
+            "when was this course offered" queries across the shards
+         -- the catalog index of a term (catalog.index) is built the first
+            time it is asked for and kept with the shard
+
+The catalog files are listed in catalog_files in userInput.py, and
+catalog_term selects the term planned for (the latest term by default).
+
+    python -m catalog.store
+"""
+
+import json
+import sys
+
+from userInput import catalog_files
+
+_stores = {}
+
+
+def _intern(value):
+    """Copy of a parsed JSON value with every string interned."""
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, dict):
+        return {sys.intern(key): _intern(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_intern(item) for item in value]
+    return value
+
+
+def _term_sort_key(info):
+    """Terms with a termSortKey (eg. [2021, True]) in its order, after the
+    terms without one, by termCode (so the two are never compared)."""
+    key = info.get("termSortKey")
+    if key is None:
+        return (0, (str(info.get("termCode", "")),))
+    return (1, tuple(key))
+
+
+class CatalogStore:
+    """Term shards of one or more course_data.json snapshots."""
+
+    def __init__(self):
+        self._views = {}
+        self._offerings = {}
+        self._order = []
+
+    def add_snapshot(self, raw_data):
+        """Adds every term of a parsed course_data.json. A term that is
+        already in the store is replaced by the newer snapshot.
+
+        Returns:
+            list: the terms added
+        """
+        raw_data = _intern(raw_data)
+        terms = raw_data["data"].get("terms") or {}
+        # Sections without courseTerm belong to the only term of the file
+        default_term = next(iter(terms)) if len(terms) == 1 else ""
+
+        shards = {}
+        for course, info in raw_data["data"]["courses"].items():
+            term = info.get("courseTerm") or default_term
+            shards.setdefault(term, {})[course] = info
+
+        views = dict(self._views)
+        for term, courses in shards.items():
+            info = terms.get(term, {"termCode": term, "termName": term})
+            views[term] = {"data": {"courses": courses, "terms": {term: info}}}
+        # Sorted before the store changes, so a bad sort key leaves it as is
+        order = sorted(
+            views, key=lambda term: _term_sort_key(views[term]["data"]["terms"][term])
+        )
+
+        # A replaced term is no longer offered where the old snapshot had it
+        for offered in self._offerings.values():
+            offered.difference_update(shards)
+        for term, courses in shards.items():
+            for course in courses:
+                key = sys.intern(course.rsplit("-", 1)[0])
+                self._offerings.setdefault(key, set()).add(term)
+        self._offerings = {
+            key: offered for key, offered in self._offerings.items() if offered
+        }
+        self._views = views
+        self._order = order
+        return list(shards)
+
+    def add_file(self, path):
+        """Adds every term of a course_data.json file.
+
+        Returns:
+            list: the terms added
+        """
+        with open(path, encoding="utf-8") as f:
+            return self.add_snapshot(json.load(f))
+
+    def terms(self):
+        """Terms of the store, oldest first."""
+        return list(self._order)
+
+    def term(self, term=None):
+        """Catalog of one term, shaped like course_data.json.
+
+        Args:
+            term (str, optional): eg. "SP 2021", defaults to the latest term
+
+        Returns:
+            dict: {"data": {"courses", "terms"}}
+        """
+        if term is None:
+            term = self._order[-1]
+        if term not in self._views:
+            raise KeyError(f"term {term!r} is not in the catalog, only {self.terms()}")
+        return self._views[term]
+
+    def index(self, term=None):
+        """Catalog index (catalog.index) of one term, built once."""
+        # catalog.index needs funcs, which loads its catalog from this module
+        from catalog.index import catalog_index
+
+        return catalog_index(self.term(term))
+
+    def offerings(self, course):
+        """Terms a course was offered in, oldest first.
+
+        Args:
+            course (str): eg. "CSCI 131 HM" (or a section, eg. "CSCI 131 HM-01")
+
+        Returns:
+            list
+        """
+        key = course if course in self._offerings else course.rsplit("-", 1)[0]
+        terms = self._offerings.get(key, set())
+        return [term for term in self._order if term in terms]
+
+
+def catalog_store(paths=None):
+    """Store of the catalog files (catalog_files in userInput.py), loaded once
+    per process."""
+    paths = tuple(paths or catalog_files)
+    if paths not in _stores:
+        store = CatalogStore()
+        for path in paths:
+            store.add_file(path)
+        _stores[paths] = store
+    return _stores[paths]
+
+
+if __name__ == "__main__":
+    store = catalog_store()
+    for term in store.terms():
+        view = store.term(term)
+        info = view["data"]["terms"][term]
+        print(
+            f'{term:<10}{info.get("termName", term):<16}'
+            f'{len(view["data"]["courses"]):>6} sections'
+        )
@@ -0,0 +1,262 @@
+"""Meeting Time Index
+
+Answers the questions of interactive schedule building without building a
+model, eg. "which sections conflict with this partial schedule?" and "what
+fits in the Tuesday 13:15 gap?":
+
+         -- one centered interval tree per weekday over the meeting
+            intervals of funcs.meeting_intervals_func (the same parsed
+            courseSchedule times the constraint builders use), so the
+            sections meeting during a time range are found in O(log n + k)
+         -- one list of the meetings of every weekday sorted by start, for
+            the sections that start and end inside a gap
+
+Conflicts follow the rule of the time conflict matrix, so the index never
+rejects a schedule the solver builds: a meeting takes the ten minute time
+slots t of discrete_times_func with start < t < end on a weekday (M-F), and
+two meetings conflict when they share a slot. The trees hold these slot
+ranges; back to back meetings do not conflict, and neither do two meetings
+that overlap by less than the slots can tell apart (eg. 18:00-19:15 and
+17:00-18:05).
+
+    python -m catalog.time_index --schedule "CSCI 131 HM-01" --gap T 13:15
+"""
+
+import argparse
+import bisect
+
+from funcs import discrete_times_func, meeting_intervals_func, minutes_func, raw_data
+
+# Bounds of a day for gaps (the first and last time of discrete_times_func)
+day_start = 7 * 60
+day_end = 24 * 60
+
+# Days and times of the rows of the time conflict matrix
+_slot_days = "MTWRF"
+_slot_times = [minutes_func(t) for t in discrete_times_func()]
+
+_indexes = {}
+
+
+def slot_range(start, end):
+    """Time slots of a meeting from start to end (minutes).
+
+    Returns:
+        tuple: (first slot, last slot + 1), empty when first >= last + 1
+    """
+    return (
+        bisect.bisect_right(_slot_times, start),
+        bisect.bisect_left(_slot_times, end),
+    )
+
+
+def build_interval_tree(intervals):
+    """Centered interval tree of (start, end, section) triples (slot
+    ranges, see slot_range).
+
+    Returns:
+        dict: {"center", "by_start", "by_end" (the intervals containing
+               center, sorted by start and by decreasing end), "left"
+               (intervals ending before center), "right" (starting after)},
+               or None when there are no intervals
+    """
+    if not intervals:
+        return None
+    endpoints = sorted(point for start, end, _ in intervals for point in (start, end))
+    center = endpoints[len(endpoints) // 2]
+
+    here = [i for i in intervals if i[0] <= center <= i[1]]
+    return {
+        "center": center,
+        "by_start": sorted(here),
+        "by_end": sorted(here, key=lambda i: -i[1]),
+        "left": build_interval_tree([i for i in intervals if i[1] < center]),
+        "right": build_interval_tree([i for i in intervals if i[0] > center]),
+    }
+
+
+def query_interval_tree(tree, start, end, found):
+    """Adds the sections of the intervals overlapping (start, end) to found."""
+    while tree is not None:
+        center = tree["center"]
+        if end <= center:
+            for i_start, _, section in tree["by_start"]:
+                if i_start >= end:
+                    break
+                found.add(section)
+            tree = tree["left"]
+        elif start >= center:
+            for _, i_end, section in tree["by_end"]:
+                if i_end <= start:
+                    break
+                found.add(section)
+            tree = tree["right"]
+        else:
+            found.update(section for _, _, section in tree["by_start"])
+            query_interval_tree(tree["left"], start, end, found)
+            tree = tree["right"]
+    return found
+
+
+def build_time_index(raw_data, courses=None):
+    """Builds the index of the meetings of courses.
+
+    Args:
+        courses (list, optional): defaults to every section of raw_data
+
+    Returns:
+        dict: {"meetings" ({section: intervals}), "trees" ({day: tree}),
+               "starts" ({day: sorted (start, end, section)})}
+    """
+    if courses is None:
+        courses = list(raw_data["data"]["courses"])
+
+    meetings = {}
+    by_day = {}
+    slots_by_day = {}
+    for course in courses:
+        meetings[course] = meeting_intervals_func(raw_data, course)
+        for day, start, end in meetings[course]:
+            if start < end:
+                by_day.setdefault(day, []).append((start, end, course))
+            first, last = slot_range(start, end)
+            if day in _slot_days and first < last:
+                slots_by_day.setdefault(day, []).append((first, last, course))
+
+    return {
+        "meetings": meetings,
+        "trees": {
+            day: build_interval_tree(items) for day, items in slots_by_day.items()
+        },
+        "starts": {day: sorted(items) for day, items in by_day.items()},
+    }
+
+
+def time_index(raw_data=raw_data):
+    """Index of every section of raw_data, built once per process."""
+    if id(raw_data) not in _indexes:
+        _indexes[id(raw_data)] = build_time_index(raw_data)
+    return _indexes[id(raw_data)]
+
+
+def _minutes(value):
+    """Minutes since midnight of "hh:mm" (or of a number of minutes)."""
+    return minutes_func(value) if isinstance(value, str) else value
+
+
+def meeting_during(index, day, start, end):
+    """Sections that conflict with a meeting on day from start to end.
+
+    Returns:
+        set: sections
+    """
+    first, last = slot_range(_minutes(start), _minutes(end))
+    if first >= last:
+        return set()
+    return query_interval_tree(index["trees"].get(day), first, last, set())
+
+
+def conflicting_sections(index, schedule):
+    """Sections that conflict with a partial schedule.
+
+    Args:
+        schedule (list): sections already chosen
+
+    Returns:
+        set: sections (not in schedule) meeting at the same time as one of
+             the sections of schedule
+    """
+    found = set()
+    for course in schedule:
+        for day, start, end in index["meetings"][course]:
+            first, last = slot_range(start, end)
+            if first < last:
+                query_interval_tree(index["trees"].get(day), first, last, found)
+    return found - set(schedule)
+
+
+def compatible_sections(index, schedule, courses=None):
+    """Sections that can be added to a partial schedule.
+
+    Args:
+        courses (list, optional): candidates, defaults to every section
+
+    Returns:
+        list: candidates (not in schedule) that conflict with none of it
+    """
+    excluded = conflicting_sections(index, schedule) | set(schedule)
+    if courses is None:
+        courses = index["meetings"]
+    return [course for course in courses if course not in excluded]
+
+
+def gap_around(index, schedule, day, time):
+    """Free time of a partial schedule on day around time.
+
+    Returns:
+        tuple: (start, end) in minutes, or None when time is taken
+    """
+    time = _minutes(time)
+    start, end = day_start, day_end
+    for course in schedule:
+        for meeting_day, m_start, m_end in index["meetings"][course]:
+            if meeting_day != day:
+                continue
+            if m_start < time < m_end:
+                return None
+            if m_end <= time:
+                start = max(start, m_end)
+            else:
+                end = min(end, m_start)
+    return start, end
+
+
+def fits_in_gap(index, day, start, end, schedule=()):
+    """Sections meeting on day only inside (start, end) that conflict with
+    nothing in schedule.
+
+    Returns:
+        list: sections, by start time
+    """
+    start, end = _minutes(start), _minutes(end)
+    items = index["starts"].get(day, [])
+    first = bisect.bisect_left(items, (start,))
+    last = bisect.bisect_left(items, (end,))
+    inside = dict.fromkeys(s for _, i_end, s in items[first:last] if i_end <= end)
+
+    excluded = conflicting_sections(index, schedule) | set(schedule)
+    return [
+        section
+        for section in inside
+        if section not in excluded
+        and all(
+            start <= m_start and m_end <= end
+            for m_day, m_start, m_end in index["meetings"][section]
+            if m_day == day
+        )
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the meeting time index.")
+    parser.add_argument("--schedule", nargs="*", default=[], metavar="SECTION")
+    parser.add_argument("--gap", nargs=2, metavar=("DAY", "HH:MM"))
+    args = parser.parse_args()
+
+    index = time_index()
+    conflicts = sorted(conflicting_sections(index, args.schedule))
+    print(f"{len(conflicts)} sections conflict with the schedule")
+    if args.gap:
+        day, time = args.gap
+        gap = gap_around(index, args.schedule, day, time)
+        if gap is None:
+            print(f"{day} {time} is taken")
+        else:
+            start, end = gap
+            fits = fits_in_gap(index, day, start, end, args.schedule)
+            print(
+                f"{day} {start // 60:02d}:{start % 60:02d}-"
+                f"{end // 60:02d}:{end % 60:02d}: {len(fits)} sections fit"
+            )
+            for course in fits:
+                print("    " + course)
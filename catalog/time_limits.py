@@ -0,0 +1,141 @@
+"""Time Limits
+
+Hard limits on when a student's classes may meet, eg. "no classes before
+10:00", "Fridays free" and "nothing after 19:00" (earliest_start, latest_end
+and days_off in userInput.py). Sections meeting outside the limits are
+removed from the possible courses before any matrix is built, so the model
+gets no variable (and no row) for them:
+
+         -- the meetings of every section are precomputed once per catalog
+            as a mask of the minutes of the week it meets (one bit per
+            minute, Monday 00:00 first)
+         -- the limits are compiled into one mask of blocked minutes, and a
+            section is removed when its mask and the blocked mask share a bit
+
+A meeting occupies its minutes from start to end, so a class starting at
+10:00 or ending at 19:00 is inside the limits above. Meetings without a time
+(start equal to end) are never removed.
+
+    python -m catalog.time_limits [--earliest 10:00] [--latest 19:00]
+                                  [--days-off F]
+"""
+
+import argparse
+
+from funcs import meeting_intervals_func, possible_courses_func, raw_data
+from userInput import days_off, earliest_start, latest_end
+
+_day_order = "MTWRFSU"
+_day_minutes = 24 * 60
+
+_masks = {}
+
+
+def _minutes(value):
+    """Minutes since midnight of "h:mm"/"hh:mm" (or of a number of minutes)."""
+    if isinstance(value, str):
+        hours, minutes = value.split(":")
+        return int(hours) * 60 + int(minutes)
+    return value
+
+
+def _span(day, start, end):
+    """Mask of the minutes of day from start to end."""
+    if end <= start:
+        return 0
+    offset = _day_order.index(day) * _day_minutes
+    return ((1 << (end - start)) - 1) << (offset + start)
+
+
+def build_meeting_masks(raw_data, courses=None):
+    """Minute masks of the meetings of courses.
+
+    Args:
+        courses (list, optional): defaults to every section of raw_data
+
+    Returns:
+        dict: {section: int mask}
+    """
+    if courses is None:
+        courses = raw_data["data"]["courses"]
+    masks = {}
+    for course in courses:
+        mask = 0
+        for day, start, end in meeting_intervals_func(raw_data, course):
+            if day in _day_order:
+                mask |= _span(day, start, end)
+        masks[course] = mask
+    return masks
+
+
+def meeting_masks(raw_data=raw_data):
+    """Masks of every section of raw_data, built once per process."""
+    if id(raw_data) not in _masks:
+        _masks[id(raw_data)] = build_meeting_masks(raw_data)
+    return _masks[id(raw_data)]
+
+
+def blocked_mask(limits):
+    """Compiles limits into the mask of the minutes no class may meet in.
+
+    Args:
+        limits (dict): {"earliest_start" ("hh:mm" or None), "latest_end"
+            ("hh:mm" or None), "days_off" (eg. ["F"] or "F")}
+
+    Returns:
+        int: the mask, 0 when nothing is blocked
+    """
+    if not limits:
+        return 0
+    mask = 0
+    for day in _day_order:
+        if day in (limits.get("days_off") or ()):
+            mask |= _span(day, 0, _day_minutes)
+            continue
+        if limits.get("earliest_start") is not None:
+            mask |= _span(day, 0, _minutes(limits["earliest_start"]))
+        if limits.get("latest_end") is not None:
+            mask |= _span(day, _minutes(limits["latest_end"]), _day_minutes)
+    return mask
+
+
+def remove_blocked_courses(possible_courses, limits, raw_data=raw_data):
+    """Removes the sections that meet outside limits.
+
+    Args:
+        limits (dict): see blocked_mask
+
+    Returns:
+        tuple: (the sections kept, in order, the sections removed)
+    """
+    blocked = blocked_mask(limits)
+    if not blocked:
+        return list(possible_courses), []
+    masks = meeting_masks(raw_data)
+    kept = []
+    removed = []
+    for course in possible_courses:
+        if masks.get(course, 0) & blocked:
+            removed.append(course)
+        else:
+            kept.append(course)
+    return kept, removed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sections outside time limits.")
+    parser.add_argument("--earliest", default=earliest_start)
+    parser.add_argument("--latest", default=latest_end)
+    parser.add_argument("--days-off", default="".join(days_off))
+    args = parser.parse_args()
+
+    limits = {
+        "earliest_start": args.earliest,
+        "latest_end": args.latest,
+        "days_off": list(args.days_off),
+    }
+    courses = possible_courses_func(raw_data)
+    kept, removed = remove_blocked_courses(courses, limits, raw_data)
+    print(f"{len(removed)} of {len(courses)} sections meet outside the limits")
+    for course in removed:
+        print("    " + course)
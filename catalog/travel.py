@@ -0,0 +1,146 @@
+"""Travel Time Between Campuses
+
+The time conflict matrix only forbids sections that meet at the same time,
+so a class ending at 10:50 at HMC and one starting at 11:00 at Pomona are
+compatible for it. With travel_times in userInput.py, two sections also
+conflict when one ends on a campus and the other starts on another campus
+less than the travel time later:
+
+         -- the campus of a meeting is the one its scheduleLocation names
+            ("PO Campus, ..."), else the campus suffix of the course code
+            (eg. "HM" of "CSCI 131 HM-01")
+         -- meetings whose location has one of online_location_words (eg.
+            "CM Campus, Online") need no travel, so they are left out
+         -- the extra conflicts are not added to the time grid: the sections
+            ending at the same time on one campus all meet during the minute
+            before, and the ones starting at the same time on another campus
+            all meet during that minute, so together they are a clique (no
+            two of them can be taken) and become one TravelTime row of
+            model.mod, listing only its sections
+
+Rows are only generated for the gaps shorter than the travel time, so the
+instance grows by a few sparse rows instead of a finer grid.
+
+    python -m catalog.travel
+"""
+
+import bisect
+
+from funcs import minutes_func, possible_courses_func, raw_data
+from userInput import online_location_words, travel_time_default, travel_times
+
+
+def meeting_campus(course, item, online_words=None):
+    """Campus of a courseSchedule item of course, eg. "PO".
+
+    Args:
+        online_words (list, optional): defaults to online_location_words
+
+    Returns:
+        str: the campus, or None for an online meeting
+    """
+    if online_words is None:
+        online_words = online_location_words
+    location = item.get("scheduleLocation") or ""
+    parts = location.split(",")
+    online = {word.lower() for word in online_words}
+    if any(word.lower() in online for part in parts[1:] for word in part.split()):
+        return None
+    first = parts[0].split()
+    if len(first) == 2 and first[1] == "Campus":
+        return first[0]
+    return course.rsplit("-", 1)[0].split()[-1]
+
+
+def campus_meetings_func(raw_data, course, online_words=None):
+    """Weekly meetings of a section with their campus.
+
+    Returns:
+        tuple: sorted (day, start minute, end minute, campus), meetings
+               without a time (start equal to end) and online meetings left
+               out
+    """
+    meetings = set()
+    for item in raw_data["data"]["courses"][course]["courseSchedule"]:
+        start = minutes_func(item["scheduleStartTime"])
+        end = minutes_func(item["scheduleEndTime"])
+        campus = meeting_campus(course, item, online_words)
+        if start < end and campus is not None:
+            for day in item["scheduleDays"]:
+                meetings.add((day, start, end, campus))
+    return tuple(sorted(meetings))
+
+
+def travel_time(campus, other, table=None, default=None):
+    """Minutes needed to go from campus to other (0 on the same campus).
+
+    Args:
+        table (dict, optional): {(campus, campus): minutes}, either order,
+            defaults to travel_times
+        default (int, optional): for pairs not in table, defaults to
+            travel_time_default
+    """
+    if campus == other:
+        return 0
+    if table is None:
+        table = travel_times
+    if default is None:
+        default = travel_time_default
+    return table.get((campus, other), table.get((other, campus), default))
+
+
+def travel_conflict_cliques(
+    raw_data, possible_courses, table=None, default=None, online_words=None
+):
+    """Groups of sections that conflict because of the travel between them.
+
+    Args:
+        online_words (list, optional): see meeting_campus
+
+    Returns:
+        list: sorted lists of sections, no two of a list can be taken
+              together (every list has sections on two campuses)
+    """
+    if table is None:
+        table = travel_times
+    if default is None:
+        default = travel_time_default
+    longest = max([default] + list(table.values()))
+    if longest <= 0:
+        return []
+
+    # (day, campus) -> {end: sections} and {start: sections}
+    ends = {}
+    starts = {}
+    for course in possible_courses:
+        meetings = campus_meetings_func(raw_data, course, online_words)
+        for day, start, end, campus in meetings:
+            ends.setdefault((day, campus), {}).setdefault(end, set()).add(course)
+            starts.setdefault((day, campus), {}).setdefault(start, set()).add(course)
+    start_times = {key: sorted(times) for key, times in starts.items()}
+
+    cliques = set()
+    for (day, campus), by_end in ends.items():
+        for (other_day, other), times in start_times.items():
+            if other_day != day or other == campus:
+                continue
+            needed = travel_time(campus, other, table, default)
+            if needed <= 0:
+                continue
+            for end, before in by_end.items():
+                first = bisect.bisect_left(times, end)
+                last = bisect.bisect_left(times, end + needed)
+                for start in times[first:last]:
+                    after = starts[(other_day, other)][start]
+                    if before | after != before:
+                        cliques.add(frozenset(before | after))
+    return sorted(sorted(clique) for clique in cliques)
+
+
+if __name__ == "__main__":
+    courses = possible_courses_func(raw_data)
+    cliques = travel_conflict_cliques(raw_data, courses)
+    sections = {course for clique in cliques for course in clique}
+    print(f"{len(cliques)} TravelTime rows over {len(sections)} sections")
+    for clique in cliques[:10]:
+        print("    " + ", ".join(clique))
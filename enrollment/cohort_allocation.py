@@ -0,0 +1,343 @@
+"""Cohort Allocation
+
+Allocates a whole cohort of students at once, maximizing the total
+Happiness of the cohort while no section gets more students than its
+remaining seats (courseSeatsTotal - courseSeatsFilled). Every student keeps
+their own constraints from model.mod.
+
+Instead of one MILP over all students, the seat constraints are relaxed
+with Lagrange multipliers (one "price" per section):
+
+         -- Every student solves their own model with costs[j] - price[j].
+            These solves are independent, so they run in parallel on warm
+            AMPL workers (solver.pool) that keep the model loaded for every
+            iteration.
+         -- Sections used by more students than their seats get a higher
+            price, unused ones a lower price (subgradient step).
+         -- The sum of the priced objectives plus sum(price * seats) is an
+            upper bound on the best cohort Happiness (only taken from the
+            iterations where every student solved to optimality).
+         -- Repair: students bumped from sections that are still over
+            capacity (lowest ranking first) are re-solved with the full
+            sections blocked (xUpper 0), until every section fits.
+
+Capacity is best effort: the repair stops after max_rounds, and a bumped
+student who has no schedule without the full sections is left without
+one. Both are reported ("over_capacity", "unscheduled").
+
+Put one workbook per student in cohort_dir (userInput.py) and run
+`python -m enrollment.cohort_allocation`. The demand tables of the
+allocation (enrollment.demand) are saved next to it.
+"""
+
+import glob
+import json
+import os
+
+from enrollment.demand import cohort_demand, export_demand
+from excel.excel_parser import parse_student_inputs
+from funcs import createDat, raw_data, variant_dat_string
+from main import build_instance, write_instance_files
+from solver.ampl_runner import run_sessions
+from solver.pool import SolverPool
+from solver.telemetry import log_solves, telemetry_record
+from userInput import cohort_dir, cohort_iterations, excel_sheet_name
+
+cohort_data_dir = os.path.join("amplData", "cohort")
+
+
+def load_cohort_inputs(cohort_dir, sheet_name):
+    """Reads every student workbook in cohort_dir.
+
+    Returns:
+        dict: {student name (workbook file name): inputs}
+    """
+    cohort = {}
+    for path in sorted(glob.glob(os.path.join(cohort_dir, "*.xlsx"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        cohort[name] = parse_student_inputs(path, sheet_name)
+    return cohort
+
+
+def remaining_seats_func(raw_data, courses):
+    """Seats left in every section that tracks seats (courseSeatsTotal > 0).
+
+    Returns:
+        dict: {course: remaining seats}
+    """
+    seats = {}
+    for course in courses:
+        info = raw_data["data"]["courses"][course]
+        total = info.get("courseSeatsTotal") or 0
+        if total > 0:
+            seats[course] = max(total - (info.get("courseSeatsFilled") or 0), 0)
+    return seats
+
+
+def prepare_student(name, inputs):
+    """Builds a student's matrices and writes their shared .dat file (every
+    param except costs, necessary and the enrollment bounds).
+
+    Returns:
+        dict: {"name", "instance", "dir_path", "shared_dat"}
+    """
+    instance = build_instance(inputs["only_selected"], inputs, refresh_seats=False)
+    dat_name = os.path.join("cohort", name)
+    dir_path = write_instance_files(instance, dat_name)
+    createDat(
+        dir_path,
+        "cohort_" + name + ".dat",
+        inputs["curr_num_reqs"],
+        student_params=False,
+    )
+
+    return {
+        "name": name,
+        "instance": instance,
+        "dir_path": dir_path,
+        "shared_dat": os.path.join("amplFiles", "cohort_" + name + ".dat"),
+    }
+
+
+def priced_costs(instance, prices):
+    """Costs of a student after subtracting the section prices.
+
+    Returns:
+        List: Row of costs corresponding to each possible course.
+    """
+    costs_row = list(instance["costs"])
+    for i, course in enumerate(instance["possible_courses"]):
+        costs_row[i] -= prices.get(course, 0)
+    return costs_row
+
+
+def solve_students(students, prices, blocked, tag, max_workers=None, pool=None):
+    """Solves every student with priced (and blocked) costs.
+
+    Args:
+        students (list): from prepare_student
+        prices (dict): {course: price}
+        blocked (dict): {student name: set of courses they may not take}
+        tag (str): name of this round, used for the .dat file names
+        pool (solver.pool.SolverPool, optional): solve on its workers
+            instead of one AMPL session per worker
+
+    Returns:
+        list of dicts: the solution of every student, in order
+    """
+    jobs = []
+    for student in students:
+        instance = student["instance"]
+        costs = priced_costs(instance, prices)
+        params_dat = student["dir_path"] + f"params_{tag}.dat"
+        with open(params_dat, "w") as f:
+            f.write(
+                variant_dat_string(
+                    instance["possible_courses"],
+                    costs,
+                    instance["necessary"],
+                    instance["min_courses"],
+                    instance["max_courses"],
+                    blocked.get(student["name"], ()),
+                )
+            )
+        jobs.append(
+            ([student["shared_dat"], params_dat], instance["possible_courses"])
+        )
+
+    if pool is not None:
+        solutions = pool.solve_many(jobs)
+    else:
+        solutions = run_sessions(jobs, cohort_data_dir, max_workers)
+    log_solves(
+        [
+            telemetry_record(
+                f'cohort/{student["name"]}/{tag}', solution, student["instance"]
+            )
+            for student, solution in zip(students, solutions)
+        ]
+    )
+    return solutions
+
+
+def seat_usage(assignment, seats):
+    """Number of students in every section that tracks seats."""
+    usage = {course: 0 for course in seats}
+    for chosen in assignment.values():
+        for course in chosen:
+            if course in usage:
+                usage[course] += 1
+    return usage
+
+
+def happiness(student, chosen):
+    """Objective of a student for their original (unpriced) costs."""
+    instance = student["instance"]
+    return sum(instance["costs"][instance["course_to_index"][c]] for c in chosen)
+
+
+def repair_assignment(
+    students, assignment, seats, max_rounds=10, max_workers=None, pool=None
+):
+    """Bumps students out of over capacity sections and re-solves them with
+    every full section blocked.
+
+    Students who rank a section highest keep their seat.
+
+    Returns:
+        dict: {student name: chosen courses} (updated copy of assignment)
+        set: bumped students whose last re-solve found no schedule
+    """
+    by_name = {student["name"]: student for student in students}
+    assignment = dict(assignment)
+    blocked = {}
+    unscheduled = set()
+
+    for round_number in range(max_rounds):
+        usage = seat_usage(assignment, seats)
+        bumped = set()
+        for course, used in usage.items():
+            if used <= seats[course]:
+                continue
+
+            holders = [name for name, chosen in assignment.items() if course in chosen]
+            holders.sort(
+                key=lambda name: (
+                    -by_name[name]["instance"]["costs"][
+                        by_name[name]["instance"]["course_to_index"][course]
+                    ],
+                    name,
+                )
+            )
+            bumped.update(holders[seats[course] :])
+
+        if not bumped:
+            break
+
+        # Sections full after the bumped students leave them
+        for name in bumped:
+            assignment[name] = []
+        usage = seat_usage(assignment, seats)
+        full = {course for course, used in usage.items() if used >= seats[course]}
+        for name in bumped:
+            blocked[name] = blocked.get(name, set()) | full
+
+        to_solve = [by_name[name] for name in sorted(bumped)]
+        solutions = solve_students(
+            to_solve, {}, blocked, f"repair{round_number}", max_workers, pool
+        )
+        for student, solution in zip(to_solve, solutions):
+            assignment[student["name"]] = solution["chosen"]
+            if solution["solve_result"] == "solved":
+                unscheduled.discard(student["name"])
+            else:
+                unscheduled.add(student["name"])
+
+    return assignment, unscheduled
+
+
+def allocate_cohort(
+    students, seats, iterations=20, step=1.0, max_workers=None, pool=None
+):
+    """Lagrangian allocation of the cohort over the section seats.
+
+    Args:
+        students (list): from prepare_student
+        seats (dict): {course: remaining seats}
+        iterations (int): subgradient iterations
+        step (float): initial step size (in ranking units)
+        pool (solver.pool.SolverPool, optional): see solve_students
+
+    Returns:
+        dict: {"assignment": {name: chosen courses},
+               "happiness": total Happiness of the assignment,
+               "upper_bound": best bound on the cohort Happiness (None when
+                   no iteration solved every student to optimality),
+               "gap": relative gap between the two,
+               "prices": final section prices,
+               "over_capacity": {course: extra students} left after repair,
+               "unscheduled": students the repair found no schedule for}
+    """
+    prices = {course: 0.0 for course in seats}
+    upper_bound = None
+    assignment = {}
+
+    for t in range(iterations):
+        solutions = solve_students(students, prices, {}, f"iter{t}", max_workers, pool)
+        assignment = {
+            student["name"]: solution["chosen"]
+            for student, solution in zip(students, solutions)
+        }
+
+        # Bound for the current prices, only valid when every student's
+        # objective is their optimum (a limit incumbent is lower)
+        if all(solution["solve_result"] == "solved" for solution in solutions):
+            bound = sum(solution["objective"] for solution in solutions)
+            bound += sum(prices[course] * seats[course] for course in seats)
+            if upper_bound is None or bound < upper_bound:
+                upper_bound = bound
+
+        usage = seat_usage(assignment, seats)
+        if all(usage[course] <= seats[course] for course in seats):
+            break
+
+        step_size = step / (t + 1)
+        for course in seats:
+            prices[course] = max(
+                0.0, prices[course] + step_size * (usage[course] - seats[course])
+            )
+
+    assignment, unscheduled = repair_assignment(
+        students, assignment, seats, max_workers=max_workers, pool=pool
+    )
+    total = sum(happiness(student, assignment[student["name"]]) for student in students)
+    usage = seat_usage(assignment, seats)
+
+    gap = None
+    if upper_bound:
+        gap = max(upper_bound - total, 0) / abs(upper_bound)
+
+    return {
+        "assignment": assignment,
+        "happiness": total,
+        "upper_bound": upper_bound,
+        "gap": gap,
+        "prices": {course: price for course, price in prices.items() if price > 0},
+        "over_capacity": {
+            course: usage[course] - seats[course]
+            for course in seats
+            if usage[course] > seats[course]
+        },
+        "unscheduled": sorted(unscheduled),
+    }
+
+
+if __name__ == "__main__":
+    cohort = load_cohort_inputs(cohort_dir, excel_sheet_name)
+    students = [prepare_student(name, inputs) for name, inputs in cohort.items()]
+
+    courses = set()
+    for student in students:
+        courses.update(student["instance"]["possible_courses"])
+    seats = remaining_seats_func(raw_data, courses)
+
+    with SolverPool() as pool:
+        result = allocate_cohort(
+            students, seats, iterations=cohort_iterations, pool=pool
+        )
+    print(f'Cohort Happiness: {result["happiness"]:g}')
+    if result["gap"] is not None:
+        print(f'Upper bound: {result["upper_bound"]:g} (gap {result["gap"]:.2%})')
+    if result["upper_bound"] is None:
+        print("Upper bound: unavailable (no iteration solved every student)")
+    if result["over_capacity"]:
+        print(f'Over capacity: {result["over_capacity"]}')
+    if result["unscheduled"]:
+        print(f'No schedule without full sections: {result["unscheduled"]}')
+
+    with open(os.path.join(cohort_data_dir, "allocation.json"), "w") as f:
+        json.dump(result, f, indent=4)
+
+    tables = cohort_demand(students, result["assignment"], raw_data)
+    for path in export_demand(tables):
+        print("Saved " + path)
@@ -0,0 +1,367 @@
+"""Cohort Demand Analytics
+
+Aggregates the schedules of a whole cohort (amplData/cohort/allocation.json,
+or any {student: chosen sections}) into three tables:
+
+         -- sections: predicted demand of every section the cohort could
+            take next to its seats (courseSeatsTotal, courseSeatsFilled),
+            and how many students it is over its remaining seats
+         -- slots: demand and remaining seats of every meeting time range
+            (runs of the ten minute slots of the time conflict matrix with
+            the same sections), the most contested first
+         -- requirements: per major and requirement, how many students need
+            it and how many the chosen schedules cover
+
+The choices are first turned into columnar arrays (one row per chosen
+section: student index, section index), and every aggregate is a numpy
+bincount or matrix product over them. A table is a dict of numpy columns,
+exported as Parquet or Arrow IPC (pyarrow, optional) or compressed .npz:
+
+    python -m enrollment.demand [--format parquet|arrow|npz] [--top N]
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+from funcs import discrete_times_func, meeting_intervals_func, minutes_func, raw_data
+from userInput import cohort_dir, demand_export_format, excel_sheet_name
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pyarrow is optional
+    pyarrow = None
+
+demand_dir = os.path.join("amplData", "cohort", "demand")
+
+_days = "MTWRF"
+
+
+def choice_arrays(assignment, sections):
+    """Columnar form of the cohort's schedules.
+
+    Args:
+        assignment (dict): {student name: chosen sections}
+        sections (list): every section of the tables, in order
+
+    Returns:
+        dict: {"students" (names, sorted), "student" and "section" (int
+               arrays, one entry per chosen section)}
+    """
+    position = {course: k for k, course in enumerate(sections)}
+    students = sorted(assignment)
+    student_column = []
+    section_column = []
+    for i, name in enumerate(students):
+        for course in assignment[name]:
+            student_column.append(i)
+            section_column.append(position[course])
+    return {
+        "students": students,
+        "student": np.array(student_column, dtype=np.int32),
+        "section": np.array(section_column, dtype=np.int32),
+    }
+
+
+def section_demand(choices, sections, raw_data):
+    """Demand of every section next to its seats.
+
+    Returns:
+        dict: columns "section", "demand", "seats_total", "seats_filled",
+              "seats_left" (-1 when the section does not track seats) and
+              "over" (students over the remaining seats)
+    """
+    courses = raw_data["data"]["courses"]
+    total = np.array(
+        [courses[course].get("courseSeatsTotal") or 0 for course in sections]
+    )
+    filled = np.array(
+        [courses[course].get("courseSeatsFilled") or 0 for course in sections]
+    )
+    demand = np.bincount(choices["section"], minlength=len(sections))
+
+    tracked = total > 0
+    left = np.where(tracked, np.maximum(total - filled, 0), -1)
+    over = np.where(tracked, np.maximum(demand - left, 0), 0)
+    return {
+        "section": np.array(sections, dtype=str),
+        "demand": demand,
+        "seats_total": total,
+        "seats_filled": filled,
+        "seats_left": left,
+        "over": over,
+    }
+
+
+def slot_demand(section_table, raw_data):
+    """Demand and remaining seats of the meeting times of the sections with
+    demand, the most contested (demand per remaining seat) first.
+
+    The ten minute time slots (the rows of the time conflict matrix) that
+    follow each other on a day with the same sections meeting are one time
+    range, and the ranges at the same times with the same sections on other
+    days are merged into it, so a section meeting TR 11:00-12:15 alone is
+    one row ("TR 11:10-12:10") instead of one row per slot.
+
+    Returns:
+        dict: columns "slot" (eg. "TR 11:10-12:10", the first and last slot
+              of the range, or "W 19:20" for one slot), "demand",
+              "seats_left", "sections" (sections meeting then with demand),
+              "untracked" (of those, the ones that do not track seats, left
+              out of seats_left and pressure) and "pressure" (demand of the
+              tracked sections / seats_left, inf without seats left, NaN
+              and last when only untracked sections meet)
+    """
+    times = np.array([minutes_func(t) for t in discrete_times_func()])
+    clock = [f"{t // 100:02d}:{t % 100:02d}" for t in discrete_times_func()]
+
+    # Every meeting of every section with demand, as columns
+    meeting_section, meeting_day, meeting_start, meeting_end = [], [], [], []
+    for k in np.flatnonzero(section_table["demand"]):
+        for day, start, end in meeting_intervals_func(
+            raw_data, section_table["section"][k]
+        ):
+            if day in _days:
+                meeting_section.append(k)
+                meeting_day.append(_days.index(day))
+                meeting_start.append(start)
+                meeting_end.append(end)
+    meeting_section = np.array(meeting_section, dtype=int)
+    meeting_day = np.array(meeting_day, dtype=int)
+
+    # Same rule as the time conflict matrix: start < time < end
+    inside = (np.array(meeting_start)[:, None] < times[None, :]) & (
+        times[None, :] < np.array(meeting_end)[:, None]
+    )
+    meeting, time_index = np.nonzero(inside)
+    slot = time_index * len(_days) + meeting_day[meeting]
+    section = meeting_section[meeting]
+
+    # A section meeting twice in one slot (two schedule items) counts once
+    pairs = slot * len(section_table["section"]) + section
+    _, first = np.unique(pairs, return_index=True)
+    slot = slot[first]
+    section = section[first]
+
+    num_slots = len(times) * len(_days)
+    demand = np.bincount(
+        slot, weights=section_table["demand"][section], minlength=num_slots
+    )
+    # Sections without seat tracking (seats_left -1) have no seats to count
+    tracked = section_table["seats_left"][section] >= 0
+    tracked_demand = np.bincount(
+        slot, weights=section_table["demand"][section] * tracked, minlength=num_slots
+    )
+    seats = np.where(tracked, section_table["seats_left"][section], 0)
+    seats_left = np.bincount(slot, weights=seats, minlength=num_slots)
+    count = np.bincount(slot, minlength=num_slots)
+    untracked = np.bincount(slot, weights=~tracked, minlength=num_slots)
+
+    # Time ranges: (sections, first slot, last slot) -> days
+    meeting_then = {}
+    for s, k in zip(slot.tolist(), section.tolist()):
+        meeting_then.setdefault(s, set()).add(k)
+    ranges = {}
+    for d in range(len(_days)):
+        run = None
+        for t in range(len(times) + 1):
+            here = frozenset(meeting_then.get(t * len(_days) + d, ()))
+            if run is not None and here == run[0]:
+                run[2] = t
+                continue
+            if run is not None:
+                ranges.setdefault(tuple(run), []).append(d)
+            run = [here, t, t] if here and t < len(times) else None
+
+    labels, rows = [], []
+    for (_, first_time, last_time), days in ranges.items():
+        label = "".join(_days[d] for d in days) + " " + clock[first_time]
+        if last_time > first_time:
+            label += "-" + clock[last_time]
+        labels.append(label)
+        rows.append(first_time * len(_days) + days[0])
+    labels = np.array(labels, dtype=str)
+    rows = np.array(rows, dtype=int)
+    demand, seats_left, count = demand[rows], seats_left[rows], count[rows]
+    tracked_demand, untracked = tracked_demand[rows], untracked[rows]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pressure = np.where(tracked_demand > 0, tracked_demand / seats_left, np.nan)
+
+    order = np.lexsort((labels, -demand, -pressure))
+    return {
+        "slot": labels[order],
+        "demand": demand[order].astype(int),
+        "seats_left": seats_left[order].astype(int),
+        "sections": count[order],
+        "untracked": untracked[order].astype(int),
+        "pressure": pressure[order],
+    }
+
+
+def requirement_coverage(students, assignment):
+    """How many students need each requirement and how many the chosen
+    schedules cover.
+
+    Args:
+        students (list): from cohort_allocation.prepare_student
+        assignment (dict): {student name: chosen sections}
+
+    Returns:
+        dict: columns "major", "requirement", "students" (needing it),
+              "covered" (of those, covered by their schedule) and
+              "coverage"
+    """
+    totals = {}
+    for student in students:
+        instance = student["instance"]
+        matrix = np.asarray(instance["requirements_matrix"], dtype=float)
+        if matrix.size == 0:
+            continue
+        chosen = np.zeros(matrix.shape[1])
+        for course in assignment.get(student["name"], []):
+            chosen[instance["course_to_index"][course]] = 1
+        necessary = np.array([float(value) for value in instance["necessary"]])
+        needed = necessary > 0
+        covered = needed & (matrix @ chosen >= necessary)
+
+        major = instance.get("major", "-")
+        if major not in totals:
+            totals[major] = np.zeros((2, len(necessary)), dtype=int)
+        totals[major] += [needed, covered]
+
+    majors, requirements, needing, covered = [], [], [], []
+    for major, (needed, met) in totals.items():
+        for r in range(len(needed)):
+            majors.append(major)
+            requirements.append(f"r{r + 1}")
+            needing.append(needed[r])
+            covered.append(met[r])
+    needing = np.array(needing, dtype=int)
+    covered = np.array(covered, dtype=int)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        coverage = np.where(needing > 0, covered / needing, np.nan)
+    return {
+        "major": np.array(majors, dtype=str),
+        "requirement": np.array(requirements, dtype=str),
+        "students": needing,
+        "covered": covered,
+        "coverage": coverage,
+    }
+
+
+def cohort_demand(students, assignment, raw_data):
+    """Every demand table of a cohort.
+
+    Returns:
+        dict: {"sections", "slots", "requirements"} tables
+    """
+    sections = set()
+    for student in students:
+        sections.update(student["instance"]["possible_courses"])
+    for chosen in assignment.values():
+        sections.update(chosen)
+    sections = sorted(sections)
+
+    choices = choice_arrays(assignment, sections)
+    section_table = section_demand(choices, sections, raw_data)
+    return {
+        "sections": section_table,
+        "slots": slot_demand(section_table, raw_data),
+        "requirements": requirement_coverage(students, assignment),
+    }
+
+
+def write_table(table, path):
+    """Writes a table as Parquet (.parquet), Arrow IPC (.arrow) or compressed
+    numpy arrays (.npz)."""
+    if path.endswith(".npz"):
+        np.savez_compressed(path, **table)
+        return
+    arrow_table = pyarrow.table({name: column for name, column in table.items()})
+    if path.endswith(".parquet"):
+        pyarrow.parquet.write_table(arrow_table, path)
+    else:
+        with pyarrow.OSFile(path, "wb") as sink:
+            with pyarrow.ipc.new_file(sink, arrow_table.schema) as writer:
+                writer.write_table(arrow_table)
+
+
+def export_demand(tables, out_dir=demand_dir, file_format=demand_export_format):
+    """Writes every table to out_dir/{name}.{parquet, arrow or npz}
+    (npz when pyarrow is not installed).
+
+    Returns:
+        list: the paths written
+    """
+    if pyarrow is None and file_format != "npz":
+        print(f"pyarrow is not installed, writing .npz instead of .{file_format}")
+        file_format = "npz"
+    os.makedirs(out_dir, exist_ok=True)
+
+    paths = []
+    for name, table in tables.items():
+        path = os.path.join(out_dir, f"{name}.{file_format}")
+        write_table(table, path)
+        paths.append(path)
+    return paths
+
+
+def print_demand(tables, top=10):
+    sections = tables["sections"]
+    print(f"{'Section':<22}{'Demand':>8}{'Seats left':>12}{'Over':>6}")
+    order = np.lexsort((-sections["demand"], -sections["over"]))[:top]
+    for k in order:
+        left = sections["seats_left"][k]
+        print(
+            f'{sections["section"][k]:<22}{sections["demand"][k]:>8}'
+            f'{left if left >= 0 else "-":>12}{sections["over"][k]:>6}'
+        )
+
+    slots = tables["slots"]
+    print(
+        f"\n{'Time':<20}{'Demand':>8}{'Seats left':>12}{'Sections':>10}"
+        f"{'Untracked':>11}"
+    )
+    for k in range(min(top, len(slots["slot"]))):
+        print(
+            f'{slots["slot"][k]:<20}{slots["demand"][k]:>8}'
+            f'{slots["seats_left"][k]:>12}{slots["sections"][k]:>10}'
+            f'{slots["untracked"][k]:>11}'
+        )
+
+    requirements = tables["requirements"]
+    print(f"\n{'Major':<10}{'Req':<6}{'Students':>10}{'Covered':>9}")
+    for k in range(len(requirements["major"])):
+        if requirements["students"][k]:
+            print(
+                f'{requirements["major"][k]:<10}{requirements["requirement"][k]:<6}'
+                f'{requirements["students"][k]:>10}{requirements["covered"][k]:>9}'
+            )
+
+
+if __name__ == "__main__":
+    # cohort_allocation runs this module after an allocation, so it is only
+    # imported here
+    from enrollment.cohort_allocation import (
+        cohort_data_dir,
+        load_cohort_inputs,
+        prepare_student,
+    )
+
+    parser = argparse.ArgumentParser(description="Cohort demand analytics.")
+    parser.add_argument("--format", default=demand_export_format)
+    parser.add_argument("--top", type=int, default=10, metavar="N")
+    args = parser.parse_args()
+
+    with open(os.path.join(cohort_data_dir, "allocation.json")) as f:
+        assignment = json.load(f)["assignment"]
+    cohort = load_cohort_inputs(cohort_dir, excel_sheet_name)
+    students = [prepare_student(name, inputs) for name, inputs in cohort.items()]
+
+    tables = cohort_demand(students, assignment, raw_data)
+    print_demand(tables, args.top)
+    for path in export_demand(tables, file_format=args.format):
+        print("Saved " + path)
@@ -0,0 +1,369 @@
+"""Seat Availability Feed
+
+Refreshes the enrollment fields of rawData/course_data.json
+(courseEnrollmentStatus, courseSeatsFilled, courseSeatsTotal and
+courseWaitlistLength) from an HTTP endpoint before the model is built.
+
+OUTLINE:
+
+         -- Every section is requested concurrently with asyncio, over a
+            small pool of keep-alive connections per host. A request on a
+            reused connection that the server has closed in the meantime is
+            sent again once on a new connection.
+         -- Requests are conditional (If-None-Match / If-Modified-Since).
+            Validators and the last record of every section are kept in
+            rawData/seat_feed_cache.json, so a "304 Not Modified" reuses the
+            cached record.
+         -- The feed url is a template, eg.
+            "http://localhost:8000/sections/{course_code}", and every
+            response is a JSON object with the same enrollment keys as
+            course_data.json.
+
+For local testing, run `python -m enrollment.seat_feed` to start a stand-in
+feed that serves the enrollment fields of course_data.json.
+"""
+
+import asyncio
+import email.utils
+import hashlib
+import json
+import os
+import ssl
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+seat_feed_cache_path = r"rawData/seat_feed_cache.json"
+
+enrollment_keys = (
+    "courseEnrollmentStatus",
+    "courseSeatsFilled",
+    "courseSeatsTotal",
+    "courseWaitlistLength",
+)
+
+
+##################################################
+# Connection Pool:
+
+
+class ConnectionPool:
+    """Keeps up to pool_size open connections per (scheme, host, port) and
+    hands them out to concurrent requests."""
+
+    def __init__(self, pool_size=8):
+        self.pool_size = pool_size
+        self._idle = {}
+        self._limits = {}
+
+    def _key(self, url):
+        scheme = url.scheme or "http"
+        port = url.port or (443 if scheme == "https" else 80)
+        return scheme, url.hostname, port
+
+    async def acquire(self, url, fresh=False):
+        """Returns (key, reader, writer, whether the connection is reused).
+        fresh opens a new connection even when an idle one is available."""
+        key = self._key(url)
+        if key not in self._limits:
+            self._limits[key] = asyncio.Semaphore(self.pool_size)
+            self._idle[key] = []
+        await self._limits[key].acquire()
+
+        idle = self._idle[key]
+        while idle and not fresh:
+            reader, writer = idle.pop()
+            if not reader.at_eof() and not writer.is_closing():
+                return key, reader, writer, True
+            writer.close()
+
+        scheme, host, port = key
+        context = ssl.create_default_context() if scheme == "https" else None
+        try:
+            reader, writer = await asyncio.open_connection(host, port, ssl=context)
+        except BaseException:
+            self._limits[key].release()
+            raise
+        return key, reader, writer, False
+
+    def release(self, key, reader, writer, reusable):
+        if reusable:
+            self._idle[key].append((reader, writer))
+        else:
+            writer.close()
+        self._limits[key].release()
+
+    def close(self):
+        for idle in self._idle.values():
+            for reader, writer in idle:
+                writer.close()
+            idle.clear()
+
+
+async def _read_body(reader, headers):
+    """Reads a response body according to its framing headers.
+
+    Returns:
+        tuple: (body bytes, whether the connection can be reused)
+    """
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        body = b""
+        while True:
+            size = int((await reader.readline()).split(b";")[0].strip(), 16)
+            if size == 0:
+                # Trailers end with an empty line
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                break
+            body += await reader.readexactly(size)
+            await reader.readline()
+        return body, True
+
+    if "content-length" in headers:
+        return await reader.readexactly(int(headers["content-length"])), True
+
+    # No framing, so the body ends when the server closes the connection
+    return await reader.read(), False
+
+
+async def _exchange(reader, writer, host, path, request_headers):
+    """Writes one GET request and reads its response.
+
+    Returns:
+        tuple: (status code, response headers (lowercase keys), body bytes,
+                whether the connection can be reused)
+    """
+    request = f"GET {path} HTTP/1.1\r\nHost: {host}\r\n"
+    request += "Accept: application/json\r\nConnection: keep-alive\r\n"
+    for name, value in request_headers.items():
+        request += f"{name}: {value}\r\n"
+    writer.write((request + "\r\n").encode("latin-1"))
+    await writer.drain()
+
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError("connection closed before the response")
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if status in (204, 304):
+        body, reusable = b"", True
+    else:
+        body, reusable = await _read_body(reader, headers)
+    if headers.get("connection", "").lower() == "close":
+        reusable = False
+
+    return status, headers, body, reusable
+
+
+async def _get(pool, url, request_headers, timeout):
+    """Sends a GET request over a pooled connection. The timeout only covers
+    the request itself, not the wait for a free connection.
+
+    A keep-alive connection can be closed by the server while it is idle,
+    which only shows once the request is sent, so a request that fails on a
+    reused connection is sent again (once) on a new one.
+
+    Returns:
+        tuple: (status code, response headers (lowercase keys), body bytes)
+    """
+    parsed = urllib.parse.urlsplit(url)
+    path = parsed.path or "/"
+    if parsed.query:
+        path += "?" + parsed.query
+
+    for attempt in range(2):
+        key, reader, writer, reused = await pool.acquire(parsed, fresh=attempt > 0)
+        reusable = False
+        try:
+            status, headers, body, reusable = await asyncio.wait_for(
+                _exchange(reader, writer, parsed.netloc, path, request_headers),
+                timeout,
+            )
+            break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            if not reused:
+                raise
+        finally:
+            pool.release(key, reader, writer, reusable)
+
+    return status, headers, body
+
+
+##################################################
+# Fetching Seat Availability:
+
+
+def load_seat_feed_cache(cache_path=seat_feed_cache_path):
+    if not os.path.exists(cache_path):
+        return {}
+    with open(cache_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_seat_feed_cache(cache, cache_path=seat_feed_cache_path):
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=1)
+
+
+async def _fetch_one(pool, feed_url, course_code, cache, timeout):
+    url = feed_url.format(course_code=urllib.parse.quote(course_code))
+    cached = cache.get(course_code, {})
+
+    request_headers = {}
+    if cached.get("etag"):
+        request_headers["If-None-Match"] = cached["etag"]
+    if cached.get("last_modified"):
+        request_headers["If-Modified-Since"] = cached["last_modified"]
+
+    status, headers, body = await _get(pool, url, request_headers, timeout)
+
+    if status == 304 and "record" in cached:
+        return course_code, cached["record"]
+
+    if status != 200:
+        raise ValueError(f"seat feed returned {status} for {course_code}")
+
+    record = json.loads(body.decode("utf-8"))
+    record = {key: record.get(key) for key in enrollment_keys}
+    cache[course_code] = {
+        "etag": headers.get("etag"),
+        "last_modified": headers.get("last-modified"),
+        "record": record,
+    }
+    return course_code, record
+
+
+async def fetch_seat_availability_async(
+    course_codes, feed_url, pool_size=8, timeout=10.0, cache=None
+):
+    """Requests the availability of every section concurrently.
+
+    Sections whose request fails keep their previous availability: they are
+    left out of the returned dict and the failure count is printed.
+
+    Args:
+        course_codes (list): complete course codes to refresh
+        feed_url (str): url template containing "{course_code}"
+        pool_size (int): maximum open connections per host
+        timeout (float): seconds allowed per request
+        cache (dict, optional): validators and records from earlier runs,
+                                updated in place
+
+    Returns:
+        dict: {course code: {enrollment key: value}}
+    """
+    if cache is None:
+        cache = {}
+
+    pool = ConnectionPool(pool_size)
+    try:
+        results = await asyncio.gather(
+            *[
+                _fetch_one(pool, feed_url, course_code, cache, timeout)
+                for course_code in course_codes
+            ],
+            return_exceptions=True,
+        )
+    finally:
+        pool.close()
+
+    availability = {}
+    failures = 0
+    for result in results:
+        if isinstance(result, BaseException):
+            failures += 1
+        else:
+            availability[result[0]] = result[1]
+
+    if failures:
+        print(f"Seat feed: {failures} of {len(course_codes)} sections not refreshed")
+
+    return availability
+
+
+def fetch_seat_availability(
+    course_codes, feed_url, pool_size=8, timeout=10.0, cache_path=seat_feed_cache_path
+):
+    """Synchronous wrapper around fetch_seat_availability_async that loads
+    and saves the conditional request cache."""
+    cache = load_seat_feed_cache(cache_path)
+    availability = asyncio.run(
+        fetch_seat_availability_async(course_codes, feed_url, pool_size, timeout, cache)
+    )
+    save_seat_feed_cache(cache, cache_path)
+    return availability
+
+
+def apply_seat_availability(raw_data, availability):
+    """Overwrites the enrollment fields of raw_data with refreshed values."""
+    courses = raw_data["data"]["courses"]
+    for course_code, record in availability.items():
+        if course_code in courses:
+            for key in enrollment_keys:
+                if key in record:
+                    courses[course_code][key] = record[key]
+
+
+##################################################
+# Stand-in Feed (for local testing):
+
+
+def serve_stand_in_feed(raw_data, host="localhost", port=8000):
+    """Serves the enrollment fields of raw_data at /sections/{course_code},
+    with ETag and Last-Modified validators, until interrupted."""
+    courses = raw_data["data"]["courses"]
+    last_modified = email.utils.formatdate(usegmt=True)
+
+    class StandInFeedHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            course_code = urllib.parse.unquote(self.path.rpartition("/")[2])
+            if course_code not in courses:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            record = {key: courses[course_code][key] for key in enrollment_keys}
+            body = json.dumps(record).encode("utf-8")
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), StandInFeedHandler)
+    print(f"Stand-in seat feed at http://{host}:{port}/sections/{{course_code}}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    with open(r"rawData/course_data.json", encoding="utf-8") as f:
+        serve_stand_in_feed(json.load(f))
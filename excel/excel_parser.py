@@ -1,7 +1,7 @@
 import pandas as pd
 from userInput import *
+from solver.model_spec import requirement_names
 
-df = pd.read_excel(excel_file_name, sheet_name=excel_sheet_name)
 columns = [
     "Meta-Preferences",
     "Meta-Preferences Input",
@@ -25,7 +25,6 @@ columns = [
 # FIXME: Remove hardcoding upper limit of alternates
 for i in range(1, 35):
     columns.append(f"Set {i}")
-df.columns = columns
 
 
 def clean_list(l):
@@ -37,101 +36,161 @@ def clean_list(l):
     return [x for x in l if str(x) != "nan"]
 
 
-########################## Meta-Preferences
-meta_preferences = clean_list(df["Meta-Preferences Input"].tolist())
-
-# If user wants to consider only selected courses or not
-if meta_preferences[0] == "Only courses from the Course Preferences column":
-    only_selected = True
-else:
-    only_selected = False
-
-# If user wants to consider requirements
-if meta_preferences[1] == "Yes":
-    consider_requirements = True
-else:
-    consider_requirements = False
+# Number of different requirements by major
+num_requirements = {"CS-MATH": 10, "CS": 8, "ENGR": 9}
 
-curr_major = meta_preferences[2]
-curr_hsa_conc = meta_preferences[3]
 
-########################## Course Preferences:
-courses = df["Course Preferences"].tolist()
-course_rankings = df["Course Rankings"].tolist()
-cleaned_courses = clean_list(courses)
-cleaned_course_rankings = [int(x) for x in course_rankings if str(x) != "nan"]
-# Creates dictionary in {course: ranking} format
-curr_preferences = {}
-for i in range(len(cleaned_courses)):
-    curr_preferences[cleaned_courses[i]] = cleaned_course_rankings[i]
+def read_student_sheet(excel_file_name, excel_sheet_name):
+    """Reads the inputs sheet of a student's workbook.
 
+    Returns:
+        pandas.DataFrame: the sheet, with the column names above
+    """
+    df = pd.read_excel(excel_file_name, sheet_name=excel_sheet_name)
+    df.columns = columns
+    return df
 
-########################## Default Course Preferences:
-default_courses = clean_list(df["Default Course Preferences"].tolist())
-default_course_rankings = clean_list(df["Default Course Rankings"].tolist())
 
-curr_default_preferences = [
-    [course, course_ranking]
-    for course, course_ranking in zip(default_courses, default_course_rankings)
-]
+def parse_student_inputs(excel_file_name, excel_sheet_name):
+    """Reads one student's inputs from their workbook.
 
-curr_base_ranking = curr_default_preferences[0][1]
+    Returns:
+        dict: the inputs, keyed by the names of the module level variables
+              below (only_selected, curr_major, curr_preferences, ...)
+    """
+    return parse_student_sheet(read_student_sheet(excel_file_name, excel_sheet_name))
 
-# print(curr_default_preferences)
 
-########################## Requirements:
+def parse_student_sheet(df):
+    """Reads one student's inputs from their inputs sheet
+    (see read_student_sheet).
 
-# Number of different requirements by major
-num_requirements = {"CS-MATH": 10, "CS": 8, "ENGR": 9}
-
-# Creates list of desired reqs from the excel sheet
-if consider_requirements:
-    reqs = clean_list(df["Requirements Input"].tolist())
-else:
-    # list of zeroes if user does not want program to consider reqs
-    reqs = [0 for i in range(num_requirements[curr_major])]
-
-# Creating string thats needed for the .dat file in ampl
-count = 1
-curr_desired_reqs = ""
-for req in reqs:
-    curr_desired_reqs += "r" + str(count) + " " + str(req) + " "
-    count += 1
-
-# -TODO: Add support for other majors
-# The following format is needed for the .dat file in ampl
-requirements_string = {
-    "CS-MATH": "r1 r2 r3 r4 r5 r6 r7 r8 r9 r10",
-    "CS": "r1 r2 r3 r4 r5 r6 r7 r8",
-    "ENGR": "r1 r2 r3 r4 r5 r6 r7 r8 r9",
-}
-
-curr_num_reqs = requirements_string[curr_major]
-
-########################## Previous Courses
-curr_previous_courses = df["Courses Taken Previously"].tolist()
-
-curr_previous_courses = set(clean_list(curr_previous_courses))
-
-######################## Bad Courses:
-curr_bad_courses = df["Courses you do not want"].tolist()
-curr_bad_courses = set(clean_list(curr_bad_courses))
-
-######################## Alternates:
-x = df.iloc[:, 14:]
-num_alts = x.shape[1]
-lower_bounds = []
-upper_bounds = []
-curr_alternates = []
-
-for i in range(num_alts):
-    curr_alt = df.iloc[:, i + 17]
-    curr_alt = [x for x in curr_alt if str(x) != "nan"]
-    if curr_alt == []:
-        break
-    lower_bounds.append(int(curr_alt[0]))
-    upper_bounds.append(int(curr_alt[1]))
-    curr_ele = [curr_alt[2:], [curr_alt[0], curr_alt[1]]]
-    curr_alternates.append(curr_ele)
-
-# print(curr_alternates)
+    Returns:
+        dict: see parse_student_inputs
+    """
+    ########################## Meta-Preferences
+    meta_preferences = clean_list(df["Meta-Preferences Input"].tolist())
+
+    # If user wants to consider only selected courses or not
+    if meta_preferences[0] == "Only courses from the Course Preferences column":
+        only_selected = True
+    else:
+        only_selected = False
+
+    # If user wants to consider requirements
+    if meta_preferences[1] == "Yes":
+        consider_requirements = True
+    else:
+        consider_requirements = False
+
+    curr_major = meta_preferences[2]
+    curr_hsa_conc = meta_preferences[3]
+
+    ########################## Course Preferences:
+    courses = df["Course Preferences"].tolist()
+    course_rankings = df["Course Rankings"].tolist()
+    cleaned_courses = clean_list(courses)
+    cleaned_course_rankings = [int(x) for x in course_rankings if str(x) != "nan"]
+    # Creates dictionary in {course: ranking} format
+    curr_preferences = {}
+    for i in range(len(cleaned_courses)):
+        curr_preferences[cleaned_courses[i]] = cleaned_course_rankings[i]
+
+    ########################## Default Course Preferences:
+    default_courses = clean_list(df["Default Course Preferences"].tolist())
+    default_course_rankings = clean_list(df["Default Course Rankings"].tolist())
+
+    curr_default_preferences = [
+        [course, course_ranking]
+        for course, course_ranking in zip(default_courses, default_course_rankings)
+    ]
+
+    curr_base_ranking = curr_default_preferences[0][1]
+
+    # print(curr_default_preferences)
+
+    ########################## Requirements:
+
+    # Creates list of desired reqs from the excel sheet
+    if consider_requirements:
+        reqs = clean_list(df["Requirements Input"].tolist())
+    else:
+        # list of zeroes if user does not want program to consider reqs
+        reqs = [0 for i in range(num_requirements[curr_major])]
+
+    # Creating string thats needed for the .dat file in ampl
+    count = 1
+    curr_desired_reqs = ""
+    for req in reqs:
+        curr_desired_reqs += "r" + str(count) + " " + str(req) + " "
+        count += 1
+
+    # The requirements set needed for the .dat file in ampl ("r1 r2 ... rn")
+    curr_num_reqs = requirement_names(num_requirements[curr_major])
+
+    ########################## Previous Courses
+    curr_previous_courses = df["Courses Taken Previously"].tolist()
+
+    curr_previous_courses = set(clean_list(curr_previous_courses))
+
+    ######################## Bad Courses:
+    curr_bad_courses = df["Courses you do not want"].tolist()
+    curr_bad_courses = set(clean_list(curr_bad_courses))
+
+    ######################## Alternates:
+    x = df.iloc[:, 14:]
+    num_alts = x.shape[1]
+    lower_bounds = []
+    upper_bounds = []
+    curr_alternates = []
+
+    for i in range(num_alts):
+        curr_alt = df.iloc[:, i + 17]
+        curr_alt = [x for x in curr_alt if str(x) != "nan"]
+        if curr_alt == []:
+            break
+        lower_bounds.append(int(curr_alt[0]))
+        upper_bounds.append(int(curr_alt[1]))
+        curr_ele = [curr_alt[2:], [curr_alt[0], curr_alt[1]]]
+        curr_alternates.append(curr_ele)
+
+    return {
+        "only_selected": only_selected,
+        "consider_requirements": consider_requirements,
+        "curr_major": curr_major,
+        "curr_hsa_conc": curr_hsa_conc,
+        "curr_preferences": curr_preferences,
+        "curr_default_preferences": curr_default_preferences,
+        "curr_base_ranking": curr_base_ranking,
+        "reqs": reqs,
+        "curr_desired_reqs": curr_desired_reqs,
+        "curr_num_reqs": curr_num_reqs,
+        "curr_previous_courses": curr_previous_courses,
+        "curr_bad_courses": curr_bad_courses,
+        "curr_alternates": curr_alternates,
+        # Not in the sheet, the same for every workbook
+        "curr_time_limits": {
+            "earliest_start": earliest_start,
+            "latest_end": latest_end,
+            "days_off": list(days_off),
+        },
+    }
+
+
+# Inputs of the current student (excel_file_name in userInput.py):
+curr_inputs = parse_student_inputs(excel_file_name, excel_sheet_name)
+
+only_selected = curr_inputs["only_selected"]
+consider_requirements = curr_inputs["consider_requirements"]
+curr_major = curr_inputs["curr_major"]
+curr_hsa_conc = curr_inputs["curr_hsa_conc"]
+curr_preferences = curr_inputs["curr_preferences"]
+curr_default_preferences = curr_inputs["curr_default_preferences"]
+curr_base_ranking = curr_inputs["curr_base_ranking"]
+reqs = curr_inputs["reqs"]
+curr_desired_reqs = curr_inputs["curr_desired_reqs"]
+curr_num_reqs = curr_inputs["curr_num_reqs"]
+curr_previous_courses = curr_inputs["curr_previous_courses"]
+curr_bad_courses = curr_inputs["curr_bad_courses"]
+curr_alternates = curr_inputs["curr_alternates"]
+curr_time_limits = curr_inputs["curr_time_limits"]
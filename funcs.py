@@ -4,10 +4,13 @@ import json
 import time
 import re
 import os
+import shutil
 import numpy as np
 
 # Excel:
 from excel.excel_parser import *
+from catalog.store import catalog_store
+from solver.ampl_runner import solution_commands, solver_options
 
 """
 OUTLINE:
@@ -57,12 +60,15 @@ OUTLINE:
 ##################################################
 # Getting all courses that are going to be offered:
 
-with open(r"rawData/course_data.json", encoding="utf-8") as f:
-    raw_data = json.load(f)
+# Catalog of the term planned for (catalog_term, see catalog/store.py)
+raw_data = catalog_store().term(catalog_term)
 
 
-def possible_courses_func():
+def possible_courses_func(raw_data=raw_data):
     """
+    Global Variables Needed:
+        raw_data (dict, optional): Defaults to raw_data.
+
     Returns:
         list: all courses (with their complete course code) being offered
     """
@@ -97,13 +103,16 @@ def only_keep_three_credit_classes(raw_data, possible_courses):
 # Remove Previously Taken Courses:
 
 
-def remove_prev_courses(curr_previous_courses, possible_courses):
+def remove_prev_courses(curr_previous_courses, possible_courses, sections=None):
     """Removes previously taken courses.
 
     Global Variables Needed:
         curr_previous_courses (dict, optional): user"s previously taken courses.
         Defaults to curr_previous_courses.
         possible_courses (list, optional): Defaults to possible_courses.
+        sections (dict, optional): {input: set of sections} from
+        catalog.index.resolve_student_inputs, used instead of scanning
+        possible_courses for every previous course.
 
     Returns:
         list: removes previously taken courses (all sections) from list of
@@ -112,11 +121,15 @@ def remove_prev_courses(curr_previous_courses, possible_courses):
     # All sections of previously taken courses that are currently being offered
     repeated = set()
 
-    for course in possible_courses:
+    if sections is not None:
         for prev_course in curr_previous_courses:
-            # To find all sections of the prev_course
-            if prev_course in course:
-                repeated.add(course)
+            repeated |= sections.get(prev_course, set())
+    else:
+        for course in possible_courses:
+            for prev_course in curr_previous_courses:
+                # To find all sections of the prev_course
+                if prev_course in course:
+                    repeated.add(course)
 
     # possible_courses minus repeated
     output = []
@@ -221,7 +234,7 @@ def next_sem_possible_courses_due_to_prereqs(curr_previous_courses, possible_cou
 # Remove Courses Which Should Never Be Included in the Solution:
 
 
-def remove_bad_courses(possible_courses, curr_bad_courses):
+def remove_bad_courses(possible_courses, curr_bad_courses, sections=None):
     """Removes courses which the user does not want included in the final output.
 
     Returns a list of all possible courses (minus the 'bad courses').
@@ -229,10 +242,14 @@ def remove_bad_courses(possible_courses, curr_bad_courses):
     res = []
 
     removeCourses = set()
-    for course in possible_courses:
+    if sections is not None:
         for bad_course in curr_bad_courses:
-            if bad_course in course:
-                removeCourses.add(course)
+            removeCourses |= sections.get(bad_course, set())
+    else:
+        for course in possible_courses:
+            for bad_course in curr_bad_courses:
+                if bad_course in course:
+                    removeCourses.add(course)
 
     for course in possible_courses:
         if course not in removeCourses:
@@ -241,6 +258,64 @@ def remove_bad_courses(possible_courses, curr_bad_courses):
     return res
 
 
+#####################
+# Courses That Cannot Be Registered For (closed or full):
+
+
+def unavailable_courses_func(raw_data, possible_courses):
+    """Finds the sections that are closed or have no seats left.
+
+    A courseSeatsTotal of 0 means the catalog does not track seats for that
+    section, so it is only unavailable if it is closed. A section with open
+    seats is only unavailable when its waitlist takes up every seat left.
+
+    Global Variables Needed:
+        raw_data (dict, optional): Defaults to raw_data.
+        possible_courses (list, optional): Defaults to possible_courses.
+
+    Returns:
+        set: closed or full sections
+    """
+    unavailable = set()
+    for course in possible_courses:
+        info = raw_data["data"]["courses"][course]
+        seats_total = info.get("courseSeatsTotal") or 0
+        seats_filled = info.get("courseSeatsFilled") or 0
+
+        if info.get("courseEnrollmentStatus") == "closed":
+            unavailable.add(course)
+        elif seats_total > 0 and seats_filled >= seats_total:
+            unavailable.add(course)
+        elif seats_total > 0 and (info.get("courseWaitlistLength") or 0) >= (
+            seats_total - seats_filled
+        ):
+            unavailable.add(course)
+
+    return unavailable
+
+
+def remove_unavailable_courses(possible_courses, unavailable_courses):
+    """Removes closed or full sections from the list of possible courses."""
+    return [course for course in possible_courses if course not in unavailable_courses]
+
+
+def penalize_unavailable_courses(
+    costs, possible_courses, course_to_index, unavailable_courses, penalty
+):
+    """Lowers the ranking of closed or full sections by penalty, so they are
+    only chosen when nothing else satisfies the constraints.
+
+    Returns:
+        List: Row of costs corresponding to each possible course.
+    """
+    costs_row = list(costs)
+    for course in possible_courses:
+        if course in unavailable_courses:
+            costs_row[course_to_index[course]] -= penalty
+
+    return costs_row
+
+
 ######################
 # Dictionary of course_name -> var_name and course_name -> var_index
 
@@ -284,6 +359,69 @@ def course_code_to_variable_and_index(possible_courses):
 # Time Conflict Constraint
 
 
+def discrete_times_func():
+    """Produces a list of all the possible reasonable times in ten
+    minute intervals in the following format:
+    [0700, 0710, 0720, 0730, 0740, 0750, 0800, 0810, ...]
+
+    Returns:
+        list: times as ints (hhmm)
+    """
+    discrete_times = []
+
+    for k in range(7, 10):
+        for j in range(0, 6):
+            curr_time = "0" + str(k) + str(j) + "0"
+            curr_time = int(curr_time)
+            discrete_times.append(curr_time)
+
+    for k in range(10, 24):
+        for j in range(0, 6):
+            curr_time = "0" + str(k) + str(j) + "0"
+            curr_time = int(curr_time)
+            discrete_times.append(curr_time)
+
+    return discrete_times
+
+
+def time_slot_labels():
+    """Labels of the rows of the time conflict matrix, in the same order
+    (eg. "T 13:20" for row "t..." on Tuesday at 13:20).
+
+    Returns:
+        list: one label per row
+    """
+    labels = []
+    for curr_time in discrete_times_func():
+        for day in "MTWRF":
+            labels.append(f"{day} {curr_time // 100:02d}:{curr_time % 100:02d}")
+    return labels
+
+
+def minutes_func(hhmm):
+    """Minutes since midnight of a "hh:mm" string or an hhmm int."""
+    if isinstance(hhmm, str):
+        hhmm = int(hhmm[0:2] + hhmm[3:])
+    return (hhmm // 100) * 60 + hhmm % 100
+
+
+def meeting_intervals_func(raw_data, course):
+    """Weekly meeting intervals of a section, parsed from its courseSchedule.
+
+    Returns:
+        tuple: sorted (day, start minute, end minute) triples, one per day of
+               every meeting (eg. ("T", 765, 840) for Tuesday 12:45-14:00)
+    """
+    intervals = set()
+    for item in raw_data["data"]["courses"][course]["courseSchedule"]:
+        start_time = minutes_func(item["scheduleStartTime"])
+        end_time = minutes_func(item["scheduleEndTime"])
+        for day in item["scheduleDays"]:
+            intervals.add((day, start_time, end_time))
+
+    return tuple(sorted(intervals))
+
+
 def time_conflict_matrix_func(
     course_code_to_variable_name, course_to_index, raw_data, possible_courses
 ):
@@ -303,48 +441,23 @@ def time_conflict_matrix_func(
         corresponding to its row and 0 otherwise.
     """
 
-    # Produces a list of all the possible reasonable times in ten
-    # minute intervals in the following format:
-    # [0800, 0810, 0820, 0830, 0840, 0850, 0900, 0910, ...]
-    discrete_times = []
-
-    for k in range(7, 10):
-        for j in range(0, 6):
-            curr_time = "0" + str(k) + str(j) + "0"
-            curr_time = int(curr_time)
-            discrete_times.append(curr_time)
-
-    for k in range(10, 24):
-        for j in range(0, 6):
-            curr_time = "0" + str(k) + str(j) + "0"
-            curr_time = int(curr_time)
-            discrete_times.append(curr_time)
+    discrete_times = [minutes_func(curr_time) for curr_time in discrete_times_func()]
 
     days = "MTWRF"
 
-    constraint_matrix = []
-    for curr_time in discrete_times:
-        for day in days:
-            curr_row = [0] * len(possible_courses)
-            for curr_course in possible_courses:
-                course = raw_data["data"]["courses"][curr_course]
-                for item in course["courseSchedule"]:
-                    if day in item["scheduleDays"]:
-                        start_time = item["scheduleStartTime"]
-                        end_time = item["scheduleEndTime"]
-
-                        # Removing the colon from "hh:mm" and then converting it to an int
-                        start_time = int(start_time[0:2] + start_time[3:])
-                        end_time = int(end_time[0:2] + end_time[3:])
-
-                        # Not strictly greater than or less than because
-                        # courses can take place back to back.
-                        after_start_time = curr_time > start_time
-                        before_end_time = curr_time < end_time
-                        if after_start_time and before_end_time:
-                            curr_row[course_to_index[curr_course]] = 1
-
-            constraint_matrix.append(curr_row)
+    constraint_matrix = [
+        [0] * len(possible_courses) for _ in range(len(discrete_times) * len(days))
+    ]
+    for curr_course in possible_courses:
+        for day, start_time, end_time in meeting_intervals_func(raw_data, curr_course):
+            if day not in days:
+                continue
+            for k, curr_time in enumerate(discrete_times):
+                # Not strictly greater than or less than because
+                # courses can take place back to back.
+                if start_time < curr_time < end_time:
+                    row = k * len(days) + days.index(day)
+                    constraint_matrix[row][course_to_index[curr_course]] = 1
 
     return constraint_matrix
 
@@ -353,34 +466,62 @@ def time_conflict_matrix_func(
 # No Two Same Courses Constraint:
 
 
-def dict_w_same_codes_func(possible_courses):
-    """Groups courses that are the same (but different
-    sections/campuses) together
+def dict_w_same_codes_func(possible_courses, raw_data=raw_data):
+    """Groups sections of the same course together, by the catalog's
+    courseMutualExclusionKey (eg. ["CSCI", 181, "Y", "HM"]), so "CSCI 181Y"
+    and "CSCI 181B" are different courses. Sections without a key are
+    grouped by their code without the section number.
 
     Global Variables Needed:
         possible_courses (list, optional): Defaults to possible_courses.
+        raw_data (dict, optional): Defaults to raw_data.
 
     Returns:
         dict: Format of dictionary returned is
-                {Course Code : [all courses that have the same course code]}
+                {Course Code : [all sections of that course]}
+                where Course Code is the code without the section number
+                (eg. "CSCI 181Y HM")
     """
 
-    same_codes = {}
+    groups = {}
+    labels = {}
     for course in possible_courses:
-        # Possible error for courses such as
-        # "CSCI 181Y" isnt the same as "CSCI 181B"
-        if course[0:8] in same_codes:
-            same_codes[course[0:8]].append(course)
-        else:
-            same_codes[course[0:8]] = [course]
+        exclusion_key = raw_data["data"]["courses"][course].get(
+            "courseMutualExclusionKey"
+        )
+        label = course.rsplit("-", 1)[0]
+        group = tuple(exclusion_key) if exclusion_key else label
+        if group not in groups:
+            groups[group] = []
+            labels[group] = label
+        groups[group].append(course)
+
+    same_codes = {}
+    for group, courses in groups.items():
+        label = labels[group]
+        if label in same_codes:  # Same code but a different exclusion key
+            label += " " + str(group)
+        same_codes[label] = courses
 
     return same_codes
 
 
+def unique_columns_func(dict_w_same_codes, course_to_index):
+    """Column indices of every row of the no two same courses constraint, in
+    the order of dict_w_same_codes.
+
+    Returns:
+        list of lists: one list of course indices per unique course
+    """
+    return [
+        [course_to_index[course] for course in courses if course in course_to_index]
+        for courses in dict_w_same_codes.values()
+    ]
+
+
 def no_same_courses_matrix_func(possible_courses, course_to_index, dict_w_same_codes):
     """Creates constraint matrix that ensures that the solution provided
-        doesn"t include two courses that are essentially
-       the same but at different campuses or different timings.
+        doesn"t include two sections of the same course.
        In the mod file, the following condition ensures it: Ax <= 1
 
     Global Variables Needed:
@@ -392,18 +533,16 @@ def no_same_courses_matrix_func(possible_courses, course_to_index, dict_w_same_c
         List of lists: 2-D Matrix where the rows are the unique courses being
                        offered and the value of an element
                        in the row is a zero or one depending
-                       on whether it is essentially the same course as its
-                       corresponding row.
+                       on whether it is a section of its corresponding row.
     """
 
     num_of_courses = len(possible_courses)
 
     constraint_matrix = []
-    for key in dict_w_same_codes.keys():
+    for columns in unique_columns_func(dict_w_same_codes, course_to_index):
         curr_row = [0] * num_of_courses
-        for course in possible_courses:
-            if key in course:
-                curr_row[course_to_index[course]] = 1
+        for j in columns:
+            curr_row[j] = 1
 
         constraint_matrix.append(curr_row)
 
@@ -727,6 +866,7 @@ def requirements_matrix_func(
     course_to_index,
     hsa_codes,
     hsa_concentration,
+    major=None,
 ):
     """Creates matrix that ensures that desired requirements are met.
 
@@ -743,21 +883,25 @@ def requirements_matrix_func(
         hsa_codes ([type], optional): Defaults to hsa_codes.
         hsaConcentration ([type], optional): Defaults to hsaConcentration.
         curr_previous_courses ([type], optional): Defaults to curr_previous_courses.
+        major (str, optional): Defaults to curr_major.
 
     Returns:
         List of lists: 2-D Matrix where each row represents a
         specific requirement and each column represents a specific course
     """
+    if major is None:
+        major = curr_major
+
     major_matrix = []
-    if curr_major == "CS-MATH":
+    if major == "CS-MATH":
         major_matrix = cs_math_major_reqs_matrix_func(
             possible_courses, curr_previous_courses, dict_w_same_codes, course_to_index
         )
-    elif curr_major == "CS":
+    elif major == "CS":
         major_matrix = cs_major_reqs_matrix_func(
             possible_courses, curr_previous_courses, dict_w_same_codes, course_to_index
         )
-    elif curr_major == "ENGR":
+    elif major == "ENGR":
         major_matrix = engr_major_reqs_matrix_func(
             possible_courses, curr_previous_courses, dict_w_same_codes, course_to_index
         )
@@ -777,17 +921,25 @@ def requirements_matrix_func(
 ########## Alternates Constraint Matrix: ###############
 
 
-def alternates_matrix_func(curr_alternates, possible_courses, course_to_index):
+def alternates_matrix_func(
+    curr_alternates, possible_courses, course_to_index, sections=None
+):
     n = len(possible_courses)
     matrix = []
     for item in curr_alternates:
         curr_row = [0] * n
         alt_courses = item[0]
         alt_limit = item[1]  # Unused
-        for course in possible_courses:
+        if sections is not None:
             for alt in alt_courses:
-                if alt in course:
-                    curr_row[course_to_index[course]] = 1
+                for course in sections.get(alt, ()):
+                    if course in course_to_index:
+                        curr_row[course_to_index[course]] = 1
+        else:
+            for course in possible_courses:
+                for alt in alt_courses:
+                    if alt in course:
+                        curr_row[course_to_index[course]] = 1
 
         matrix.append(curr_row)
 
@@ -796,174 +948,151 @@ def alternates_matrix_func(curr_alternates, possible_courses, course_to_index):
 
 ######################################
 ######################### COSTS: ###############
+# The costs row is computed by the rule engine in catalog/cost_rules.py
 
 
-def costs_func(
-    possible_courses, course_to_index, curr_preferences, curr_default_preferences
-):
-    """Row of costs corresponding to each possible course.
+######################################
+# Creating .dat file:
 
-    Global Variables Needed:
-        possible_courses (list, optional): Defaults to possible_courses.
-        course_to_index (dict, optional): Defaults to course_to_index.
-        curr_preferences (dict, optional): Defaults to myPreferences.
-        default_preferences:
 
-    Returns:
-        List: Row of costs corresponding to each possible course.
+def createDat(
+    dir_path,
+    filename,
+    curr_num_reqs,
+    student_params=True,
+    min_courses=4,
+    max_courses=6,
+    necessary=(),
+):
+    """Creates the .dat file in amplFiles/ from the pieces in dir_path.
+
+    Args:
+        student_params (bool): when False, costs, necessary and the
+            enrollment bounds are left out so that they can be given by a
+            second data file (see variant_dat_string).
+        necessary (list): the student's requirement targets (the
+            instance's "necessary"), written when student_params is True
     """
-    num_of_courses = len(possible_courses)
-    costs_row = [0] * num_of_courses
-    for course in possible_courses:
-        if course in curr_preferences:
-            costs_row[course_to_index[course]] = curr_preferences[course]
-        # Default costs for courses
-        else:
-            check = False  # Changes to true if course gets a default preference, otherwise the course gets the base ranking
-            for default_course_preference in curr_default_preferences:
-                # format is: default_course_preference = [course, ranking]
-                if default_course_preference[0] in course:
-                    costs_row[course_to_index[course]] = default_course_preference[1]
-                    check = True
-                    break
-
-            if not check:  # course is not in preferences or default preferences
-                costs_row[course_to_index[course]] = curr_base_ranking
-        # else:
-        #     # CS Courses = Cost of 5
-        #     if course[0:4] == "CSCI":
-        #         costs_row[course_to_index[course]] = 0
-        #     # ENGR Courses = Cost of 4
-        #     elif course[0:4] == "ENGR":
-        #         costs_row[course_to_index[course]] = 7
-        #     # Math Courses = Cost of 4
-        #     elif course[0:4] == "MATH":
-        #         costs_row[course_to_index[course]] = 0
-        #     # Philosophy Courses = Cost of 3
-        #     elif course[0:4] == "PHIL":
-        #         costs_row[course_to_index[course]] = 0
-        #     # All other courses = Cost of 2
-        #     else:
-        #         costs_row[course_to_index[course]] = 3
+    with open(dir_path + r"course_names.txt", "r") as f:
+        course_names = f.read()
 
-    return costs_row
+    def piece(name):
+        # Copies a piece into the .dat file without reading it all at once
+        with open(dir_path + name, "r") as f:
+            shutil.copyfileobj(f, fp)
+
+    def write_set(name, piece_name):
+        fp.write("set " + name + " := ")
+        fp.write("\n    ")
+        piece(piece_name)
+        fp.write("\n;")
+        fp.write("\n\n")
+
+    def write_matrix(name, piece_name):
+        fp.write("param " + name + " : ")
+        fp.write("\n    ")
+        fp.write(course_names + " := \n")
+        fp.write("\n    ")
+        piece(piece_name)
+        fp.write("\n;")
+        fp.write("\n\n")
 
+    with open(r"./amplFiles/" + filename, "w") as fp:
+        fp.write("set courses := ")
+        fp.write("\n    ")
+        fp.write(course_names + "\n;")
+        fp.write("\n\n")
+
+        fp.write("set requirements := ")
+        fp.write("\n    ")
+        fp.write(curr_num_reqs + "\n;")
+        fp.write("\n\n")
+
+        write_set("timeSlots", r"set_timeSlots.txt")
+        write_set("uniqueCourses", r"set_uniqueCourses.txt")
+        write_set("alternates", r"set_alternates.txt")
+
+        if student_params:
+            fp.write("param costs := ")
+            fp.write("\n    ")
+            piece(r"costs_names.txt")
+            fp.write("\n;")
+            fp.write("\n\n")
+
+        write_matrix("time", r"time_conflict_matrix.txt")
+        write_matrix("counts", r"requirements_matrix.txt")
+
+        if student_params:
+            fp.write("param necessary := ")
+            fp.write("\n    ")
+            fp.write(necessary_string(necessary) + "\n;")
+            fp.write("\n\n")
+
+            fp.write("param minCourses := " + str(min_courses) + ";\n")
+            fp.write("param maxCourses := " + str(max_courses) + ";\n")
+            fp.write("\n")
+
+        write_matrix("unique", r"unique_courses_matrix.txt")
+
+        fp.write("param alternatesLowerLimits := ")
+        fp.write("\n    ")
+        piece(r"alternates_lower_limits.txt")
+        fp.write("\n;")
+        fp.write("\n\n")
+
+        fp.write("param alternatesUpperLimits := ")
+        fp.write("\n    ")
+        piece(r"alternates_upper_limits.txt")
+        fp.write("\n;")
+        fp.write("\n\n")
+
+        write_matrix("alternatesMatrix", r"alternates_matrix.txt")
+
+        # Empty without travel time conflicts (catalog.travel)
+        if os.path.exists(dir_path + r"travel_conflicts.txt"):
+            piece(r"travel_conflicts.txt")
+
+
+def necessary_string(necessary):
+    """Entries of param necessary, eg. "r1 0 r2 1 "."""
+    res = ""
+    for i, req in enumerate(necessary):
+        res += "r" + str(i + 1) + " " + str(req) + " "
+    return res
 
-######################################
-# Creating .dat file:
 
+def variant_dat_string(
+    possible_courses, costs, necessary, min_courses, max_courses, blocked=()
+):
+    """Data for the parameters that change between runs on the same courses
+    (costs, necessary and the enrollment bounds).
 
-def createDat(dir_path, filename, curr_num_reqs):
-    res = ""
+    Args:
+        blocked (iterable, optional): courses that may not be taken (xUpper 0)
 
-    with open(dir_path + r"costs_names.txt", "r") as f:
-        costs_names = f.read()
+    Returns:
+        str: contents of a .dat file to be read after one created with
+             createDat(..., student_params=False)
+    """
+    res = "param costs := \n    "
+    for course, cost in zip(possible_courses, costs):
+        res += course.replace(" ", "_") + " " + str(cost) + " "
+    res += "\n;\n\n"
 
-    with open(dir_path + r"course_names.txt", "r") as f:
-        course_names = f.read()
+    res += "param necessary := \n    " + necessary_string(necessary)
+    res += "\n;\n\n"
 
-    with open(dir_path + r"requirements_matrix.txt", "r") as f:
-        requirements_matrix = f.read()
-
-    with open(dir_path + r"set_timeSlots.txt", "r") as f:
-        set_timeSlots = f.read()
-
-    with open(dir_path + r"set_uniqueCourses.txt", "r") as f:
-        set_uniqueCourses = f.read()
-
-    with open(dir_path + r"time_conflict_matrix.txt", "r") as f:
-        time_conflict_matrix = f.read()
-
-    with open(dir_path + r"unique_courses_matrix.txt", "r") as f:
-        unique_courses_matrix = f.read()
-
-    with open(dir_path + r"set_alternates.txt", "r") as f:
-        set_alternates = f.read()
-
-    with open(dir_path + r"alternates_matrix.txt", "r") as f:
-        alternates_matrix = f.read()
-
-    with open(dir_path + r"alternates_lower_limits.txt", "r") as f:
-        alternates_lower_limits = f.read()
-
-    with open(dir_path + r"alternates_upper_limits.txt", "r") as f:
-        alternates_upper_limits = f.read()
-
-    res += "set courses := "
-    res += "\n    "
-    res += course_names + "\n;"
-    res += "\n\n"
-
-    res += "set requirements := "
-    res += "\n    "
-    res += curr_num_reqs + "\n;"
-    res += "\n\n"
-
-    res += "set timeSlots := "
-    res += "\n    "
-    res += set_timeSlots + "\n;"
-    res += "\n\n"
-
-    res += "set uniqueCourses := "
-    res += "\n    "
-    res += set_uniqueCourses + "\n;"
-    res += "\n\n"
-
-    res += "set alternates := "
-    res += "\n    "
-    res += set_alternates + "\n;"
-    res += "\n\n"
-
-    res += "param costs := "
-    res += "\n    "
-    res += costs_names + "\n;"
-    res += "\n\n"
-
-    res += "param time : "
-    res += "\n    "
-    res += course_names + " := \n"
-    res += "\n    "
-    res += time_conflict_matrix + "\n;"
-    res += "\n\n"
-
-    res += "param counts : "
-    res += "\n    "
-    res += course_names + " := \n"
-    res += "\n    "
-    res += requirements_matrix + "\n;"
-    res += "\n\n"
-
-    res += "param necessary := "
-    res += "\n    "
-    res += curr_desired_reqs + "\n;"
-    res += "\n\n"
-
-    res += "param unique : "
-    res += "\n    "
-    res += course_names + " := \n"
-    res += "\n    "
-    res += unique_courses_matrix + "\n;"
-    res += "\n\n"
-
-    res += "param alternatesLowerLimits := "
-    res += "\n    "
-    res += alternates_lower_limits + "\n;"
-    res += "\n\n"
-
-    res += "param alternatesUpperLimits := "
-    res += "\n    "
-    res += alternates_upper_limits + "\n;"
-    res += "\n\n"
-
-    res += "param alternatesMatrix : "
-    res += "\n    "
-    res += course_names + " := \n"
-    res += "\n    "
-    res += alternates_matrix + "\n;"
-    res += "\n\n"
+    res += "param minCourses := " + str(min_courses) + ";\n"
+    res += "param maxCourses := " + str(max_courses) + ";\n"
 
-    with open(r"./amplFiles/" + filename, "w") as fp:
-        fp.write(res)
+    blocked = [course for course in possible_courses if course in blocked]
+    if blocked:
+        res += "\nparam xUpper := \n    "
+        for course in blocked:
+            res += course.replace(" ", "_") + " 0 "
+        res += "\n;\n"
+
+    return res
 
 
 #####################################
@@ -982,7 +1111,7 @@ def create_ampl_command(dat_filename):
 
     ampl_option_command = r"option omit_zero_rows 1;"
 
-    ampl_solver_command = r"option solver './cplex';"
+    ampl_solver_command = solver_options().rstrip("\n")
 
     ampl_display_command = r"display x;"
 
@@ -998,6 +1127,8 @@ def create_ampl_command(dat_filename):
         + ampl_option_command
         + "\n"
         + ampl_display_command
+        + "\n"
+        + solution_commands()
     )
 
     with open("exec.run", "w") as f:
@@ -4,31 +4,179 @@ import json
 import time
 import re
 import os
+import sys
 import numpy as np
 
 from excel.excel_parser import *
 from funcs import *
+import catalog.cost_rules
+import catalog.index
+import catalog.prereq_graph
+import catalog.shared
+import catalog.store
+import catalog.time_limits
+import catalog.travel
+import enrollment.seat_feed
+import funcs
+import solver.symmetry
+from catalog.cost_rules import rule_costs
+from catalog.index import catalog_index, resolve_student_inputs
+from catalog.prereq_graph import add_unlock_values, prereq_graph
+from catalog.shared import init_worker, publish_catalog, worker_catalog
+from catalog.store import catalog_store
+from catalog.time_limits import remove_blocked_courses
+from catalog.travel import travel_conflict_cliques
+from enrollment.seat_feed import apply_seat_availability, fetch_seat_availability
+from pipeline.build_graph import run_task_graph
+from pipeline.cache import cached_stage, code_version, hash_file, hash_inputs
+from solver.approximate import approximate_schedule
+from solver.export import export_instance
+from solver.model_spec import write_model
+from solver.precheck import precheck_instance
+from solver.results import solve_and_report
+from solver.symmetry import collapse_equivalent_sections
 
 dat_filename = curr_dat_filename
 
 
-def main(selected=False, dat_filename="test0", major="CS-Math"):
+def build_instance(selected=False, inputs=None, refresh_seats=True, term=None):
+    """Filters the possible courses and builds every constraint matrix and the
+    costs row.
+
+    Args:
+        selected (bool): only consider the courses in the preferences
+        inputs (dict, optional): a student's inputs from
+            excel_parser.parse_student_inputs. Defaults to curr_inputs.
+        refresh_seats (bool): pull seat availability from seat_feed_url
+            (when it is set) before filtering
+        term (str, optional): term of the catalog store to plan for (see
+            catalog.store). Defaults to catalog_term.
+
+    Returns:
+        dict: the instance, with the following keys:
+                possible_courses, course_to_variable_name,
+                variable_name_to_course, course_to_index,
+                time_conflict_matrix, dict_w_same_codes,
+                no_same_courses_matrix, requirements_matrix, necessary,
+                costs, alternates, alternates_matrix,
+                travel_conflicts (sections that cannot be taken together
+                because of the travel between campuses, see catalog.travel),
+                num_reqs, min_courses, max_courses, major,
+                input_problems (courses typed in the inputs that match
+                nothing, see catalog.index), term,
+                cache_key (hash of every pipeline node of the instance)
+
+    Every matrix and the costs row are pipeline nodes cached by
+    pipeline.cache (unless pipeline_cache is False in userInput.py).
+    """
+    if inputs is None:
+        inputs = curr_inputs
+    term_data = raw_data if term is None else catalog_store().term(term)
+    term = next(iter(term_data["data"]["terms"]))
+    inputs, sections, input_problems = resolve_student_inputs(
+        inputs, catalog_index(term_data)
+    )
+
+    curr_preferences = inputs["curr_preferences"]
+    curr_previous_courses = inputs["curr_previous_courses"]
+    curr_bad_courses = inputs["curr_bad_courses"]
+    curr_alternates = inputs["curr_alternates"]
+
+    catalog_version = [
+        [hash_file(path) for path in catalog_files],
+        term,
+        hash_file(r"preReqs/prereqs_edited.json"),
+        # The stages themselves are defined in this module
+        code_version(
+            sys.modules[__name__],
+            funcs,
+            catalog.index,
+            catalog.cost_rules,
+            catalog.prereq_graph,
+            catalog.shared,
+            catalog.store,
+            catalog.time_limits,
+            catalog.travel,
+            enrollment.seat_feed,
+            solver.symmetry,
+        ),
+    ]
+
+    def filter_stage():
+        if selected:
+            possible_courses = list(curr_preferences.keys())
+        else:
+            possible_courses = possible_courses_func(term_data)
+            possible_courses = only_keep_three_credit_classes(
+                term_data, possible_courses
+            )
+            possible_courses = remove_prev_courses(
+                curr_previous_courses, possible_courses, sections
+            )
+            possible_courses = next_sem_possible_courses_due_to_prereqs(
+                curr_previous_courses, possible_courses
+            )
+            possible_courses = remove_bad_courses(
+                possible_courses, curr_bad_courses, sections
+            )
 
-    if selected:
-        possible_courses = list(curr_preferences.keys())
-    else:
-        possible_courses = possible_courses_func()
-        possible_courses = only_keep_three_credit_classes(raw_data, possible_courses)
-        possible_courses = remove_prev_courses(curr_previous_courses, possible_courses)
-        subject_codes = subject_codes_func(possible_courses)
-        possible_courses = next_sem_possible_courses_due_to_prereqs(
-            curr_previous_courses, possible_courses
+        for key in curr_preferences:
+            if key not in possible_courses:
+                possible_courses.append(key)
+        return possible_courses
+
+    possible_courses, filter_key = cached_stage(
+        "filter",
+        [
+            catalog_version,
+            selected,
+            list(curr_preferences),
+            curr_previous_courses,
+            curr_bad_courses,
+        ],
+        filter_stage,
+        enabled=pipeline_cache,
+    )
+    possible_courses = list(possible_courses)
+
+    # Seats change between runs, so they are applied after the cached filter
+    if seat_feed_url and refresh_seats:
+        availability = fetch_seat_availability(
+            possible_courses, seat_feed_url, pool_size=seat_feed_pool_size
         )
-        possible_courses = remove_bad_courses(possible_courses, curr_bad_courses)
+        apply_seat_availability(term_data, availability)
 
-    for key in curr_preferences:
-        if key not in possible_courses:
-            possible_courses.append(key)
+    unavailable_courses = unavailable_courses_func(term_data, possible_courses)
+    if seat_policy == "filter":
+        possible_courses = remove_unavailable_courses(
+            possible_courses, unavailable_courses
+        )
+        for course in curr_preferences:
+            if course in unavailable_courses:
+                input_problems.append(
+                    {
+                        "field": "curr_preferences",
+                        "input": course,
+                        "message": f'"{course}" is closed or full, '
+                        "it is not considered",
+                    }
+                )
+
+    # Hard time limits remove sections before any matrix is built, so they
+    # add no variables or rows to the model
+    possible_courses, blocked_courses = remove_blocked_courses(
+        possible_courses, inputs.get("curr_time_limits"), term_data
+    )
+    for course in blocked_courses:
+        if course in curr_preferences:
+            input_problems.append(
+                {
+                    "field": "curr_time_limits",
+                    "input": course,
+                    "message": f'"{course}" meets outside the time limits, '
+                    "it is not considered",
+                }
+            )
 
     course_to_variable_name, course_to_index = course_code_to_variable_and_index(
         possible_courses
@@ -36,28 +184,208 @@ def main(selected=False, dat_filename="test0", major="CS-Math"):
     variable_name_to_course = {
         value: key for key, value in course_to_variable_name.items()
     }
-    time_conflict_matrix = time_conflict_matrix_func(
-        course_to_variable_name, course_to_index, raw_data, possible_courses
-    )
-    dict_w_same_codes = dict_w_same_codes_func(possible_courses)
-    no_same_courses_matrix = no_same_courses_matrix_func(
-        possible_courses, course_to_index, dict_w_same_codes
-    )
-    hsa_concentration = curr_hsa_conc
-    requirements_matrix = requirements_matrix_func(
-        possible_courses,
-        curr_previous_courses,
-        dict_w_same_codes,
-        course_to_index,
-        hsa_codes,
-        hsa_concentration,
-    )
-    costs = costs_func(
-        possible_courses, course_to_index, curr_preferences, curr_default_preferences
-    )
-    alternates_matrix = alternates_matrix_func(
-        curr_alternates, possible_courses, course_to_index
+    dict_w_same_codes = dict_w_same_codes_func(possible_courses, term_data)
+    hsa_concentration = inputs["curr_hsa_conc"]
+
+    def time_stage(needed):
+        def build():
+            shared = worker_catalog()
+            if shared is not None:
+                # Process workers read the time slots from the shared catalog
+                return shared.time_conflict_matrix(possible_courses)
+            return time_conflict_matrix_func(
+                course_to_variable_name, course_to_index, term_data, possible_courses
+            )
+
+        return cached_stage(
+            "time_matrix",
+            [catalog_version, possible_courses],
+            build,
+            enabled=pipeline_cache,
+        )
+
+    def unique_stage(needed):
+        return cached_stage(
+            "unique_matrix",
+            [catalog_version, possible_courses],
+            lambda: no_same_courses_matrix_func(
+                possible_courses, course_to_index, dict_w_same_codes
+            ),
+            enabled=pipeline_cache,
+        )
+
+    def requirements_stage(needed):
+        return cached_stage(
+            "requirements",
+            [
+                catalog_version,
+                possible_courses,
+                curr_previous_courses,
+                hsa_codes,
+                hsa_concentration,
+                inputs["curr_major"],
+            ],
+            lambda: requirements_matrix_func(
+                possible_courses,
+                curr_previous_courses,
+                dict_w_same_codes,
+                course_to_index,
+                hsa_codes,
+                hsa_concentration,
+                major=inputs["curr_major"],
+            ),
+            enabled=pipeline_cache,
+        )
+
+    def compute_costs():
+        costs = rule_costs(
+            possible_courses,
+            curr_preferences,
+            inputs["curr_default_preferences"],
+            inputs["curr_base_ranking"],
+            term_data,
+        )
+        if seat_policy == "penalize":
+            costs = penalize_unavailable_courses(
+                costs,
+                possible_courses,
+                course_to_index,
+                unavailable_courses,
+                seat_penalty,
+            )
+        if unlock_weight:
+            costs = add_unlock_values(
+                costs, possible_courses, curr_previous_courses, unlock_weight
+            )
+        return costs
+
+    def costs_stage(needed):
+        return cached_stage(
+            "costs",
+            [
+                catalog_version,
+                possible_courses,
+                curr_preferences,
+                inputs["curr_default_preferences"],
+                inputs["curr_base_ranking"],
+                seat_policy,
+                unavailable_courses if seat_policy == "penalize" else None,
+                seat_penalty,
+                curr_previous_courses if unlock_weight else None,
+                unlock_weight,
+            ],
+            compute_costs,
+            enabled=pipeline_cache,
+        )
+
+    def alternates_stage(needed):
+        return cached_stage(
+            "alternates",
+            [catalog_version, possible_courses, curr_alternates],
+            lambda: alternates_matrix_func(
+                curr_alternates, possible_courses, course_to_index, sections
+            ),
+            enabled=pipeline_cache,
+        )
+
+    def travel_stage(needed):
+        return cached_stage(
+            "travel",
+            [
+                catalog_version,
+                possible_courses,
+                sorted(travel_times.items()),
+                travel_time_default,
+                online_location_words,
+            ],
+            lambda: travel_conflict_cliques(
+                term_data,
+                possible_courses,
+                travel_times,
+                travel_time_default,
+                online_location_words,
+            ),
+            enabled=pipeline_cache,
+        )
+
+    # The builders only share the filtered courses, so they run together
+    # (pipeline.build_graph); results come back in this order
+    worker_options = {}
+    if build_mode == "process":
+        # Workers map the catalog instead of copying its dicts (catalog.shared)
+        shared_path = publish_catalog(term_data, prereq_graph(), catalog_files)
+        worker_options = {"initializer": init_worker, "initargs": (shared_path,)}
+    built = run_task_graph(
+        {
+            "time_matrix": (time_stage, []),
+            "unique_matrix": (unique_stage, []),
+            "requirements": (requirements_stage, []),
+            "costs": (costs_stage, []),
+            "alternates": (alternates_stage, []),
+            "travel": (travel_stage, []),
+        },
+        mode=build_mode,
+        **worker_options,
     )
+    time_conflict_matrix, time_key = built["time_matrix"]
+    no_same_courses_matrix, unique_key = built["unique_matrix"]
+    requirements_matrix, requirements_key = built["requirements"]
+    costs, costs_key = built["costs"]
+    alternates_matrix, alternates_key = built["alternates"]
+    travel_conflicts, travel_key = built["travel"]
+
+    return {
+        "possible_courses": possible_courses,
+        "course_to_variable_name": course_to_variable_name,
+        "variable_name_to_course": variable_name_to_course,
+        "course_to_index": course_to_index,
+        "time_conflict_matrix": time_conflict_matrix,
+        "dict_w_same_codes": dict_w_same_codes,
+        "no_same_courses_matrix": no_same_courses_matrix,
+        "requirements_matrix": requirements_matrix,
+        "necessary": list(inputs["reqs"]),
+        "costs": costs,
+        "alternates": curr_alternates,
+        "alternates_matrix": alternates_matrix,
+        "travel_conflicts": travel_conflicts,
+        "num_reqs": inputs["curr_num_reqs"],
+        "min_courses": curr_min_courses,
+        "max_courses": curr_max_courses,
+        "major": inputs["curr_major"],
+        "input_problems": input_problems,
+        "term": term,
+        "cache_key": hash_inputs(
+            filter_key,
+            possible_courses,
+            time_key,
+            unique_key,
+            requirements_key,
+            costs_key,
+            alternates_key,
+            travel_key,
+            list(inputs["reqs"]),
+            inputs["curr_num_reqs"],
+            curr_min_courses,
+            curr_max_courses,
+        ),
+    }
+
+
+def write_instance_files(instance, dat_filename):
+    """Writes the pieces of the .dat file into amplData/{dat_filename}/.
+
+    Returns:
+        str: the directory the pieces were written to
+    """
+    possible_courses = instance["possible_courses"]
+    time_conflict_matrix = instance["time_conflict_matrix"]
+    dict_w_same_codes = instance["dict_w_same_codes"]
+    no_same_courses_matrix = instance["no_same_courses_matrix"]
+    requirements_matrix = instance["requirements_matrix"]
+    costs = instance["costs"]
+    curr_alternates = instance["alternates"]
+    alternates_matrix = instance["alternates_matrix"]
+
     dir_path = r"amplData/" + dat_filename + "/"
     os.makedirs(os.path.dirname(dir_path), exist_ok=True)
     with open(dir_path + r"set_timeSlots.txt", "w+") as f:
@@ -146,12 +474,117 @@ def main(selected=False, dat_filename="test0", major="CS-Math"):
                 f.write(str(c) + " ")
             f.write("\n    ")
 
-    time.sleep(3)
+    with open(dir_path + r"travel_conflicts.txt", "w") as f:
+        if instance["travel_conflicts"]:
+            f.write("set travelConflicts := \n    ")
+            for i in range(len(instance["travel_conflicts"])):
+                f.write("v" + str(i) + " ")
+            f.write("\n;\n\n")
+        for i, courses in enumerate(instance["travel_conflicts"]):
+            f.write("set travelSections[v" + str(i) + "] := ")
+            for c in courses:
+                f.write(c.replace(" ", "_") + " ")
+            f.write(";\n")
+
+    return dir_path
+
 
-    createDat(dir_path, dat_filename + ".dat", curr_num_reqs)
+def write_dat(instance, dat_filename):
+    """Writes amplFiles/{dat_filename}.dat for instance (the file is only
+    rewritten when its contents change)."""
 
+    def serialize_stage():
+        dir_path = write_instance_files(instance, dat_filename)
+        createDat(
+            dir_path,
+            dat_filename + ".dat",
+            instance["num_reqs"],
+            min_courses=instance["min_courses"],
+            max_courses=instance["max_courses"],
+            necessary=instance["necessary"],
+        )
+        with open(os.path.join("amplFiles", dat_filename + ".dat")) as f:
+            return f.read()
+
+    dat_path = os.path.join("amplFiles", dat_filename + ".dat")
+    dat_string, _ = cached_stage(
+        "serialized",
+        # The sections tell a collapsed instance from the one it came from
+        [
+            instance["cache_key"],
+            dat_filename,
+            instance["num_reqs"],
+            instance["possible_courses"],
+        ],
+        serialize_stage,
+        enabled=pipeline_cache,
+    )
+    current = None
+    if os.path.exists(dat_path):
+        with open(dat_path) as f:
+            current = f.read()
+    if current != dat_string:
+        with open(dat_path, "w") as f:
+            f.write(dat_string)
+
+
+def run_instance(instance, dat_filename, pool=None):
+    """Writes the .dat and run files of instance, prints its input problems
+    and the approximate schedule, and solves it when run_solver is True.
+
+    Args:
+        pool (solver.pool.SolverPool, optional): warm workers to solve on
+
+    Returns:
+        dict: the results record (solver.results), or None when not solved
+    """
+    term_data = catalog_store().term(instance["term"])
+    if collapse_sections:
+        instance = collapse_equivalent_sections(instance, term_data)
+    write_dat(instance, dat_filename)
     create_ampl_command(dat_filename)
 
+    if export_formats:
+        export_instance(instance, dat_filename, export_formats, export_compress)
+
+    for problem in instance["input_problems"]:
+        print(f'Input ({problem["field"]}): {problem["message"]}')
+
+    problems = precheck_instance(instance)
+    if problems:
+        print("Infeasible, the solver would not find a schedule:")
+        for problem in problems:
+            print("    " + problem["message"])
+
+    approximate = None
+    if approximate_preview and not problems:
+        approximate = approximate_schedule(instance)
+        print(
+            f'Preview ({approximate["method"]}, {approximate["time_ms"]:.0f} ms): '
+            f'objective {approximate["objective"]:g}, '
+            f'at most {approximate["upper_bound"]:g}'
+        )
+        for course in approximate["chosen"]:
+            print("    " + course)
+
+    record = None
+    if run_solver and not problems:
+        record = solve_and_report(
+            instance, term_data, dat_filename, approximate, pool=pool
+        )
+        print(f'{record["status"]}: objective {record["objective"]}')
+        for course in record["courses"]:
+            print(f'    {course["course_code"]}  {course["course_name"]}')
+        for row in record.get("iis", []):
+            print("    conflicting: " + row["message"])
+    return record
+
+
+def main(selected=False, dat_filename="test0", major="CS-Math"):
+    write_model()
+    instance = build_instance(selected)
+    run_instance(instance, dat_filename)
+
 
 if __name__ == "__main__":
     main(selected=only_selected, dat_filename=dat_filename, major=curr_major)
@@ -0,0 +1,118 @@
+"""Build Task Graph
+
+Runs the builders of an instance (time conflicts, uniqueness,
+requirements, alternates, costs) as a small task graph: every task names
+the tasks it needs, and the tasks whose inputs are ready run together on a
+worker pool. Results are merged by task name, in the order the tasks were
+declared, so the instance does not depend on which worker finished first.
+
+Modes (build_mode in userInput.py):
+
+         -- "serial"    one after another
+         -- "thread"    thread pool (helps when builders wait on the cache
+                        files or run numpy code)
+         -- "process"   forked worker processes for CPU-bound builders; the
+                        tasks are inherited through fork, so only their
+                        results are pickled back (falls back to threads where
+                        fork is not available); an initializer can attach
+                        shared data in every worker (catalog.shared)
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+build_modes = ["serial", "thread", "process"]
+
+# Tasks of the running graph, read by forked workers
+_forked_tasks = {}
+
+
+def _run_forked(name, needed):
+    function, _ = _forked_tasks[name]
+    return function(needed)
+
+
+def _submit(executor, mode, tasks, name, needed):
+    if mode == "process":
+        return executor.submit(_run_forked, name, needed)
+    return executor.submit(tasks[name][0], needed)
+
+
+def task_levels(tasks):
+    """Groups the tasks into levels that only need earlier levels.
+
+    Args:
+        tasks (dict): {name: (function, list of names it needs)}
+
+    Returns:
+        list of lists: task names, in declaration order within a level
+    """
+    levels = []
+    done = set()
+    remaining = list(tasks)
+    while remaining:
+        level = [name for name in remaining if set(tasks[name][1]) <= done]
+        if not level:
+            raise ValueError(f"tasks {remaining} need each other or missing tasks")
+        levels.append(level)
+        done.update(level)
+        remaining = [name for name in remaining if name not in done]
+    return levels
+
+
+def run_task_graph(
+    tasks, mode="thread", max_workers=None, initializer=None, initargs=()
+):
+    """Runs every task once its inputs are ready.
+
+    Args:
+        tasks (dict): {name: (function, list of names it needs)}; function
+            is called with {needed name: result}
+        mode (str): one of build_modes
+        max_workers (int, optional): defaults to the number of cores
+        initializer (callable, optional): called with initargs in every
+            worker process ("process" mode only)
+
+    Returns:
+        dict: {name: result}, in the order of tasks
+    """
+    if mode not in build_modes:
+        raise ValueError(f"build mode must be one of {build_modes}, not {mode!r}")
+
+    results = {}
+    levels = task_levels(tasks)
+    if mode == "process" and "fork" not in multiprocessing.get_all_start_methods():
+        mode = "thread"
+
+    def needed(name):
+        return {dependency: results[dependency] for dependency in tasks[name][1]}
+
+    for level in levels:
+        if mode == "serial" or len(level) == 1:
+            for name in level:
+                results[name] = tasks[name][0](needed(name))
+            continue
+
+        workers = min(max_workers or os.cpu_count() or 1, len(level))
+        if mode == "process":
+            _forked_tasks.clear()
+            _forked_tasks.update(tasks)
+            executor = ProcessPoolExecutor(
+                workers,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=initializer,
+                initargs=initargs,
+            )
+        else:
+            executor = ThreadPoolExecutor(workers)
+
+        with executor:
+            futures = {
+                name: _submit(executor, mode, tasks, name, needed(name))
+                for name in level
+            }
+            for name in level:
+                results[name] = futures[name].result()
+
+    return {name: results[name] for name in tasks}
@@ -0,0 +1,216 @@
+"""Content-Addressed Artifact Cache
+
+Every stage of the pipeline (filter, time matrix, unique matrix,
+requirements, alternates, costs, serialized data) is a node whose output is
+saved under amplData/cache/{stage}/{key}.pkl, where key is a hash of:
+
+         -- the stage name and the source of the modules that compute it
+         -- its inputs (user inputs, settings, catalog fingerprint)
+         -- the keys of the upstream nodes it depends on
+
+A rerun only recomputes the nodes whose key changed, like a build system.
+
+Inspect or clean the cache with:
+
+    python -m pipeline.cache list
+    python -m pipeline.cache clean [--older-than DAYS] [--keep N]
+    python -m pipeline.cache clear
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+
+cache_dir = os.path.join("amplData", "cache")
+
+# Hits and misses of this process, per stage
+cache_stats = {}
+
+_file_hashes = {}
+
+
+def _default(value):
+    """JSON encoding of the values json does not know (numpy, sets)."""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    raise TypeError(f"cannot hash {type(value).__name__}")
+
+
+def hash_inputs(*values):
+    """Stable hash of JSON-like values (dict key order does not matter).
+
+    Returns:
+        str: hex sha256
+    """
+    text = json.dumps(values, sort_keys=True, default=_default)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def hash_file(path):
+    """Hash of a file's contents (computed again only when its modification
+    time or size changed)."""
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    if path not in _file_hashes or _file_hashes[path][0] != signature:
+        with open(path, "rb") as f:
+            _file_hashes[path] = signature, hashlib.sha256(f.read()).hexdigest()
+    return _file_hashes[path][1]
+
+
+def code_version(*modules):
+    """Hash of the source files of modules, so cached outputs are
+    invalidated when the code computing them changes."""
+    return hash_inputs(*(hash_file(module.__file__) for module in modules))
+
+
+def artifact_path(stage, key):
+    return os.path.join(cache_dir, stage, key + ".pkl")
+
+
+def cached_stage(stage, inputs, compute, enabled=True):
+    """Output of a pipeline node, from the cache when its key is known.
+
+    Args:
+        stage (str): name of the node
+        inputs (list): everything the output depends on (JSON-like values and
+            upstream keys)
+        compute (function): computes the output when it is not cached
+        enabled (bool): False always computes (and does not save)
+
+    Returns:
+        tuple: (output, key of this node)
+    """
+    key = hash_inputs(stage, inputs)
+    stats = cache_stats.setdefault(stage, {"hits": 0, "misses": 0})
+    if not enabled:
+        stats["misses"] += 1
+        return compute(), key
+
+    path = artifact_path(stage, key)
+    if os.path.exists(path):
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            stats["hits"] += 1
+            return value, key
+        except (EOFError, pickle.UnpicklingError):
+            pass  # Broken artifact (eg. interrupted write), recompute it
+
+    stats["misses"] += 1
+    value = compute()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + f".{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+    return value, key
+
+
+##################################################
+# Inspection and Cleanup:
+
+
+def cache_entries():
+    """Every artifact of the cache, newest first.
+
+    Returns:
+        list of dicts: {"stage", "key", "path", "size", "modified"}
+    """
+    entries = []
+    if not os.path.isdir(cache_dir):
+        return entries
+
+    for stage in sorted(os.listdir(cache_dir)):
+        stage_dir = os.path.join(cache_dir, stage)
+        if not os.path.isdir(stage_dir):
+            continue
+        for name in os.listdir(stage_dir):
+            if not name.endswith(".pkl"):
+                continue
+            path = os.path.join(stage_dir, name)
+            info = os.stat(path)
+            entries.append(
+                {
+                    "stage": stage,
+                    "key": name[: -len(".pkl")],
+                    "path": path,
+                    "size": info.st_size,
+                    "modified": info.st_mtime,
+                }
+            )
+
+    entries.sort(key=lambda entry: -entry["modified"])
+    return entries
+
+
+def clean_cache(older_than_days=None, keep=None):
+    """Removes old artifacts.
+
+    Args:
+        older_than_days (float, optional): remove artifacts not written for
+            this many days
+        keep (int, optional): keep only the newest keep artifacts per stage
+
+    Returns:
+        list of dicts: the removed entries
+    """
+    now = time.time()
+    per_stage = {}
+    removed = []
+    for entry in cache_entries():
+        per_stage[entry["stage"]] = per_stage.get(entry["stage"], 0) + 1
+        too_old = (
+            older_than_days is not None
+            and now - entry["modified"] > older_than_days * 24 * 3600
+        )
+        too_many = keep is not None and per_stage[entry["stage"]] > keep
+        if too_old or too_many:
+            os.remove(entry["path"])
+            removed.append(entry)
+    return removed
+
+
+def clear_cache():
+    """Removes the whole cache."""
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def print_cache(entries):
+    totals = {}
+    for entry in entries:
+        count, size = totals.get(entry["stage"], (0, 0))
+        totals[entry["stage"]] = (count + 1, size + entry["size"])
+
+    print(f'{"Stage":<16}{"Artifacts":>10}{"Size (kB)":>12}  Newest')
+    for stage, (count, size) in sorted(totals.items()):
+        newest = max(e["modified"] for e in entries if e["stage"] == stage)
+        print(
+            f"{stage:<16}{count:>10}{size / 1024:>12.1f}  "
+            + time.strftime("%Y-%m-%d %H:%M", time.localtime(newest))
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or clean the cache.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="artifacts per stage")
+    clean_parser = commands.add_parser("clean", help="remove old artifacts")
+    clean_parser.add_argument("--older-than", type=float, metavar="DAYS")
+    clean_parser.add_argument("--keep", type=int, metavar="N")
+    commands.add_parser("clear", help="remove the whole cache")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        print_cache(cache_entries())
+    elif args.command == "clean":
+        removed = clean_cache(args.older_than, args.keep)
+        print(f"Removed {len(removed)} artifacts")
+    else:
+        clear_cache()
+        print(f"Removed {cache_dir}")
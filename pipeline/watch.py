@@ -0,0 +1,234 @@
+"""Watch Mode
+
+Keeps the catalog, its indexes and the model loaded, and re-solves every
+time a student's workbook is saved:
+
+    python -m pipeline.watch ["Course Schedule User Input.xlsx" ...]
+
+         -- saves are picked up with filesystem notifications (watchdog,
+            optional) or by polling the modification time, and handled once
+            the file has not changed for watch_debounce seconds
+            (spreadsheet programs save in several writes)
+         -- the sheet is compared column by column with the version last
+            solved: a save that changes nothing is skipped, and the columns
+            that changed are printed
+         -- the instance is rebuilt through the pipeline cache, so only the
+            matrices whose inputs changed are recomputed, then the .dat
+            file, the preview and (with run_solver) the solve are redone as
+            in main.py
+         -- solves go to one warm ampl worker (solver.pool) that keeps the
+            model loaded for the whole session
+         -- the catalog files and preReqs/prereqs_edited.json are watched
+            too: the catalog is only loaded once, so a change to them
+            restarts watch mode, and the new catalog is loaded (and its
+            new fingerprint keys the pipeline cache)
+
+With several workbooks, the .dat file of each is named after the workbook.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import main
+from excel.excel_parser import parse_student_sheet, read_student_sheet
+from solver.pool import SolverPool
+from userInput import (
+    catalog_files,
+    curr_dat_filename,
+    excel_file_name,
+    excel_sheet_name,
+    run_solver,
+    solver_portfolio,
+    watch_debounce,
+    watch_poll_interval,
+)
+
+try:
+    from watchdog.observers import Observer
+except ImportError:  # watchdog is optional
+    Observer = None
+
+# Files loaded once per process, watch mode restarts when they change
+catalog_paths = list(catalog_files) + [os.path.join("preReqs", "prereqs_edited.json")]
+
+
+def _signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class _Notify:
+    """watchdog event handler that sets event when one of paths changes."""
+
+    def __init__(self, paths, event):
+        self.paths = {os.path.abspath(path) for path in paths}
+        self.event = event
+
+    def dispatch(self, notification):
+        for path in (notification.src_path, getattr(notification, "dest_path", "")):
+            if path and os.path.abspath(path) in self.paths:
+                self.event.set()
+
+
+def start_notifications(paths):
+    """Starts watching the directories of paths (when watchdog is installed).
+
+    Returns:
+        tuple: (observer, threading.Event set on every change), or
+               (None, None) to poll instead
+    """
+    if Observer is None:
+        return None, None
+    event = threading.Event()
+    observer = Observer()
+    handler = _Notify(paths, event)
+    for directory in {os.path.dirname(os.path.abspath(path)) for path in paths}:
+        observer.schedule(handler, directory)
+    observer.start()
+    return observer, event
+
+
+def wait_for_changes(paths, seen, event=None):
+    """Blocks until some of paths change, and then until they have not
+    changed for watch_debounce seconds.
+
+    Args:
+        seen (dict): {path: signature} of the versions already handled,
+            updated in place
+        event (threading.Event, optional): from start_notifications, polls
+            every watch_poll_interval seconds without it
+
+    Returns:
+        list: the paths that changed
+    """
+    while True:
+        if event is not None:
+            event.wait()
+            event.clear()
+        else:
+            time.sleep(watch_poll_interval)
+        if all(_signature(path) == seen[path] for path in paths):
+            continue
+
+        signatures = {path: _signature(path) for path in paths}
+        while True:
+            time.sleep(watch_debounce)
+            latest = {path: _signature(path) for path in paths}
+            if latest == signatures:
+                break
+            signatures = latest
+
+        changed = [path for path in paths if signatures[path] != seen[path]]
+        seen.update(signatures)
+        changed = [path for path in changed if signatures[path] is not None]
+        if changed:
+            return changed
+
+
+def changed_columns(previous, current):
+    """Columns of the sheet whose values changed.
+
+    Args:
+        previous (pandas.DataFrame): the sheet last solved, or None
+        current (pandas.DataFrame): the sheet as saved
+
+    Returns:
+        list: column names, in the order of the sheet
+    """
+    names = []
+    for k, name in enumerate(current.columns):
+        if (
+            previous is None
+            or k >= previous.shape[1]
+            or not previous.iloc[:, k].equals(current.iloc[:, k])
+        ):
+            if name not in names:
+                names.append(name)
+    return names
+
+
+def solve_workbook(path, state, dat_filename, pool=None):
+    """Rebuilds and re-solves the instance of a workbook if its sheet changed.
+
+    Args:
+        state (dict): {"sheet": the sheet last solved}, updated in place
+        pool (solver.pool.SolverPool, optional): see main.run_instance
+
+    Returns:
+        dict: the results record when solved (see main.run_instance)
+    """
+    start = time.perf_counter()
+    try:
+        sheet = read_student_sheet(path, excel_sheet_name)
+        changed = changed_columns(state.get("sheet"), sheet)
+        if not changed:
+            print(f"{path}: no changes")
+            return None
+        inputs = parse_student_sheet(sheet)
+    except Exception as error:
+        print(f"{path}: could not read the {excel_sheet_name} sheet ({error})")
+        return None
+
+    if "sheet" in state:
+        print(f'{path}: {", ".join(changed)} changed')
+    state["sheet"] = sheet
+    instance = main.build_instance(inputs["only_selected"], inputs, refresh_seats=False)
+    record = main.run_instance(instance, dat_filename, pool)
+    print(f"Done in {(time.perf_counter() - start) * 1000:.0f} ms")
+    return record
+
+
+def watch(paths, dat_filename=curr_dat_filename):
+    """Solves every workbook, then again each time one of them is saved,
+    until interrupted."""
+    main.write_model()
+    names = {
+        path: dat_filename
+        if len(paths) == 1
+        else os.path.splitext(os.path.basename(path))[0].replace(" ", "_")
+        for path in paths
+    }
+    states = {path: {} for path in paths}
+    watched = list(paths) + [path for path in catalog_paths if path not in paths]
+    seen = {path: _signature(path) for path in watched}
+
+    observer, event = start_notifications(watched)
+    how = "filesystem notifications" if observer else "polling"
+    # The portfolio starts its own solvers (solver.results.solve_and_report)
+    pool = SolverPool(workers=1) if run_solver and not solver_portfolio else None
+    restart = False
+    try:
+        changed = paths
+        while True:
+            for path in changed:
+                solve_workbook(path, states[path], names[path], pool)
+            print(f"Watching {len(paths)} workbook(s) ({how}), Ctrl-C to stop")
+            changed = wait_for_changes(watched, seen, event)
+            catalog_changed = [path for path in changed if path in catalog_paths]
+            if catalog_changed:
+                print(f'{", ".join(catalog_changed)} changed, reloading the catalog')
+                restart = True
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if observer is not None:
+            observer.stop()
+            observer.join()
+        if pool is not None:
+            pool.close()
+    if restart:
+        os.execv(sys.executable, [sys.executable, "-m", "pipeline.watch"] + list(paths))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-solve when a workbook changes.")
+    parser.add_argument("workbooks", nargs="*", default=[excel_file_name])
+    args = parser.parse_args()
+    watch(args.workbooks)
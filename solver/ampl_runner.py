@@ -0,0 +1,251 @@
+"""Running AMPL From Python
+
+Writes .run files that load the model and data, solve, and print the
+solution in a format that parse_solution can read back (instead of
+`display x`), and runs them with the ampl executable from userInput.py.
+
+A session .run file reads the model once and then solves several jobs,
+only resetting and re-reading the data that changes between them.
+"""
+
+import os
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from solver.model_spec import default_model_spec, model_path
+from userInput import ampl_path, solver_path
+
+
+# Suffixes returned by CPLEX with return_mipgap/bestbound (declared so the
+# printf below also works with solvers that do not return them)
+telemetry_suffixes = ["relmipgap", "absmipgap", "bestbound"]
+
+# Solver telemetry: STAT name -> AMPL expression
+telemetry_stats = {
+    "solve_result_num": "solve_result_num",
+    "solve_elapsed_time": "_solve_elapsed_time",
+    "ampl_rows": "_ncons",
+    "ampl_columns": "_nvars",
+    "solver_rows": "_sncons",
+    "solver_columns": "_snvars",
+    "solver_nonzeros": "_snzcons",
+    "relmipgap": "{objective}.relmipgap",
+    "absmipgap": "{objective}.absmipgap",
+    "bestbound": "{objective}.bestbound",
+}
+
+# Counters only found in the solver message
+solver_message_stats = {
+    "nodes": re.compile(r"(\d+) branch-and-bound nodes"),
+    "iterations": re.compile(r"(\d+) (?:MIP |dual |primal )?simplex iterations"),
+}
+
+
+def solution_commands(output_file=None):
+    """AMPL commands printing one "KEY value" line per result.
+
+    Args:
+        output_file (str, optional): print to this file instead of stdout
+    """
+    objective_name = default_model_spec["objective_name"]
+    to = f' > "{output_file}"' if output_file else ""
+    res = (
+        f'printf "SOLVE_RESULT %s\\n", solve_result{to};\n'
+        f'printf "OBJECTIVE %.6f\\n", {objective_name}{to};\n'
+        f'printf {{j in courses: x[j] > 0.5}} "CHOSEN %s\\n", j{to};\n'
+    )
+    for name, expression in telemetry_stats.items():
+        expression = expression.format(objective=objective_name)
+        res += f'printf "STAT {name} %.6f\\n", {expression}{to};\n'
+    return res
+
+
+def solver_options(threads=None, options=""):
+    """AMPL commands setting the solver and its options.
+
+    Args:
+        options (str, optional): more cplex_options, eg. "presolve=0"
+    """
+    res = f"option solver '{solver_path}';\n"
+    cplex_options = ["return_mipgap=3", "bestbound"]
+    if threads:
+        cplex_options.append(f"threads={threads}")
+    if options:
+        cplex_options.append(options)
+    res += f"option cplex_options '{' '.join(cplex_options)}';\n"
+    for suffix in telemetry_suffixes:
+        res += f"suffix {suffix} OUT;\n"
+    return res
+
+
+def session_file_string(jobs, threads=None):
+    """Commands that read the model once and solve every job.
+
+    Args:
+        jobs (list): (data_files, reset_params) pairs. data_files are read
+            in order. reset_params lists the params whose data is dropped
+            before reading them (None drops all data, ie. a new student);
+            it is ignored for the first job.
+        threads (int, optional): solver threads (None lets the solver decide)
+
+    Returns:
+        str: contents of the .run file
+    """
+    res = f'model "{os.path.abspath(model_path)}";\n'
+    res += solver_options(threads)
+
+    for k, (data_files, reset_params) in enumerate(jobs):
+        if k > 0:
+            if reset_params is None:
+                res += "reset data;\n"
+            else:
+                res += "reset data " + ", ".join(reset_params) + ";\n"
+        for data_file in data_files:
+            res += f'data "{os.path.abspath(data_file)}";\n'
+        res += "solve;\n"
+        res += f'printf "JOB {k}\\n";\n'
+        res += solution_commands()
+
+    return res
+
+
+def run_file_string(data_files, threads=None):
+    """Commands that solve the model once for the given data files.
+
+    Returns:
+        str: contents of the .run file
+    """
+    return session_file_string([(data_files, None)], threads)
+
+
+def run_ampl(run_file, timeout=None):
+    """Runs ampl on a .run file.
+
+    Returns:
+        str: everything ampl printed
+    """
+    completed = subprocess.run(
+        [ampl_path, run_file],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        universal_newlines=True,
+        timeout=timeout,
+    )
+    return completed.stdout
+
+
+def parse_solution(output, possible_courses):
+    """Reads the lines printed by solution_commands.
+
+    Course names are underscored in the .dat file (see course_names.txt), so
+    they are mapped back to the complete course codes.
+
+    Returns:
+        dict: {"solve_result": str, "objective": float or None,
+               "chosen": list of complete course codes,
+               "stats": {name: float}}
+    """
+    ampl_name_to_course = {
+        course.replace(" ", "_"): course for course in possible_courses
+    }
+
+    solution = {"solve_result": "unknown", "objective": None, "chosen": [], "stats": {}}
+    for line in output.splitlines():
+        key, _, value = line.strip().partition(" ")
+        if key == "SOLVE_RESULT":
+            solution["solve_result"] = value
+        elif key == "OBJECTIVE":
+            solution["objective"] = float(value)
+        elif key == "CHOSEN":
+            solution["chosen"].append(ampl_name_to_course.get(value, value))
+        elif key == "STAT":
+            name, _, number = value.partition(" ")
+            solution["stats"][name] = float(number)
+
+    for name, pattern in solver_message_stats.items():
+        match = pattern.search(output)
+        if match:
+            solution["stats"][name] = float(match.group(1))
+
+    stats = solution["stats"]
+    if "ampl_rows" in stats and "solver_rows" in stats:
+        stats["presolve_rows_removed"] = stats["ampl_rows"] - stats["solver_rows"]
+    if "ampl_columns" in stats and "solver_columns" in stats:
+        stats["presolve_columns_removed"] = (
+            stats["ampl_columns"] - stats["solver_columns"]
+        )
+
+    return solution
+
+
+def split_session_output(output):
+    """Splits the output of a session .run file at its "JOB k" lines.
+
+    Returns:
+        list of str: the output of every job, in order
+    """
+    chunks = []
+    for line in output.splitlines():
+        if line.startswith("JOB "):
+            chunks.append([])
+        elif chunks:
+            chunks[-1].append(line)
+
+    return ["\n".join(chunk) for chunk in chunks]
+
+
+def parse_session_output(output, possible_courses):
+    """Parses the output of every job of a session .run file.
+
+    Returns:
+        list of dicts: the parse_solution of every job, in order
+    """
+    return [
+        parse_solution(chunk, possible_courses)
+        for chunk in split_session_output(output)
+    ]
+
+
+def run_sessions(jobs, dir_path, max_workers=None, threads=1):
+    """Solves independent jobs (eg. different students) in parallel, with one
+    AMPL session per worker.
+
+    Args:
+        jobs (list): (data_files, possible_courses) pairs
+        dir_path (str): where the session .run files are written
+        max_workers (int, optional): parallel sessions (defaults to the
+                                     number of cores)
+        threads (int, optional): solver threads per session
+
+    Returns:
+        list of dicts: the parse_solution of every job, in the order of jobs
+    """
+    unsolved = {"solve_result": "unknown", "objective": None, "chosen": [], "stats": {}}
+    if not jobs:
+        return []
+
+    os.makedirs(dir_path, exist_ok=True)
+    num_sessions = min(max_workers or os.cpu_count(), len(jobs))
+    sessions = [list(range(k, len(jobs), num_sessions)) for k in range(num_sessions)]
+
+    def solve_session(k):
+        run_file = os.path.join(dir_path, f"session{k}.run")
+        with open(run_file, "w") as f:
+            f.write(
+                session_file_string(
+                    [(jobs[i][0], None) for i in sessions[k]], threads=threads
+                )
+            )
+        chunks = split_session_output(run_ampl(run_file))
+        return {
+            i: parse_solution(chunk, jobs[i][1])
+            for i, chunk in zip(sessions[k], chunks)
+        }
+
+    solutions = {}
+    with ThreadPoolExecutor(max_workers=num_sessions) as executor:
+        for result in executor.map(solve_session, range(num_sessions)):
+            solutions.update(result)
+
+    return [dict(solutions.get(i, unsolved)) for i in range(len(jobs))]
@@ -0,0 +1,164 @@
+"""Approximate Schedules (Fast Path)
+
+Finds a good schedule in milliseconds without solving the MILP, using the
+same rows as model.mod (solver.matrix_form):
+
+         -- Greedy: first take the courses that cover the most unmet
+            requirement/alternates/minCourses rows, then fill up with the
+            highest ranked courses that still fit.
+         -- LP rounding: solve the LP relaxation (scipy, optional) and run
+            the same greedy in order of the LP values.
+
+The LP relaxation also gives an upper bound on the best Happiness, so the
+result reports how far the approximate schedule can be from the optimum.
+Without scipy the bound is the sum of the maxCourses best rankings.
+"""
+
+import time
+
+from solver.matrix_form import constraint_rows, dense_form
+
+try:
+    from scipy.optimize import linprog
+except ImportError:  # scipy is optional
+    linprog = None
+
+
+def greedy_schedule(instance, order, rows=None):
+    """Conflict-aware greedy selection.
+
+    Args:
+        instance (dict): built by main.build_instance
+        order (list): course indices, most wanted first
+        rows (list, optional): constraint_rows(instance), when already built
+
+    Returns:
+        tuple: (chosen course indices, True if every lower bound is met)
+    """
+    if rows is None:
+        rows = list(constraint_rows(instance))
+    num_courses = len(instance["possible_courses"])
+    costs = instance["costs"]
+
+    column_rows = [[] for _ in range(num_courses)]
+    for k, (name, columns, lower, upper) in enumerate(rows):
+        for j in columns:
+            column_rows[j].append(k)
+
+    usage = [0] * len(rows)
+    chosen = []
+    taken = [False] * num_courses
+    rank = {j: position for position, j in enumerate(order)}
+
+    def fits(j):
+        for k in column_rows[j]:
+            upper = rows[k][3]
+            if upper is not None and usage[k] + 1 > upper:
+                return False
+        return True
+
+    def take(j):
+        taken[j] = True
+        chosen.append(j)
+        for k in column_rows[j]:
+            usage[k] += 1
+
+    # Cover unmet lower bounds first
+    while True:
+        unmet = {
+            k for k, row in enumerate(rows) if row[2] is not None and usage[k] < row[2]
+        }
+        if not unmet:
+            break
+
+        best, best_score = None, None
+        for j in order:
+            if taken[j] or not fits(j):
+                continue
+            covered = sum(1 for k in column_rows[j] if k in unmet)
+            if covered and (best is None or (covered, -rank[j]) > best_score):
+                best, best_score = j, (covered, -rank[j])
+        if best is None:
+            break
+        take(best)
+
+    # Fill up with wanted courses
+    for j in order:
+        if not taken[j] and costs[j] > 0 and fits(j):
+            take(j)
+
+    feasible = all(row[2] is None or usage[k] >= row[2] for k, row in enumerate(rows))
+    return chosen, feasible
+
+
+def lp_relaxation(instance, rows=None):
+    """Solves the LP relaxation with scipy.
+
+    Returns:
+        tuple: (x values, upper bound), or (None, None) when scipy is not
+               installed or the relaxation is infeasible
+    """
+    if linprog is None:
+        return None, None
+
+    costs, a_ub, b_ub, names = dense_form(instance, rows)
+    result = linprog(-costs, A_ub=a_ub, b_ub=b_ub, bounds=(0, 1), method="highs")
+    if result.status != 0:
+        return None, None
+    return result.x, -result.fun
+
+
+def simple_upper_bound(instance):
+    """Sum of the maxCourses best rankings (valid without any solver)."""
+    best = sorted(instance["costs"], reverse=True)[: instance["max_courses"]]
+    return float(sum(cost for cost in best if cost > 0))
+
+
+def approximate_schedule(instance):
+    """Best of the greedy and LP rounding schedules, with the optimality
+    gap.
+
+    Returns:
+        dict: {"method", "chosen" (course codes), "objective", "feasible",
+               "upper_bound", "bound_source", "gap", "time_ms"}
+    """
+    start = time.perf_counter()
+    possible_courses = instance["possible_courses"]
+    costs = instance["costs"]
+
+    def objective(chosen):
+        return float(sum(costs[j] for j in chosen))
+
+    rows = list(constraint_rows(instance))
+    by_cost = sorted(range(len(possible_courses)), key=lambda j: -costs[j])
+    candidates = [("greedy", *greedy_schedule(instance, by_cost, rows))]
+
+    x, upper_bound = lp_relaxation(instance, rows)
+    bound_source = "lp"
+    if x is not None:
+        by_lp = sorted(range(len(possible_courses)), key=lambda j: (-x[j], -costs[j]))
+        candidates.append(("lp_rounding", *greedy_schedule(instance, by_lp, rows)))
+    else:
+        upper_bound = simple_upper_bound(instance)
+        bound_source = "top_rankings"
+
+    # Feasible schedules first, then the higher objective
+    method, chosen, feasible = max(
+        candidates, key=lambda candidate: (candidate[2], objective(candidate[1]))
+    )
+    value = objective(chosen)
+
+    gap = None
+    if upper_bound:
+        gap = max(upper_bound - value, 0.0) / abs(upper_bound)
+
+    return {
+        "method": method,
+        "chosen": [possible_courses[j] for j in chosen],
+        "objective": value,
+        "feasible": feasible,
+        "upper_bound": float(upper_bound),
+        "bound_source": bound_source,
+        "gap": gap,
+        "time_ms": (time.perf_counter() - start) * 1000,
+    }
@@ -0,0 +1,195 @@
+"""MPS and LP Export
+
+Writes an instance in the standard formats read by every MILP solver
+(HiGHS, CBC, SCIP, Gurobi, CPLEX), so it can be solved from the command
+line or archived and re-solved later:
+
+         -- free MPS (.mps), with OBJSENSE MAX, ranged rows for Alts and
+            EnrollmentBounds and binary (BV) bounds
+         -- CPLEX LP (.lp), with Binaries
+
+The rows come from solver.matrix_form, the same rows as model.mod. Files
+are written line by line as the rows are produced (never built as one
+string); a path ending in .gz is compressed on the fly.
+
+    highs amplData/data/data.mps
+    cbc amplData/data/data.mps.gz solve solu data.sol
+"""
+
+import gzip
+import os
+
+from solver.matrix_form import constraint_rows
+from solver.model_spec import default_model_spec
+
+# Terms per line of the LP file (CPLEX reads lines of at most 510 characters)
+lp_terms_per_line = 8
+
+_name_characters = str.maketrans({" ": "_", "-": ".", "[": "(", "]": ")"})
+
+
+def export_name(name):
+    """Name of a course or row that every MPS/LP reader accepts
+    (eg. "AFRI 010AC AF-01" -> "AFRI_010AC_AF.01",
+    "Reqs[r1]" -> "Reqs(r1)")."""
+    return name.translate(_name_characters)
+
+
+def _number(value):
+    return f"{float(value):.12g}"
+
+
+def _open(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "wt", encoding="ascii")
+    return open(path, "w", encoding="ascii")
+
+
+def _column_entries(instance, rows):
+    """Rows of every column (MPS lists the matrix column by column).
+
+    Returns:
+        list of lists: row indices per course index
+    """
+    entries = [[] for _ in instance["possible_courses"]]
+    for k, (name, columns, lower, upper) in enumerate(rows):
+        for j in columns:
+            entries[j].append(k)
+    return entries
+
+
+def write_mps(instance, path, name="schedule"):
+    """Writes the instance as free MPS.
+
+    Args:
+        instance (dict): built by main.build_instance
+        path (str): output file (.mps or .mps.gz)
+        name (str): NAME of the problem
+    """
+    objective = export_name(default_model_spec["objective_name"])
+    courses = [export_name(course) for course in instance["possible_courses"]]
+    costs = instance["costs"]
+
+    # Rows only hold column indices, the file itself is written as it goes
+    rows = [
+        (export_name(row_name), columns, lower, upper)
+        for row_name, columns, lower, upper in constraint_rows(instance)
+    ]
+    entries = _column_entries(instance, rows)
+
+    with _open(path) as f:
+        f.write(f"NAME {name}\n")
+        f.write("OBJSENSE\n    MAX\n")
+
+        f.write("ROWS\n")
+        f.write(f" N  {objective}\n")
+        for row_name, columns, lower, upper in rows:
+            row_type = "L" if upper is not None else "G"
+            f.write(f" {row_type}  {row_name}\n")
+
+        f.write("COLUMNS\n")
+        f.write("    MARKER    'MARKER'    'INTORG'\n")
+        for j, course in enumerate(courses):
+            if costs[j]:
+                f.write(f"    {course}  {objective}  {_number(costs[j])}\n")
+            for k in entries[j]:
+                f.write(f"    {course}  {rows[k][0]}  1\n")
+        f.write("    MARKER    'MARKER'    'INTEND'\n")
+
+        f.write("RHS\n")
+        for row_name, columns, lower, upper in rows:
+            rhs = upper if upper is not None else lower
+            if rhs:
+                f.write(f"    RHS  {row_name}  {_number(rhs)}\n")
+
+        f.write("RANGES\n")
+        for row_name, columns, lower, upper in rows:
+            if upper is not None and lower is not None:
+                f.write(f"    RNG  {row_name}  {_number(upper - lower)}\n")
+
+        f.write("BOUNDS\n")
+        for course in courses:
+            f.write(f" BV BND  {course}\n")
+
+        f.write("ENDATA\n")
+
+
+def _write_terms(f, terms):
+    """Writes "t1 + t2 + ..." over several lines."""
+    for start in range(0, len(terms), lp_terms_per_line):
+        f.write("\n   + " if start else "   ")
+        f.write(" + ".join(terms[start : start + lp_terms_per_line]))
+
+
+def write_lp(instance, path, name="schedule"):
+    """Writes the instance in CPLEX LP format.
+
+    Ranged rows (Alts, EnrollmentBounds) are written as a ">=" row
+    ({name}_lo) and a "<=" row ({name}_hi).
+
+    Args:
+        instance (dict): built by main.build_instance
+        path (str): output file (.lp or .lp.gz)
+        name (str): name of the problem (in a comment)
+    """
+    objective = export_name(default_model_spec["objective_name"])
+    courses = [export_name(course) for course in instance["possible_courses"]]
+    costs = instance["costs"]
+
+    with _open(path) as f:
+        f.write(f"\\ Problem: {name}\n")
+        f.write("Maximize\n")
+        f.write(f" {objective}:\n")
+        terms = [f"{_number(c)} {course}" for c, course in zip(costs, courses) if c]
+        _write_terms(f, terms or [f"0 {courses[0]}"])
+        f.write("\nSubject To\n")
+
+        for row_name, columns, lower, upper in constraint_rows(instance):
+            row_name = export_name(row_name)
+            terms = [courses[j] for j in columns] or [f"0 {courses[0]}"]
+            if upper is not None and lower is not None:
+                bounds = [("_lo", ">=", lower), ("_hi", "<=", upper)]
+            elif upper is not None:
+                bounds = [("", "<=", upper)]
+            else:
+                bounds = [("", ">=", lower)]
+
+            for suffix, sense, rhs in bounds:
+                f.write(f" {row_name}{suffix}:\n")
+                _write_terms(f, terms)
+                f.write(f" {sense} {_number(rhs)}\n")
+
+        f.write("Binaries\n")
+        for start in range(0, len(courses), lp_terms_per_line):
+            f.write(" " + " ".join(courses[start : start + lp_terms_per_line]) + "\n")
+        f.write("End\n")
+
+
+export_writers = {
+    "mps": write_mps,
+    "lp": write_lp,
+}
+
+
+def export_instance(instance, dat_filename, formats, compress=False):
+    """Writes the instance in every format to amplData/{dat_filename}/.
+
+    Args:
+        formats (list): names of export_writers (eg. ["mps", "lp"])
+        compress (bool): gzip the files (.mps.gz)
+
+    Returns:
+        list: the paths written
+    """
+    dir_path = os.path.join("amplData", dat_filename)
+    os.makedirs(dir_path, exist_ok=True)
+    name = os.path.basename(dat_filename)
+
+    paths = []
+    for file_format in formats:
+        path = os.path.join(dir_path, name + "." + file_format)
+        if compress:
+            path += ".gz"
+        export_writers[file_format](instance, path, name=name)
+        paths.append(path)
+    return paths
@@ -0,0 +1,108 @@
+"""Matrix Form of an Instance
+
+The same rows as model.mod, built straight from the matrices of
+main.build_instance (no .dat file or AMPL needed):
+
+         -- TimeConflicts[t]     sum x <= 1
+         -- TravelTime[v]        sum x <= 1
+         -- Uniqueness[c]        sum x <= 1
+         -- Reqs[r]              sum x >= necessary[r]
+         -- Alts[a]              lower[a] <= sum x <= upper[a]
+         -- EnrollmentBounds     minCourses <= sum x <= maxCourses
+
+Rows are sparse (lists of column indices, every coefficient is 1) and
+produced one at a time, and rows without any course are skipped.
+"""
+
+import numpy as np
+
+from funcs import unique_columns_func
+
+
+def _columns(row):
+    return [int(j) for j in np.flatnonzero(np.asarray(row))]
+
+
+def _matrix_columns(matrix):
+    """Column indices of every row of a 0/1 matrix, in one numpy pass."""
+    matrix = np.asarray(matrix)
+    if matrix.size == 0:
+        return [[] for _ in range(len(matrix))]
+    row_indices, column_indices = np.nonzero(matrix)
+    bounds = np.searchsorted(row_indices, np.arange(matrix.shape[0] + 1))
+    column_indices = column_indices.tolist()
+    return [
+        column_indices[bounds[i] : bounds[i + 1]] for i in range(matrix.shape[0])
+    ]
+
+
+def constraint_rows(instance):
+    """Yields every row of the instance.
+
+    Yields:
+        tuple: (row name, column indices, lower bound or None,
+                upper bound or None)
+    """
+    for i, columns in enumerate(_matrix_columns(instance["time_conflict_matrix"])):
+        if len(columns) > 1:
+            yield f"TimeConflicts[t{i}]", columns, None, 1
+
+    course_to_index = instance["course_to_index"]
+    for i, courses in enumerate(instance.get("travel_conflicts", [])):
+        yield f"TravelTime[v{i}]", [course_to_index[c] for c in courses], None, 1
+
+    unique_columns = unique_columns_func(
+        instance["dict_w_same_codes"], instance["course_to_index"]
+    )
+    for i, columns in enumerate(unique_columns):
+        if len(columns) > 1:
+            yield f"Uniqueness[c{i}]", columns, None, 1
+
+    for i, row in enumerate(instance["requirements_matrix"]):
+        necessary = float(instance["necessary"][i])
+        if necessary > 0:
+            yield f"Reqs[r{i + 1}]", _columns(row), necessary, None
+
+    for i, row in enumerate(instance["alternates_matrix"]):
+        lower, upper = (float(limit) for limit in instance["alternates"][i][1])
+        yield f"Alts[a{i}]", _columns(row), lower, upper
+
+    yield (
+        "EnrollmentBounds",
+        list(range(len(instance["possible_courses"]))),
+        instance["min_courses"],
+        instance["max_courses"],
+    )
+
+
+def dense_form(instance, rows=None):
+    """Instance as numpy arrays for A_ub x <= b_ub with 0 <= x <= 1
+    (>= rows are negated).
+
+    Args:
+        rows (list, optional): constraint_rows(instance), when already built
+
+    Returns:
+        tuple: (costs, A_ub, b_ub, row names)
+    """
+    if rows is None:
+        rows = constraint_rows(instance)
+
+    num_courses = len(instance["possible_courses"])
+    dense_rows, rhs, names = [], [], []
+    for name, columns, lower, upper in rows:
+        if upper is not None:
+            row = np.zeros(num_courses)
+            row[columns] = 1
+            dense_rows.append(row)
+            rhs.append(upper)
+            names.append(name)
+        if lower is not None and lower > 0:
+            row = np.zeros(num_courses)
+            row[columns] = -1
+            dense_rows.append(row)
+            rhs.append(-lower)
+            names.append(name)
+
+    costs = np.asarray(instance["costs"], dtype=float)
+    return costs, np.array(dense_rows), np.array(rhs), names
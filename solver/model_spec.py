@@ -0,0 +1,131 @@
+"""Model Specification
+
+Generates amplFiles/model.mod from a Python spec. Every constant of the
+model is a param whose default comes from the spec, so a .dat file can
+override any of them without touching the model:
+
+         -- xLower, xUpper                 bounds of each x[j] (binary: 0, 1),
+                                           indexed over courses so a .dat
+                                           file can fix single sections
+         -- minCourses, maxCourses         EnrollmentBounds
+         -- timeCapacity                   courses allowed per time slot (and
+                                           per travel time conflict)
+         -- uniqueCapacity                 sections allowed per unique course
+         -- costWeight                     multiplies every cost in the objective
+
+The spec also decides whether x is integer (False gives the LP relaxation)
+and the objective sense.
+"""
+
+import os
+
+from userInput import curr_max_courses, curr_min_courses
+
+model_path = os.path.join("amplFiles", "model.mod")
+
+default_model_spec = {
+    "objective_name": "Happiness",
+    "objective_sense": "maximize",
+    "integer": True,
+    "params": {
+        "xLower": 0,
+        "xUpper": 1,
+        "minCourses": curr_min_courses,
+        "maxCourses": curr_max_courses,
+        "timeCapacity": 1,
+        "uniqueCapacity": 1,
+        "costWeight": 1,
+    },
+    # Params indexed over courses (the rest are scalars)
+    "course_params": ["xLower", "xUpper"],
+}
+
+# Params given per student/variant (the rest of the data describes the
+# courses and stays loaded between solves of a session)
+student_params = ["costs", "necessary", "minCourses", "maxCourses"]
+
+
+def model_string(spec=default_model_spec):
+    """AMPL model for spec.
+
+    Returns:
+        str: contents of the .mod file
+    """
+    res = "# Generated from solver/model_spec.py, edit the spec instead.\n\n"
+    res += "set courses;\n"
+    res += "set requirements;\n"
+    res += "set timeSlots;\n"
+    res += "set uniqueCourses;\n"
+    res += "set alternates;\n"
+    res += "set travelConflicts default {};\n"
+    res += "set travelSections {travelConflicts} within courses;\n\n"
+
+    res += "param costs {j in courses};\n\n"
+    res += "param time {i in timeSlots, j in courses};\n\n"
+    res += "param counts {i in requirements, j in courses};\n\n"
+    res += "param necessary {i in requirements};\n\n"
+    res += "param unique {i in uniqueCourses, j in courses};\n\n"
+    res += "param alternatesLowerLimits {i in alternates};\n\n"
+    res += "param alternatesUpperLimits {i in alternates};\n\n"
+    res += "param alternatesMatrix {i in alternates, j in courses};\n\n"
+
+    for name, value in spec["params"].items():
+        index = " {j in courses}" if name in spec["course_params"] else ""
+        res += f"param {name}{index} default {value};\n\n"
+
+    integer = " integer" if spec["integer"] else ""
+    res += f"var x {{j in courses}}{integer} >= xLower[j], <= xUpper[j];\n\n"
+
+    res += f"{spec['objective_sense']} {spec['objective_name']}: "
+    res += "sum {j in courses} costWeight*costs[j]*x[j];\n\n"
+
+    res += "subject to Alts {i in alternates}:\n"
+    res += "    alternatesLowerLimits[i] <= "
+    res += "sum {j in courses} (alternatesMatrix[i,j]) * x[j] "
+    res += "<= alternatesUpperLimits[i];\n\n"
+
+    res += "subject to Reqs {i in requirements}:\n"
+    res += "    sum {j in courses} (counts[i,j]) * x[j] >= necessary[i];\n\n"
+
+    res += "subject to TimeConflicts {i in timeSlots}:\n"
+    res += "    sum {j in courses} (time[i,j] * x[j]) <= timeCapacity;\n\n"
+
+    res += "subject to TravelTime {i in travelConflicts}:\n"
+    res += "    sum {j in travelSections[i]} x[j] <= timeCapacity;\n\n"
+
+    res += "subject to EnrollmentBounds:\n"
+    res += "    minCourses <= sum {i in courses} x[i] <= maxCourses;\n\n"
+
+    res += "subject to Uniqueness {i in uniqueCourses}:\n"
+    res += "    sum {j in courses} (unique[i,j]) * x[j] <= uniqueCapacity;\n"
+
+    return res
+
+
+def write_model(spec=default_model_spec, path=model_path):
+    """Writes the model for spec, leaving the file untouched when it is
+    already up to date.
+
+    Returns:
+        str: path of the .mod file
+    """
+    res = model_string(spec)
+
+    if os.path.exists(path):
+        with open(path) as f:
+            if f.read() == res:
+                return path
+
+    with open(path, "w") as f:
+        f.write(res)
+
+    return path
+
+
+def requirement_names(num_requirements):
+    """Members of the requirements set, eg. "r1 r2 r3" for 3 requirements."""
+    return " ".join("r" + str(i + 1) for i in range(num_requirements))
+
+
+if __name__ == "__main__":
+    write_model()
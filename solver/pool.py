@@ -0,0 +1,209 @@
+"""Warm Solver Pool
+
+Long-lived AMPL worker processes for the batch and service modes (cohort
+allocations, watch mode), so a solve no longer pays for starting ampl,
+reading model.mod and exiting:
+
+         -- every worker is an ampl process reading commands from a pipe on
+            its stdin: it reads the model and the solver options once, then
+            solves data-only jobs ("reset data; data ...; solve;")
+         -- the solver message and the solution (solution_commands) of a
+            job are printed to a file of the worker, and the job is done
+            when ampl has closed it and printed its done file, so nothing
+            depends on how ampl buffers its own output
+         -- a job still running after solver_job_timeout seconds stops its
+            worker (ampl and the solver it started) and comes back with the
+            solve result "timeout"; a new worker takes its place
+         -- workers are restarted after solver_pool_max_jobs jobs, so
+            whatever a long session accumulates is given back
+
+Jobs are the same (data files, possible courses) pairs as run_sessions:
+
+    with SolverPool() as pool:
+        solutions = pool.solve_many(jobs)
+"""
+
+import os
+import queue
+import signal
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from solver.ampl_runner import parse_solution, solution_commands, solver_options
+from solver.model_spec import model_path
+from userInput import (
+    ampl_path,
+    solver_job_timeout,
+    solver_pool_max_jobs,
+    solver_pool_workers,
+)
+
+pool_dir = os.path.join("amplData", "pool")
+
+# Seconds between checks for the done file of a job
+_poll_interval = 0.005
+
+
+def _unsolved(solve_result):
+    return {"solve_result": solve_result, "objective": None, "chosen": [], "stats": {}}
+
+
+class _Worker:
+    """One ampl process with the model loaded."""
+
+    def __init__(self, number, dir_path, threads):
+        self.number = number
+        self.dir_path = os.path.join(dir_path, f"worker{number}")
+        os.makedirs(self.dir_path, exist_ok=True)
+        self.jobs = 0
+        self.log = open(os.path.join(self.dir_path, "ampl.log"), "w")
+        self.process = subprocess.Popen(
+            [ampl_path],
+            stdin=subprocess.PIPE,
+            stdout=self.log,
+            stderr=subprocess.STDOUT,
+            universal_newlines=True,
+            # Own process group, so a timeout also stops the solver
+            start_new_session=os.name == "posix",
+        )
+        self.send(f'model "{os.path.abspath(model_path)}";\n' + solver_options(threads))
+
+    def send(self, commands):
+        self.process.stdin.write(commands)
+        self.process.stdin.flush()
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def solve(self, data_files, possible_courses, timeout=None):
+        """Solves one job.
+
+        Returns:
+            dict: the parse_solution of the job, with the solve result
+                  "timeout" or "failure" (the worker stopped) when there is
+                  no solution to read
+        """
+        output_file = os.path.abspath(os.path.join(self.dir_path, "job.out"))
+        done_file = os.path.abspath(os.path.join(self.dir_path, "job.done"))
+        for path in (output_file, done_file):
+            if os.path.exists(path):
+                os.remove(path)
+
+        commands = "reset data;\n"
+        for data_file in data_files:
+            commands += f'data "{os.path.abspath(data_file)}";\n'
+        commands += f'solve > "{output_file}";\n'
+        commands += solution_commands(output_file)
+        commands += f'close "{output_file}";\n'
+        commands += f'printf "DONE\\n" > "{done_file}";\n'
+        commands += f'close "{done_file}";\n'
+        self.jobs += 1
+        try:
+            self.send(commands)
+        except OSError:
+            return _unsolved("failure")
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not os.path.exists(done_file):
+            if not self.alive():
+                return _unsolved("failure")
+            if deadline is not None and time.monotonic() > deadline:
+                self.stop()
+                return _unsolved("timeout")
+            time.sleep(_poll_interval)
+
+        with open(output_file) as f:
+            return parse_solution(f.read(), possible_courses)
+
+    def stop(self):
+        """Kills ampl and the solver it started."""
+        if self.alive():
+            if os.name == "posix":
+                os.killpg(self.process.pid, signal.SIGKILL)
+            else:
+                self.process.kill()
+        self.process.wait()
+        self.log.close()
+
+    def close(self, timeout=5):
+        """Lets ampl quit, or stops it after timeout seconds."""
+        if self.alive():
+            try:
+                self.send("quit;\n")
+                self.process.stdin.close()
+                self.process.wait(timeout)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+        self.stop()
+
+
+class SolverPool:
+    """Warm ampl workers that solve jobs from several threads.
+
+    Args:
+        workers (int, optional): ampl processes (None: one per core)
+        max_jobs (int, optional): jobs before a worker is restarted (None:
+            never)
+        job_timeout (float, optional): seconds before a job is stopped
+            (None: no limit)
+        threads (int, optional): solver threads per worker
+    """
+
+    def __init__(
+        self,
+        workers=solver_pool_workers,
+        max_jobs=solver_pool_max_jobs,
+        job_timeout=solver_job_timeout,
+        dir_path=pool_dir,
+        threads=1,
+    ):
+        self.size = workers or os.cpu_count()
+        self.max_jobs = max_jobs
+        self.job_timeout = job_timeout
+        self.dir_path = dir_path
+        self.threads = threads
+        self.idle = queue.Queue()
+        for number in range(self.size):
+            self.idle.put(_Worker(number, dir_path, threads))
+
+    def solve(self, data_files, possible_courses):
+        """Solves one job on the next idle worker.
+
+        Returns:
+            dict: see _Worker.solve
+        """
+        worker = self.idle.get()
+        try:
+            return worker.solve(data_files, possible_courses, self.job_timeout)
+        finally:
+            if not worker.alive() or (
+                self.max_jobs is not None and worker.jobs >= self.max_jobs
+            ):
+                worker.close()
+                worker = _Worker(worker.number, self.dir_path, self.threads)
+            self.idle.put(worker)
+
+    def solve_many(self, jobs):
+        """Solves independent jobs (eg. different students) in parallel.
+
+        Args:
+            jobs (list): (data_files, possible_courses) pairs
+
+        Returns:
+            list of dicts: the solution of every job, in the order of jobs
+        """
+        if not jobs:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.size, len(jobs))) as executor:
+            return list(executor.map(self.solve, *zip(*jobs)))
+
+    def close(self):
+        for _ in range(self.size):
+            self.idle.get().close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
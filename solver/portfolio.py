@@ -0,0 +1,387 @@
+"""Solver Portfolio
+
+Solve times of these set packing instances vary a lot between solvers and
+settings, so the portfolio solves the same instance with several
+configurations at once (portfolio_configs in userInput.py) and keeps the
+first proven answer:
+
+         -- "ampl": the usual AMPL/CPLEX path, with the options of the
+            configuration added to cplex_options (eg. "presolve=0",
+            "varsel=3")
+         -- "highs", "cbc": the command line solvers, on the MPS export of
+            the instance (solver.export), with the options as extra
+            arguments
+         -- "scipy": scipy.optimize.milp (HiGHS, scipy 1.9 or later,
+            optional, so not one of the default configurations) in a
+            process of its own (solver.scipy_milp), with the options as its
+            options
+
+The cores are shared between the configurations: each one gets cpu_count /
+configurations solver threads unless it sets "threads", and when there are
+more configurations than cores the rest wait for one to give up. The first
+configuration to prove the instance optimal (or infeasible) wins, and the
+processes of the others are killed. Without a proven answer, the best
+schedule found is kept.
+
+Every configuration is logged to the solver telemetry with the winner of
+its race, so the defaults can be tuned from real solves:
+
+    python -m solver.portfolio [--path amplData/telemetry.jsonl]
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from solver.ampl_runner import parse_solution, solution_commands, solver_options
+from solver.export import export_name, write_mps
+from solver.matrix_form import dense_form
+from solver.model_spec import model_path
+from solver.scipy_milp import milp, write_problem
+from solver.telemetry import (
+    load_telemetry,
+    log_solves,
+    telemetry_path,
+    telemetry_record,
+)
+from userInput import ampl_path, portfolio_configs, portfolio_timeout
+
+# Solve results that end a race
+proven_results = ("solved", "infeasible")
+
+
+def _unsolved(solve_result):
+    return {"solve_result": solve_result, "objective": None, "chosen": [], "stats": {}}
+
+
+def _status(text):
+    """Solve result of a command line solver's status, eg. "Optimal"."""
+    text = text.strip().lower()
+    if text.startswith("optimal"):
+        return "solved"
+    if "infeasible" in text:
+        return "infeasible"
+    return "limit"
+
+
+def _chosen_solution(instance, solve_result, values):
+    """Solution of a command line solver from its column values.
+
+    Args:
+        values (dict): {exported column name: value}
+    """
+    chosen = [
+        course
+        for course in instance["possible_courses"]
+        if float(values.get(export_name(course), 0)) > 0.5
+    ]
+    objective = None
+    if chosen or solve_result == "solved":
+        course_to_index = instance["course_to_index"]
+        objective = float(sum(instance["costs"][course_to_index[c]] for c in chosen))
+    return {"solve_result": solve_result, "objective": objective, "chosen": chosen}
+
+
+def parse_highs_solution(instance, text):
+    """Reads a HiGHS --solution_file."""
+    lines = text.splitlines()
+    solve_result = "failure"
+    values = {}
+    columns = False
+    for k, line in enumerate(lines):
+        if line.startswith("Model status") and k + 1 < len(lines):
+            solve_result = _status(lines[k + 1])
+        elif line.startswith("# Columns"):
+            columns = True
+        elif line.startswith("#"):
+            columns = False
+        elif columns and line.strip():
+            name, value = line.split()[:2]
+            values[name] = value
+    return _chosen_solution(instance, solve_result, values)
+
+
+def parse_cbc_solution(instance, text):
+    """Reads a cbc solu file (nonzero columns: index, name, value)."""
+    lines = text.splitlines()
+    if not lines:
+        return _unsolved("failure")
+    values = {}
+    for line in lines[1:]:
+        parts = line.split()
+        if len(parts) >= 3:
+            values[parts[1]] = parts[2]
+    return _chosen_solution(instance, _status(lines[0]), values)
+
+
+def _run_process(command, race, timeout):
+    """Runs a solver process that the race can kill.
+
+    Returns:
+        str: everything it printed, or None when it was stopped
+    """
+    with race["lock"]:
+        if race["done"].is_set():
+            return None
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            universal_newlines=True,
+            start_new_session=os.name == "posix",
+        )
+        race["processes"].append(process)
+    try:
+        output, _ = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        _kill(process)
+        process.communicate()
+        return None
+    return None if race["done"].is_set() else output
+
+
+def _kill(process):
+    if process.poll() is None:
+        if os.name == "posix":
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+
+
+def solve_ampl(instance, config, files, race, timeout):
+    run_file = os.path.join(files["dir_path"], config["name"] + ".run")
+    with open(run_file, "w") as f:
+        f.write(f'model "{os.path.abspath(model_path)}";\n')
+        f.write(solver_options(config.get("threads"), config.get("options", "")))
+        for data_file in files["data_files"]:
+            f.write(f'data "{os.path.abspath(data_file)}";\n')
+        f.write("solve;\n")
+        f.write(solution_commands())
+    output = _run_process([ampl_path, run_file], race, timeout)
+    if output is None:
+        return _unsolved("limit")
+    return parse_solution(output, instance["possible_courses"])
+
+
+def solve_highs(instance, config, files, race, timeout):
+    solution_file = os.path.join(files["dir_path"], config["name"] + ".sol")
+    command = [config.get("path", "highs"), "--model_file", files["mps"]]
+    command += ["--solution_file", solution_file, "--time_limit", str(timeout)]
+    if config.get("threads"):
+        # The number of threads is only an option of the options file
+        options_file = os.path.join(files["dir_path"], config["name"] + ".opt")
+        with open(options_file, "w") as f:
+            f.write(f'threads = {config["threads"]}\n')
+        command += ["--options_file", options_file]
+    if _run_process(command + list(config.get("options", [])), race, timeout) is None:
+        return _unsolved("limit")
+    with open(solution_file) as f:
+        return parse_highs_solution(instance, f.read())
+
+
+def solve_cbc(instance, config, files, race, timeout):
+    solution_file = os.path.join(files["dir_path"], config["name"] + ".sol")
+    command = [config.get("path", "cbc"), files["mps"], "sec", str(timeout)]
+    if config.get("threads"):
+        command += ["threads", str(config["threads"])]
+    command += list(config.get("options", [])) + ["solve", "solu", solution_file]
+    if _run_process(command, race, timeout) is None:
+        return _unsolved("limit")
+    with open(solution_file) as f:
+        return parse_cbc_solution(instance, f.read())
+
+
+def solve_scipy(instance, config, files, race, timeout):
+    if milp is None:
+        raise ValueError("scipy.optimize.milp needs scipy 1.9 or later")
+    problem_file = os.path.join(files["dir_path"], config["name"] + ".npz")
+    solution_file = os.path.join(files["dir_path"], config["name"] + ".json")
+    costs, a_ub, b_ub, _ = dense_form(instance)
+    write_problem(problem_file, costs, a_ub, b_ub)
+    options = dict(config.get("options", {}))
+    options.setdefault("time_limit", timeout)
+    # In a process of its own, so that a losing solve can be killed
+    command = [sys.executable, "-m", "solver.scipy_milp", problem_file]
+    command += [solution_file, "--options", json.dumps(options)]
+    if _run_process(command, race, timeout) is None:
+        return _unsolved("limit")
+    with open(solution_file) as f:
+        result = json.load(f)
+    solve_result = {0: "solved", 2: "infeasible"}.get(result["status"], "limit")
+    if result["x"] is None:
+        return _unsolved(solve_result)
+    chosen = [
+        course
+        for course, value in zip(instance["possible_courses"], result["x"])
+        if value > 0.5
+    ]
+    return {
+        "solve_result": solve_result,
+        "objective": result["objective"],
+        "chosen": chosen,
+        "stats": {"nodes": result["nodes"]},
+    }
+
+
+backends = {
+    "ampl": solve_ampl,
+    "highs": solve_highs,
+    "cbc": solve_cbc,
+    "scipy": solve_scipy,
+}
+
+
+def _run_config(instance, config, files, race, timeout):
+    """Solution of one configuration, with its "wall_time"."""
+    start = time.perf_counter()
+    try:
+        solution = backends[config["backend"]](instance, config, files, race, timeout)
+    except (OSError, ValueError) as error:
+        solution = _unsolved("failure")
+        solution["error"] = str(error)
+    solution.setdefault("stats", {})
+    solution["wall_time"] = time.perf_counter() - start
+    return solution
+
+
+def share_cores(configs, cores=None):
+    """Splits the cores between the configurations that run at once, so the
+    race compares the configurations instead of their contention.
+
+    Args:
+        cores (int, optional): defaults to os.cpu_count()
+
+    Returns:
+        tuple: (number of configurations to run at once, the configurations
+               with "threads" set where they did not set it)
+    """
+    cores = cores or os.cpu_count() or 1
+    workers = max(1, min(len(configs), cores))
+    threads = max(1, cores // workers)
+    return workers, [dict({"threads": threads}, **config) for config in configs]
+
+
+def race_solvers(
+    instance, data_files, dat_filename, configs=None, timeout=portfolio_timeout
+):
+    """Solves instance with every configuration at once (at most one per
+    core, see share_cores; the others start when one gives up).
+
+    Args:
+        data_files (list): the .dat files of instance (for "ampl")
+        configs (list, optional): defaults to portfolio_configs
+
+    Returns:
+        dict: the winning solution (see parse_solution), with "config"
+              (name of the winner) and "portfolio" ({name: solve result,
+              "cancelled" for the configurations that were stopped})
+    """
+    if configs is None:
+        configs = portfolio_configs
+    dir_path = os.path.join("amplData", dat_filename, "portfolio")
+    os.makedirs(dir_path, exist_ok=True)
+    files = {"dir_path": dir_path, "data_files": data_files}
+    if any(config["backend"] in ("highs", "cbc") for config in configs):
+        files["mps"] = os.path.join(dir_path, "instance.mps")
+        write_mps(instance, files["mps"], name=os.path.basename(dat_filename))
+
+    workers, configs = share_cores(configs)
+    race = {"lock": threading.Lock(), "processes": [], "done": threading.Event()}
+    start = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=workers)
+    futures = {
+        executor.submit(_run_config, instance, config, files, race, timeout): config
+        for config in configs
+    }
+    solutions = {}
+    winner = None
+    pending = set(futures)
+    while pending and winner is None:
+        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in finished:
+            name = futures[future]["name"]
+            solutions[name] = future.result()
+            if winner is None and solutions[name]["solve_result"] in proven_results:
+                winner = name
+    race_time = time.perf_counter() - start
+
+    # Stop the others
+    with race["lock"]:
+        race["done"].set()
+        for process in race["processes"]:
+            _kill(process)
+    executor.shutdown(wait=False)
+
+    if winner is None:
+        found = [name for name in solutions if solutions[name]["objective"] is not None]
+        winner = (
+            max(found, key=lambda name: solutions[name]["objective"])
+            if found
+            else configs[0]["name"]
+        )
+    cancelled = [futures[future]["name"] for future in pending]
+
+    records = []
+    for config in configs:
+        name = config["name"]
+        solution = solutions.get(name, _unsolved("cancelled"))
+        records.append(
+            telemetry_record(
+                f"{dat_filename}/portfolio",
+                solution,
+                instance,
+                solution.get("wall_time", race_time),
+                portfolio_config=name,
+                portfolio_winner=winner,
+                portfolio_error=solution.get("error"),
+            )
+        )
+    log_solves(records)
+
+    solution = dict(solutions.get(winner, _unsolved("cancelled")))
+    solution["config"] = winner
+    solution["portfolio"] = {
+        config["name"]: "cancelled"
+        if config["name"] in cancelled
+        else solutions[config["name"]]["solve_result"]
+        for config in configs
+    }
+    return solution
+
+
+def portfolio_wins(records):
+    """Races won (with a proven answer) by every configuration, per student
+    profile.
+
+    Returns:
+        dict: {profile: {config: wins}}
+    """
+    wins = {}
+    for record in records:
+        if record.get("portfolio_config") is None:
+            continue
+        if (
+            record["portfolio_config"] == record.get("portfolio_winner")
+            and record["status"] in proven_results
+        ):
+            profile = wins.setdefault(record["profile"], {})
+            profile[record["portfolio_config"]] = (
+                profile.get(record["portfolio_config"], 0) + 1
+            )
+    return wins
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Races won per configuration.")
+    parser.add_argument("--path", default=telemetry_path)
+    args = parser.parse_args()
+
+    for profile, wins in sorted(portfolio_wins(load_telemetry(args.path)).items()):
+        ranking = sorted(wins.items(), key=lambda item: -item[1])
+        print(f"{profile:<32}" + ", ".join(f"{name} {n}" for name, n in ranking))
@@ -0,0 +1,348 @@
+"""Infeasibility Pre-Check
+
+Cheap checks on the built matrices that catch instances which cannot have
+a solution, before any solver time is spent:
+
+         -- Requirements: necessary[i] vs the number of different courses
+            (uniqueness groups) that count towards row i, and vs maxCourses.
+         -- Alternates: lower limit vs the different courses in the set,
+            lower > upper, and the lower limits of disjoint sets vs
+            maxCourses.
+         -- Enrollment bounds: minCourses > maxCourses, and minCourses vs
+            the number of different courses offered.
+
+When the solver still reports infeasible, explain_infeasibility finds an
+irreducible infeasible subset (IIS) of the Reqs, Alts, TimeConflicts,
+TravelTime, Uniqueness and EnrollmentBounds rows:
+
+         -- in one solve, with CPLEX's conflict refiner (iisfind)
+         -- when the solver returns no IIS, with a grouped deletion filter
+            in AMPL: whole constraint families are dropped first, then the
+            rows of the families that are needed in halving blocks, so
+            most rows are dropped many at a time
+"""
+
+import os
+
+from funcs import time_slot_labels, unique_columns_func
+from solver.ampl_runner import run_ampl, solver_options
+from solver.matrix_form import constraint_rows
+from solver.model_spec import model_path
+from userInput import solver_path
+
+
+def _row_courses(row):
+    return [j for j, value in enumerate(row) if value]
+
+
+def _course_groups(instance):
+    """Index of the uniqueness group of every course (at most one course of
+    a group can be chosen)."""
+    group_of = [None] * len(instance["possible_courses"])
+    unique_columns = unique_columns_func(
+        instance["dict_w_same_codes"], instance["course_to_index"]
+    )
+    for k, columns in enumerate(unique_columns):
+        for j in columns:
+            group_of[j] = k
+    return group_of
+
+
+def _supply(columns, group_of):
+    """Most courses of columns that can be chosen together."""
+    return len({group_of[j] for j in columns})
+
+
+def precheck_instance(instance):
+    """Finds rows that make the instance infeasible on their own.
+
+    Returns:
+        list of dicts: {"row", "message"} per problem (empty when no
+                       problem is found, which does not prove feasibility)
+    """
+    possible_courses = instance["possible_courses"]
+    min_courses = instance["min_courses"]
+    max_courses = instance["max_courses"]
+    group_of = _course_groups(instance)
+    problems = []
+
+    # Enrollment bounds
+    if min_courses > max_courses:
+        problems.append(
+            {
+                "row": "EnrollmentBounds",
+                "message": f"minCourses ({min_courses}) > maxCourses ({max_courses})",
+            }
+        )
+    offered = _supply(range(len(possible_courses)), group_of)
+    if min_courses > offered:
+        problems.append(
+            {
+                "row": "EnrollmentBounds",
+                "message": f"minCourses is {min_courses} but only {offered} "
+                "different courses are possible",
+            }
+        )
+
+    # Requirements
+    for i, row in enumerate(instance["requirements_matrix"]):
+        necessary = float(instance["necessary"][i])
+        if necessary <= 0:
+            continue
+        supply = _supply(_row_courses(row), group_of)
+        if necessary > supply:
+            problems.append(
+                {
+                    "row": f"r{i + 1}",
+                    "message": f"requirement r{i + 1} needs {necessary:g} courses "
+                    f"but only {supply} different courses count towards it",
+                }
+            )
+        elif necessary > max_courses:
+            problems.append(
+                {
+                    "row": f"r{i + 1}",
+                    "message": f"requirement r{i + 1} needs {necessary:g} courses "
+                    f"but maxCourses is {max_courses}",
+                }
+            )
+
+    # Alternates
+    disjoint_lower = 0
+    seen_columns = set()
+    for i, row in enumerate(instance["alternates_matrix"]):
+        lower, upper = (float(limit) for limit in instance["alternates"][i][1])
+        columns = _row_courses(row)
+        supply = _supply(columns, group_of)
+        if lower > upper:
+            problems.append(
+                {
+                    "row": f"a{i}",
+                    "message": f"alternates a{i} has lower limit {lower:g} > "
+                    f"upper limit {upper:g}",
+                }
+            )
+        if lower > supply:
+            problems.append(
+                {
+                    "row": f"a{i}",
+                    "message": f"alternates a{i} needs {lower:g} courses but only "
+                    f"{supply} of {instance['alternates'][i][0]} are possible",
+                }
+            )
+        if seen_columns.isdisjoint(columns):
+            disjoint_lower += lower
+        seen_columns.update(columns)
+
+    if disjoint_lower > max_courses:
+        problems.append(
+            {
+                "row": "Alts",
+                "message": f"the alternates sets need {disjoint_lower:g} different "
+                f"courses together but maxCourses is {max_courses}",
+            }
+        )
+
+    return problems
+
+
+##################################################
+# IIS (Conflict Refiner, Grouped Deletion Filter):
+
+# (constraint, index set) of every family the filter works on
+constraint_families = [
+    ("Reqs", "requirements"),
+    ("Alts", "alternates"),
+    ("TimeConflicts", "timeSlots"),
+    ("TravelTime", "travelConflicts"),
+    ("Uniqueness", "uniqueCourses"),
+    ("EnrollmentBounds", None),
+]
+
+
+def _data_commands(data_files):
+    res = f'model "{os.path.abspath(model_path)}";\n'
+    for data_file in data_files:
+        res += f'data "{os.path.abspath(data_file)}";\n'
+    return res
+
+
+def iisfind_file_string(data_files):
+    """AMPL commands asking CPLEX for an IIS (its conflict refiner, for a
+    MIP) in one solve, printing "IIS constraint index" for every row of it.
+
+    Returns:
+        str: contents of the .run file
+    """
+    res = _data_commands(data_files)
+    res += solver_options(options="iisfind=1")
+    res += "option solver_msg 0;\n"
+    res += "solve;\n"
+    for name, index_set in constraint_families:
+        if index_set:
+            member = f'{name}[i].iis = "mem" or {name}[i].iis = "pmem"'
+            res += f'printf {{i in {index_set}: {member}}} "IIS {name} %s\\n", i;\n'
+        else:
+            member = f'{name}.iis = "mem" or {name}.iis = "pmem"'
+            res += f'if {member} then {{ printf "IIS {name} -\\n"; }}\n'
+    return res
+
+
+def candidate_rows(instance):
+    """Rows of every indexed family that can be part of an IIS (the others,
+    eg. time slots with one section, hold for every schedule).
+
+    Returns:
+        dict: {constraint: [index, eg. "t3"]}
+    """
+    rows = {name: [] for name, index_set in constraint_families if index_set}
+    for row_name, _, _, _ in constraint_rows(instance):
+        if "[" in row_name:
+            name, index = row_name[:-1].split("[")
+            rows[name].append(index)
+    return rows
+
+
+def deletion_blocks(rows):
+    """Blocks the grouped deletion filter tries to drop: halves of rows,
+    then quarters, and so on down to single rows, so a row that is not in
+    the IIS is usually dropped with others in one solve.
+
+    Returns:
+        list of lists: blocks of rows, the largest first
+    """
+    size = 1
+    while size * 2 < len(rows):
+        size *= 2
+    blocks = []
+    while size >= 1:
+        blocks += [rows[k : k + size] for k in range(0, len(rows), size)]
+        size //= 2
+    return blocks
+
+
+def _drop_block(name, rows):
+    """AMPL commands keeping the rows of name that are not dropped yet
+    dropped when the rest is still infeasible."""
+    block = f"iisBlock{name}"
+    listed = ", ".join(f'"{i}"' for i in rows)
+    res = f'let {block} := {{i in {{{listed}}}: {name}[i].astatus <> "drop"}};\n'
+    res += f"if card({block}) > 0 then {{\n"
+    res += f"    drop {{i in {block}}} {name}[i];\n"
+    res += "    solve;\n"
+    res += '    if solve_result <> "infeasible" then {\n'
+    res += f"        restore {{i in {block}}} {name}[i];\n"
+    res += "    }\n"
+    res += "}\n"
+    return res
+
+
+def _drop_single(name):
+    res = f'if {name}.astatus <> "drop" then {{\n'
+    res += f"    drop {name};\n"
+    res += "    solve;\n"
+    res += f'    if solve_result <> "infeasible" then {{ restore {name}; }}\n'
+    res += "}\n"
+    return res
+
+
+def iis_file_string(instance, data_files):
+    """AMPL commands of the grouped deletion filter, printing "IIS
+    constraint index" for every row of the IIS.
+
+    Whole families are dropped first. Then, family by family, blocks of
+    deletion_blocks stay dropped when the rest is still infeasible, so it
+    takes about (rows of the IIS) x log2(rows) solves instead of one per
+    row.
+
+    Returns:
+        str: contents of the .run file
+    """
+    res = _data_commands(data_files)
+    res += f"option solver '{solver_path}';\n"
+    res += "option presolve 0;\n"
+    res += "option solver_msg 0;\n"
+
+    # Rows that hold for every schedule are never part of the IIS
+    candidates = candidate_rows(instance)
+    for name, index_set in constraint_families:
+        if index_set:
+            listed = ", ".join(f'"{i}"' for i in candidates[name])
+            res += f"set iisBlock{name} within {index_set};\n"
+            res += f"drop {{i in {index_set} diff {{{listed}}}}} {name}[i];\n"
+
+    # Families: keep dropped when the rest is still infeasible
+    for name, index_set in constraint_families:
+        if index_set:
+            res += _drop_block(name, candidates[name])
+        else:
+            res += _drop_single(name)
+
+    # Blocks of the rows of the families that are needed
+    for name, index_set in constraint_families:
+        if index_set:
+            for rows in deletion_blocks(candidates[name]):
+                res += _drop_block(name, rows)
+            res += f'printf {{i in {index_set}: {name}[i].astatus <> "drop"}} '
+            res += f'"IIS {name} %s\\n", i;\n'
+        else:
+            res += f'if {name}.astatus <> "drop" then {{ printf "IIS {name} -\\n"; }}\n'
+
+    return res
+
+
+def describe_row(instance, name, index):
+    """Plain description of a constraint row of the IIS."""
+    if name == "Reqs":
+        i = int(index[1:]) - 1
+        return f"requirement {index} (needs {instance['necessary'][i]} courses)"
+    if name == "Alts":
+        courses, limits = instance["alternates"][int(index[1:])]
+        return f"alternates {index}: {limits[0]} to {limits[1]} of {courses}"
+    if name == "TimeConflicts":
+        return f"time slot {time_slot_labels()[int(index[1:])]}"
+    if name == "TravelTime":
+        courses = instance["travel_conflicts"][int(index[1:])]
+        return "no time to travel between " + ", ".join(courses)
+    if name == "Uniqueness":
+        key = list(instance["dict_w_same_codes"].keys())[int(index[1:])]
+        return f"only one section of {key}"
+    return (
+        f"between {instance['min_courses']} and {instance['max_courses']} courses"
+    )
+
+
+def _parse_iis(instance, output):
+    iis = []
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) == 3 and parts[0] == "IIS":
+            name, index = parts[1], parts[2].strip("'\"")
+            iis.append(
+                {
+                    "constraint": name,
+                    "row": index,
+                    "message": describe_row(instance, name, index),
+                }
+            )
+    return iis
+
+
+def explain_infeasibility(instance, data_files, dir_path):
+    """Finds an IIS with CPLEX's conflict refiner, or with the grouped
+    deletion filter when the solver returns none, and describes its rows.
+
+    Returns:
+        list of dicts: {"constraint", "row", "message"} per row of the IIS
+    """
+    run_file = os.path.join(dir_path, "iisfind.run")
+    with open(run_file, "w") as f:
+        f.write(iisfind_file_string(data_files))
+    iis = _parse_iis(instance, run_ampl(run_file))
+    if iis:
+        return iis
+
+    run_file = os.path.join(dir_path, "iis.run")
+    with open(run_file, "w") as f:
+        f.write(iis_file_string(instance, data_files))
+    return _parse_iis(instance, run_ampl(run_file))
@@ -0,0 +1,224 @@
+"""Solution Results
+
+Turns the parsed solver output into a structured record and saves it as
+JSON (the whole record) and CSV (one row per chosen section):
+
+         -- chosen sections, with names, instructors, costs, meeting times and
+            the equivalent sections they stand for (solver.symmetry)
+         -- coverage of every requirement row and alternates set
+         -- objective value and solve statistics
+"""
+
+import csv
+import json
+import os
+import time
+
+from solver.ampl_runner import parse_solution, run_ampl, run_file_string
+from solver.portfolio import race_solvers
+from solver.precheck import explain_infeasibility
+from solver.symmetry import expand_solution
+from solver.telemetry import log_solves, telemetry_record
+from userInput import solver_portfolio
+
+
+def meeting_times(raw_data, course):
+    """Meeting times of a section as listed in course_data.json.
+
+    Returns:
+        list of dicts: {"days", "start", "end", "location"} per meeting
+    """
+    return [
+        {
+            "days": item["scheduleDays"],
+            "start": item["scheduleStartTime"],
+            "end": item["scheduleEndTime"],
+            "location": item["scheduleLocation"],
+        }
+        for item in raw_data["data"]["courses"][course]["courseSchedule"]
+    ]
+
+
+def requirement_coverage(instance, chosen):
+    """How many chosen courses count towards every requirement row.
+
+    Returns:
+        list of dicts: one per row of the requirements matrix
+    """
+    course_to_index = instance["course_to_index"]
+    coverage = []
+    for i, row in enumerate(instance["requirements_matrix"]):
+        courses = [course for course in chosen if row[course_to_index[course]]]
+        necessary = instance["necessary"][i] if i < len(instance["necessary"]) else 0
+        coverage.append(
+            {
+                "requirement": "r" + str(i + 1),
+                "necessary": necessary,
+                "covered": len(courses),
+                "satisfied": len(courses) >= float(necessary),
+                "courses": courses,
+            }
+        )
+    return coverage
+
+
+def alternates_coverage(instance, chosen):
+    """How many chosen courses belong to every alternates set.
+
+    Returns:
+        list of dicts: one per alternates set
+    """
+    course_to_index = instance["course_to_index"]
+    coverage = []
+    for i, row in enumerate(instance["alternates_matrix"]):
+        courses = [course for course in chosen if row[course_to_index[course]]]
+        lower, upper = instance["alternates"][i][1]
+        coverage.append(
+            {
+                "alternates": "a" + str(i),
+                "lower_limit": lower,
+                "upper_limit": upper,
+                "covered": len(courses),
+                "courses": courses,
+            }
+        )
+    return coverage
+
+
+def decode_solution(solution, instance, raw_data):
+    """Builds the results record of a solution.
+
+    Args:
+        solution (dict): from solver.ampl_runner.parse_solution
+        instance (dict): built by main.build_instance
+        raw_data (dict): the course catalog
+
+    Returns:
+        dict: the results record
+    """
+    course_to_index = instance["course_to_index"]
+    course_to_variable_name = instance["course_to_variable_name"]
+    courses = raw_data["data"]["courses"]
+    chosen = [course for course in solution["chosen"] if course in course_to_index]
+    sections = expand_solution(instance, chosen)
+
+    return {
+        "status": solution["solve_result"],
+        "objective": solution["objective"],
+        "courses": [
+            {
+                "course_code": course,
+                "variable": course_to_variable_name[course],
+                "course_name": courses[course]["courseName"],
+                "instructors": courses[course]["courseInstructors"],
+                "cost": instance["costs"][course_to_index[course]],
+                "meetings": meeting_times(raw_data, course),
+                "equivalent_sections": sections[course],
+            }
+            for course in chosen
+        ],
+        "requirements": requirement_coverage(instance, chosen),
+        "alternates": alternates_coverage(instance, chosen),
+        "solve_stats": dict(
+            solution.get("stats", {}),
+            num_courses=len(instance["possible_courses"]),
+            num_chosen=len(chosen),
+        ),
+    }
+
+
+def write_results_json(record, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=4)
+
+
+results_csv_header = [
+    "Course Code",
+    "Course Name",
+    "Instructors",
+    "Cost",
+    "Meetings",
+]
+
+
+def write_results_csv(record, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(results_csv_header)
+        for course in record["courses"]:
+            meetings = "; ".join(
+                f'{m["days"]} {m["start"]}-{m["end"]} ({m["location"]})'
+                for m in course["meetings"]
+            )
+            writer.writerow(
+                [
+                    course["course_code"],
+                    course["course_name"],
+                    "; ".join(course["instructors"]),
+                    course["cost"],
+                    meetings,
+                ]
+            )
+
+
+def solve_and_report(instance, raw_data, dat_filename, approximate=None, pool=None):
+    """Solves amplFiles/{dat_filename}.dat and saves the results record to
+    amplData/{dat_filename}/results.json and results.csv.
+
+    When the instance is infeasible, the record also lists the rows of an
+    irreducible infeasible subset under "iis". With solver_portfolio, every
+    configuration of solver.portfolio races and the record names the
+    winner under "portfolio" (pool is not used then: the configurations
+    need solver options and processes of their own).
+
+    Args:
+        approximate (dict, optional): the fast path schedule
+            (solver.approximate), saved under "approximate" together with
+            its gap to the exact objective
+        pool (solver.pool.SolverPool, optional): solve on one of its warm
+            workers instead of starting ampl, unless solver_portfolio is on
+
+    Returns:
+        dict: the results record
+    """
+    dir_path = os.path.join("amplData", dat_filename)
+    os.makedirs(dir_path, exist_ok=True)
+
+    data_files = [os.path.join("amplFiles", dat_filename + ".dat")]
+    start = time.perf_counter()
+    if solver_portfolio:
+        if pool is not None:
+            print("solver_portfolio is on, racing instead of using the solver pool")
+        solution = race_solvers(instance, data_files, dat_filename)
+    elif pool is not None:
+        solution = pool.solve(data_files, instance["possible_courses"])
+    else:
+        run_file = os.path.join(dir_path, "solve.run")
+        with open(run_file, "w") as f:
+            f.write(run_file_string(data_files))
+        solution = parse_solution(run_ampl(run_file), instance["possible_courses"])
+    wall_time = time.perf_counter() - start
+
+    record = decode_solution(solution, instance, raw_data)
+    record["solve_stats"]["wall_time"] = wall_time
+    if solver_portfolio:
+        # race_solvers logs every configuration
+        record["portfolio"] = {
+            "winner": solution["config"],
+            "results": solution["portfolio"],
+        }
+    else:
+        log_solves([telemetry_record(dat_filename, solution, instance, wall_time)])
+    if solution["solve_result"] == "infeasible":
+        record["iis"] = explain_infeasibility(instance, data_files, dir_path)
+    if approximate is not None:
+        record["approximate"] = dict(approximate)
+        if record["objective"]:
+            record["approximate"]["exact_gap"] = (
+                record["objective"] - approximate["objective"]
+            ) / abs(record["objective"])
+
+    write_results_json(record, os.path.join(dir_path, "results.json"))
+    write_results_csv(record, os.path.join(dir_path, "results.csv"))
+
+    return record
@@ -0,0 +1,59 @@
+"""scipy MILP Process
+
+Solves an instance saved by the "scipy" backend of solver.portfolio (the
+arrays of matrix_form.dense_form) with scipy.optimize.milp (scipy 1.9 or
+later, optional) in a process of its own. A milp call cannot be interrupted,
+so this is what lets the portfolio stop a losing scipy solve, the same way
+it stops the command line solvers:
+
+    python -m solver.scipy_milp problem.npz solution.json [--options JSON]
+
+The solution file holds {"status" (of milp), "objective", "x", "nodes"}.
+"""
+
+import argparse
+import json
+
+import numpy as np
+
+try:
+    from scipy.optimize import Bounds, LinearConstraint, milp
+except ImportError:  # scipy (1.9 or later) is optional
+    milp = None
+
+
+def write_problem(problem_file, costs, a_ub, b_ub):
+    """Saves max costs x, a_ub x <= b_ub, x binary for solve_problem."""
+    with open(problem_file, "wb") as f:
+        np.savez(f, costs=costs, a_ub=a_ub, b_ub=b_ub)
+
+
+def solve_problem(problem_file, solution_file, options=None):
+    """Solves a problem of write_problem and writes its solution file."""
+    problem = np.load(problem_file)
+    costs = problem["costs"]
+    result = milp(
+        -costs,
+        integrality=np.ones(len(costs)),
+        bounds=Bounds(0, 1),
+        constraints=LinearConstraint(problem["a_ub"], -np.inf, problem["b_ub"]),
+        options=options or {},
+    )
+    solution = {
+        "status": int(result.status),
+        "objective": None if result.x is None else -float(result.fun),
+        "x": None if result.x is None else result.x.tolist(),
+        "nodes": getattr(result, "mip_node_count", None),
+    }
+    with open(solution_file, "w") as f:
+        json.dump(solution, f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve a saved MILP with scipy.")
+    parser.add_argument("problem_file")
+    parser.add_argument("solution_file")
+    parser.add_argument("--options", default="{}")
+    args = parser.parse_args()
+
+    solve_problem(args.problem_file, args.solution_file, json.loads(args.options))
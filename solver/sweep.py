@@ -0,0 +1,247 @@
+"""Parameter Sweep
+
+Solves the same student instance for a grid of enrollment bounds,
+requirement targets and cost scalings, eg. "what if I take 4 vs 5 vs 6
+courses?" or "what if I weight HSA higher?".
+
+OUTLINE:
+
+         -- Build the matrices once (main.build_instance) and write them to
+            one shared .dat file without costs, necessary and the enrollment
+            bounds.
+         -- Write one small .dat file per variant with only those params.
+         -- Split the variants into one AMPL session per core. Each session
+            reads the model and the shared data once, and only resets and
+            re-reads the variant params between solves.
+         -- Print/save a comparison table of objective and chosen courses.
+
+Run `python -m solver.sweep` for the grid in userInput.py.
+"""
+
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from excel.excel_parser import only_selected
+from funcs import createDat, hsa_codes, variant_dat_string
+from main import build_instance, write_instance_files
+from solver.ampl_runner import parse_session_output, run_ampl, session_file_string
+from solver.model_spec import student_params
+from solver.telemetry import log_solves, telemetry_record
+from userInput import (
+    curr_max_courses,
+    curr_min_courses,
+    sweep_cost_scalings,
+    sweep_enrollment_bounds,
+    sweep_requirement_targets,
+)
+
+
+def sweep_variants(enrollment_bounds, requirement_targets, cost_scalings):
+    """All combinations of the grid.
+
+    Args:
+        enrollment_bounds (list): (min courses, max courses) pairs
+        requirement_targets (list): necessary rows (None keeps the student's)
+        cost_scalings (list): dicts of {subject code or "HSA": factor}
+
+    Returns:
+        list of dicts: one dict per variant
+    """
+    variants = []
+    for bounds, necessary, scaling in itertools.product(
+        enrollment_bounds, requirement_targets, cost_scalings
+    ):
+        variants.append(
+            {
+                "min_courses": bounds[0],
+                "max_courses": bounds[1],
+                "necessary": necessary,
+                "cost_scaling": scaling,
+            }
+        )
+    return variants
+
+
+def scale_costs(possible_courses, costs, cost_scaling):
+    """Multiplies the cost of every course matching a key of cost_scaling.
+
+    "HSA" matches every course with an HSA subject code, any other key
+    matches courses starting with it (eg. "MATH" or "CSCI 1"). Only the most
+    specific matching key applies: the longest prefix, and "HSA" only when
+    no prefix matches (so {"CSCI": 2, "CSCI 1": 3} gives CSCI 1xx courses 3,
+    not 6).
+
+    Returns:
+        List: Row of costs corresponding to each possible course.
+    """
+    keys = sorted(cost_scaling, key=lambda key: (key != "HSA", len(key)), reverse=True)
+    costs_row = list(costs)
+    for i, course in enumerate(possible_courses):
+        subject_code = course.split(" ")[0]
+        for key in keys:
+            if (key == "HSA" and subject_code in hsa_codes) or course.startswith(key):
+                costs_row[i] *= cost_scaling[key]
+                break
+
+    return costs_row
+
+
+def _write_variant_dat(instance, dir_path, i, variant):
+    possible_courses = instance["possible_courses"]
+    necessary = variant["necessary"]
+    if necessary is None:
+        necessary = instance["necessary"]
+    costs = scale_costs(possible_courses, instance["costs"], variant["cost_scaling"])
+
+    variant_dat = dir_path + f"variant{i}.dat"
+    with open(variant_dat, "w") as f:
+        f.write(
+            variant_dat_string(
+                possible_courses,
+                costs,
+                necessary,
+                variant["min_courses"],
+                variant["max_courses"],
+            )
+        )
+    return variant_dat
+
+
+def _solve_session(instance, shared_dat, dir_path, session, indices, variants):
+    jobs = []
+    for i in indices:
+        variant_dat = _write_variant_dat(instance, dir_path, i, variants[i])
+        if not jobs:
+            jobs.append(([shared_dat, variant_dat], None))
+        else:
+            jobs.append(([variant_dat], student_params))
+
+    run_file = dir_path + f"session{session}.run"
+    with open(run_file, "w") as f:
+        f.write(session_file_string(jobs, threads=1))
+
+    start = time.perf_counter()
+    output = run_ampl(run_file)
+    session_wall_time = time.perf_counter() - start
+
+    solutions = parse_session_output(output, instance["possible_courses"])
+    for solution in solutions:
+        solution["session_wall_time"] = session_wall_time
+    return {i: solution for i, solution in zip(indices, solutions)}
+
+
+def run_sweep(instance, variants, sweep_name="sweep", max_workers=None):
+    """Solves every variant of instance in parallel.
+
+    Args:
+        instance (dict): built by main.build_instance
+        variants (list): built by sweep_variants
+        sweep_name (str): files go to amplData/{sweep_name}/
+        max_workers (int, optional): parallel AMPL sessions (defaults to the
+                                     number of cores)
+
+    Returns:
+        list of dicts: one row per variant, in the order of variants
+    """
+    dir_path = write_instance_files(instance, sweep_name)
+    createDat(
+        dir_path, sweep_name + "_shared.dat", instance["num_reqs"], student_params=False
+    )
+    shared_dat = os.path.join("amplFiles", sweep_name + "_shared.dat")
+
+    num_sessions = min(max_workers or os.cpu_count(), len(variants)) or 1
+    sessions = [
+        list(range(k, len(variants), num_sessions)) for k in range(num_sessions)
+    ]
+
+    solutions = {}
+    with ThreadPoolExecutor(max_workers=num_sessions) as executor:
+        futures = [
+            executor.submit(
+                _solve_session, instance, shared_dat, dir_path, k, indices, variants
+            )
+            for k, indices in enumerate(sessions)
+        ]
+        for future in futures:
+            solutions.update(future.result())
+
+    unsolved = {"solve_result": "unknown", "objective": None, "chosen": [], "stats": {}}
+    rows = [
+        dict(variant, variant=i, **solutions.get(i, unsolved))
+        for i, variant in enumerate(variants)
+    ]
+
+    records = []
+    for row in rows:
+        variant_instance = dict(
+            instance,
+            min_courses=row["min_courses"],
+            max_courses=row["max_courses"],
+            necessary=row["necessary"] or instance["necessary"],
+        )
+        records.append(
+            telemetry_record(
+                f'{sweep_name}/variant{row["variant"]}',
+                row,
+                variant_instance,
+                session_wall_time=row.get("session_wall_time"),
+                cost_scaling=row["cost_scaling"],
+            )
+        )
+    log_solves(records)
+
+    return rows
+
+
+def _row_strings(row):
+    return [
+        str(row["variant"]),
+        f'{row["min_courses"]}-{row["max_courses"]}',
+        "default" if row["necessary"] is None else " ".join(map(str, row["necessary"])),
+        " ".join(f"{k}x{v}" for k, v in row["cost_scaling"].items()) or "none",
+        row["solve_result"],
+        "" if row["objective"] is None else f'{row["objective"]:g}',
+        ", ".join(row["chosen"]),
+    ]
+
+
+sweep_table_header = [
+    "Variant",
+    "Courses",
+    "Requirements",
+    "Scaling",
+    "Result",
+    "Objective",
+    "Chosen Courses",
+]
+
+
+def print_sweep_table(rows):
+    table = [sweep_table_header] + [_row_strings(row) for row in rows]
+    widths = [max(len(line[k]) for line in table) for k in range(len(table[0]) - 1)]
+    for line in table:
+        cells = [cell.ljust(width) for cell, width in zip(line, widths)]
+        print("  ".join(cells + [line[-1]]))
+
+
+def write_sweep_csv(rows, path):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(sweep_table_header)
+        for row in rows:
+            writer.writerow(_row_strings(row))
+
+
+if __name__ == "__main__":
+    instance = build_instance(only_selected)
+    variants = sweep_variants(
+        sweep_enrollment_bounds or [(curr_min_courses, curr_max_courses)],
+        sweep_requirement_targets or [None],
+        sweep_cost_scalings or [{}],
+    )
+    rows = run_sweep(instance, variants)
+    print_sweep_table(rows)
+    write_sweep_csv(rows, os.path.join("amplData", "sweep", "sweep.csv"))
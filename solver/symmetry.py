@@ -0,0 +1,163 @@
+"""Symmetry Reduction (Equivalent Sections)
+
+Sections with the same courseMutualExclusionKey, the same meeting intervals
+(so the same campus time grid), the same cost and the same column in every
+requirement, alternates, uniqueness and travel time row are interchangeable for
+model.mod: any solution with one of them is still a solution with another.
+The uniqueness rows already allow at most one of them, so the group is
+replaced by one representative variable and the solver no longer branches
+over the copies.
+
+After solving, the chosen representative is expanded back to every
+concrete section of its group (instance["equivalent_sections"]).
+"""
+
+import numpy as np
+
+from funcs import (
+    course_code_to_variable_and_index,
+    meeting_intervals_func,
+    unique_columns_func,
+)
+
+
+def _columns_of(matrix, kept):
+    """Rows of matrix restricted to the kept column indices, in the same
+    container types (list of lists or list of numpy rows)."""
+    res = []
+    for row in matrix:
+        if isinstance(row, np.ndarray):
+            res.append(row[kept])
+        else:
+            res.append([row[j] for j in kept])
+    return res
+
+
+def _unique_rows(instance):
+    """Uniqueness rows with a 1 in each column, {column index: [rows]}."""
+    rows = {}
+    columns = unique_columns_func(
+        instance["dict_w_same_codes"], instance["course_to_index"]
+    )
+    for r, row_columns in enumerate(columns):
+        for j in row_columns:
+            rows.setdefault(j, []).append(r)
+    return rows
+
+
+def _travel_rows(instance):
+    """Travel time rows of every section, {section: [rows]}."""
+    rows = {}
+    for r, courses in enumerate(instance.get("travel_conflicts", [])):
+        for course in courses:
+            rows.setdefault(course, []).append(r)
+    return rows
+
+
+def section_signature(instance, raw_data, course, unique_rows=None, travel_rows=None):
+    """Everything model.mod can tell about a section.
+
+    Args:
+        unique_rows (dict, optional): _unique_rows(instance), so the
+            uniqueness column is not read row by row
+        travel_rows (dict, optional): _travel_rows(instance)
+
+    Returns:
+        tuple: hashable, equal for interchangeable sections
+    """
+    j = instance["course_to_index"][course]
+    if travel_rows is None:
+        travel_rows = _travel_rows(instance)
+    exclusion_key = raw_data["data"]["courses"][course].get(
+        "courseMutualExclusionKey"
+    )
+    return (
+        tuple(exclusion_key) if exclusion_key else course,
+        meeting_intervals_func(raw_data, course),
+        instance["costs"][j],
+        tuple(int(row[j]) for row in instance["requirements_matrix"]),
+        tuple(int(row[j]) for row in instance["alternates_matrix"]),
+        tuple(unique_rows.get(j, ()))
+        if unique_rows is not None
+        else tuple(int(row[j]) for row in instance["no_same_courses_matrix"]),
+        tuple(travel_rows.get(course, ())),
+    )
+
+
+def equivalent_section_groups(instance, raw_data):
+    """Groups the possible courses by section_signature.
+
+    Returns:
+        dict: {representative (first section of the group): [sections]}
+    """
+    groups = {}
+    unique_rows = _unique_rows(instance)
+    travel_rows = _travel_rows(instance)
+    for course in instance["possible_courses"]:
+        signature = section_signature(
+            instance, raw_data, course, unique_rows, travel_rows
+        )
+        groups.setdefault(signature, []).append(course)
+    return {sections[0]: sections for sections in groups.values()}
+
+
+def collapse_equivalent_sections(instance, raw_data):
+    """Replaces every group of equivalent sections by its representative.
+
+    Args:
+        instance (dict): built by main.build_instance
+
+    Returns:
+        dict: the reduced instance (same keys), plus "equivalent_sections":
+              {representative: [every section of its group]}
+    """
+    groups = equivalent_section_groups(instance, raw_data)
+    possible_courses = list(groups.keys())
+    kept = [instance["course_to_index"][course] for course in possible_courses]
+
+    course_to_variable_name, course_to_index = course_code_to_variable_and_index(
+        possible_courses
+    )
+    reduced = dict(instance)
+    reduced.update(
+        {
+            "possible_courses": possible_courses,
+            "course_to_variable_name": course_to_variable_name,
+            "variable_name_to_course": {
+                value: key for key, value in course_to_variable_name.items()
+            },
+            "course_to_index": course_to_index,
+            "time_conflict_matrix": _columns_of(instance["time_conflict_matrix"], kept),
+            "dict_w_same_codes": {
+                key: [course for course in courses if course in groups]
+                for key, courses in instance["dict_w_same_codes"].items()
+            },
+            "no_same_courses_matrix": _columns_of(
+                instance["no_same_courses_matrix"], kept
+            ),
+            "requirements_matrix": _columns_of(instance["requirements_matrix"], kept),
+            "costs": [instance["costs"][j] for j in kept],
+            "alternates_matrix": _columns_of(instance["alternates_matrix"], kept),
+            # A row left with one section no longer excludes anything
+            "travel_conflicts": [
+                kept_courses
+                for kept_courses in (
+                    [course for course in courses if course in groups]
+                    for courses in instance.get("travel_conflicts", [])
+                )
+                if len(kept_courses) > 1
+            ],
+            "equivalent_sections": groups,
+        }
+    )
+    return reduced
+
+
+def expand_solution(instance, chosen):
+    """Concrete sections behind every chosen representative.
+
+    Returns:
+        dict: {chosen course: [every section it stands for]}
+    """
+    groups = instance.get("equivalent_sections", {})
+    return {course: groups.get(course, [course]) for course in chosen}
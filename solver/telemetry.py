@@ -0,0 +1,206 @@
+"""Solver Telemetry
+
+Every solve appends one JSON line to amplData/telemetry.jsonl with:
+
+         -- run: what was solved (dat file, sweep variant, cohort student)
+         -- profile: the student profile (major, number of courses,
+            requirement and alternates rows, enrollment bounds)
+         -- formulation: hash of model.mod and whether equivalent sections
+            were collapsed, to compare formulation changes
+         -- model size as built (rows, columns, nonzeros)
+         -- solve result, wall time, and the solver stats printed by the .run
+            file (solve time, nodes, iterations, MIP gap, presolve
+            reductions, size sent to the solver)
+
+Summarize the log, grouped by any of the fields above, with:
+
+    python -m solver.telemetry [--by profile|formulation|run|status] [--slowest N]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import statistics
+
+from pipeline.cache import hash_inputs
+from solver.matrix_form import constraint_rows
+from solver.model_spec import model_string
+from userInput import solver_telemetry
+
+telemetry_path = os.path.join("amplData", "telemetry.jsonl")
+
+
+def model_size(instance):
+    """Rows, columns and nonzeros of the model built for instance.
+
+    Returns:
+        dict: {"rows", "columns", "nonzeros"}
+    """
+    rows = 0
+    nonzeros = 0
+    for name, columns, lower, upper in constraint_rows(instance):
+        rows += 1
+        nonzeros += len(columns)
+    return {
+        "rows": rows,
+        "columns": len(instance["possible_courses"]),
+        "nonzeros": nonzeros,
+    }
+
+
+def instance_profile(instance):
+    """What describes a student for the solver.
+
+    Returns:
+        str: eg. "CS-MATH c964 r3 a1 4-6"
+    """
+    necessary = [float(value) for value in instance["necessary"]]
+    return (
+        f'{instance.get("major", "-")} '
+        f'c{len(instance["possible_courses"])} '
+        f"r{sum(1 for value in necessary if value > 0)} "
+        f'a{len(instance["alternates"])} '
+        f'{instance["min_courses"]}-{instance["max_courses"]}'
+    )
+
+
+def formulation(instance):
+    """Hash of the model and of the preprocessing of instance."""
+    collapsed = "equivalent_sections" in instance
+    return hash_inputs(model_string(), collapsed)[:12] + (
+        " collapsed" if collapsed else ""
+    )
+
+
+def telemetry_record(run, solution, instance, wall_time=None, **fields):
+    """Telemetry of one solve.
+
+    Args:
+        run (str): name of what was solved
+        solution (dict): from solver.ampl_runner.parse_solution
+        instance (dict): built by main.build_instance
+        wall_time (float, optional): seconds spent running AMPL
+        fields: anything else to log (eg. the sweep variant)
+
+    Returns:
+        dict: the telemetry record
+    """
+    record = {
+        "time": datetime.datetime.now().isoformat(timespec="seconds"),
+        "run": run,
+        "profile": instance_profile(instance),
+        "formulation": formulation(instance),
+        "status": solution["solve_result"],
+        "objective": solution["objective"],
+        "wall_time": wall_time,
+    }
+    record.update(model_size(instance))
+    record.update(solution.get("stats", {}))
+    record.update(fields)
+    return record
+
+
+def log_solves(records, path=telemetry_path):
+    """Appends telemetry records to the log (when solver_telemetry is on)."""
+    if not solver_telemetry:
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def load_telemetry(path=telemetry_path):
+    """Every record of the log.
+
+    Returns:
+        list of dicts
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _solve_time(record):
+    value = record.get("solve_elapsed_time")
+    if value is None:
+        value = record.get("wall_time")
+    return value
+
+
+def aggregate_telemetry(records, by="profile"):
+    """Summary of the solves per value of a field.
+
+    Returns:
+        list of dicts: {by, "solves", "statuses", "mean_time", "median_time",
+                        "max_time", "mean_nodes", "max_gap"}, slowest first
+    """
+    groups = {}
+    for record in records:
+        groups.setdefault(str(record.get(by)), []).append(record)
+
+    summary = []
+    for value, group in groups.items():
+        times = [_solve_time(r) for r in group if _solve_time(r) is not None]
+        nodes = [r["nodes"] for r in group if r.get("nodes") is not None]
+        gaps = [r["relmipgap"] for r in group if r.get("relmipgap") is not None]
+        statuses = {}
+        for record in group:
+            statuses[record["status"]] = statuses.get(record["status"], 0) + 1
+        summary.append(
+            {
+                by: value,
+                "solves": len(group),
+                "statuses": statuses,
+                "mean_time": statistics.mean(times) if times else None,
+                "median_time": statistics.median(times) if times else None,
+                "max_time": max(times) if times else None,
+                "mean_nodes": statistics.mean(nodes) if nodes else None,
+                "max_gap": max(gaps) if gaps else None,
+            }
+        )
+
+    summary.sort(key=lambda row: -(row["mean_time"] or 0))
+    return summary
+
+
+def print_telemetry_summary(summary, by="profile"):
+    def number(value, spec):
+        return "-" if value is None else format(value, spec)
+
+    print(
+        f"{by:<32}{'Solves':>7}{'Mean s':>9}{'Median s':>10}{'Max s':>9}"
+        f"{'Nodes':>9}{'Gap':>9}  Statuses"
+    )
+    for row in summary:
+        statuses = ", ".join(f"{k} {v}" for k, v in row["statuses"].items())
+        print(
+            f"{row[by][:31]:<32}{row['solves']:>7}"
+            f"{number(row['mean_time'], '.3f'):>9}"
+            f"{number(row['median_time'], '.3f'):>10}"
+            f"{number(row['max_time'], '.3f'):>9}"
+            f"{number(row['mean_nodes'], '.0f'):>9}"
+            f"{number(row['max_gap'], '.2%'):>9}  {statuses}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize the solver telemetry.")
+    parser.add_argument("--by", default="profile", help="field to group by")
+    parser.add_argument("--slowest", type=int, default=0, metavar="N")
+    parser.add_argument("--path", default=telemetry_path)
+    args = parser.parse_args()
+
+    records = load_telemetry(args.path)
+    print_telemetry_summary(aggregate_telemetry(records, args.by), args.by)
+
+    if args.slowest:
+        print()
+        slowest = sorted(records, key=lambda r: -(_solve_time(r) or 0))
+        for record in slowest[: args.slowest]:
+            print(
+                f'{record["time"]}  {record["run"]}  {record["profile"]}  '
+                f'{record["status"]}  {_solve_time(record)}'
+            )
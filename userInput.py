@@ -4,3 +4,113 @@ curr_dat_filename = "data"  # do not end with .dat
 # TODO(USER): Excel Sheet Name
 excel_file_name = "Course Schedule User Input.xlsx"  # ends with .xlsx
 excel_sheet_name = "Inputs"
+
+# TODO(USER): Course catalogs
+# Snapshots of course_data.json (eg. of earlier terms, for multi-semester
+# planning), and the term to plan for; None plans for the latest term
+catalog_files = ["rawData/course_data.json"]
+catalog_term = None
+
+# TODO(USER): Min and max number of courses
+curr_min_courses = 4
+curr_max_courses = 6
+
+# TODO(USER): Hard time limits (catalog/time_limits.py)
+# Sections meeting before earliest_start, after latest_end or on days_off are
+# removed before the model is built, eg. "10:00", "19:00" and ["F"]; None and
+# [] allow any time
+earliest_start = None
+latest_end = None
+days_off = []
+
+# TODO(USER): Travel time between campuses, in minutes (catalog/travel.py)
+# Classes on two campuses conflict when the second starts less than the
+# travel time after the first ends, eg. {("HM", "PO"): 15, ("HM", "SC"): 10};
+# pairs not listed take travel_time_default (0 only checks the times)
+travel_times = {}
+travel_time_default = 0
+# Meetings whose location has one of these words need no travel (online)
+online_location_words = ["Online", "ONLI"]
+
+# TODO(USER): AMPL and solver executables
+ampl_path = "ampl"
+solver_path = "./cplex"
+# Solve right after creating the .dat file and save the results to
+# amplData/{dat file name}/results.json and results.csv
+run_solver = False
+# Print a quick approximate schedule (greedy/LP rounding) before solving
+approximate_preview = True
+# Solve one variable per group of interchangeable sections (same course,
+# meeting times, ranking and requirements) and list the group in the results
+collapse_sections = True
+# Added to the ranking of a course for every course it is, transitively, a
+# prerequisite of (catalog/prereq_graph.py); 0 leaves the rankings as they are
+unlock_weight = 0
+# Reuse the matrices and .dat of earlier runs when their inputs did not change
+# (amplData/cache, see `python -m pipeline.cache list`)
+pipeline_cache = True
+# Run the matrix and cost builders "serial", on a "thread" pool or in forked
+# "process" workers (pipeline/build_graph.py)
+build_mode = "thread"
+# Also write the instance as MPS/LP files for other solvers, eg. ["mps", "lp"]
+# (amplData/{dat file name}/), gzipped when export_compress is True
+export_formats = []
+export_compress = False
+# Solve with every configuration of portfolio_configs at once and keep the
+# first proven answer (solver/portfolio.py). backend "ampl" adds options to
+# cplex_options, "highs" and "cbc" run the command line solver on an MPS
+# export with options as extra arguments, "scipy" runs scipy.optimize.milp
+# with options as its options (it needs scipy 1.9 or later, newer than the
+# one in requirements.txt, so it is not one of the defaults: add
+# {"name": "scipy", "backend": "scipy", "options": {}} to use it). "threads"
+# sets the solver threads of a configuration (default: the cores split
+# between the configurations). The portfolio takes precedence over the
+# solver pool below: with both on, watch mode races instead of using the
+# pool (cohort allocations do not race and still use it)
+solver_portfolio = False
+portfolio_configs = [
+    {"name": "cplex", "backend": "ampl", "options": ""},
+    {"name": "cplex-nopresolve", "backend": "ampl", "options": "presolve=0"},
+    {"name": "cplex-strong", "backend": "ampl", "options": "varsel=3"},
+    {"name": "highs", "backend": "highs", "options": []},
+    {"name": "cbc", "backend": "cbc", "options": []},
+]
+portfolio_timeout = 600  # seconds
+# Long-lived AMPL workers for cohort allocations and watch mode
+# (solver/pool.py): number of workers (None: one per core), jobs before a
+# worker is restarted, and seconds before a job is stopped (None: no limit)
+solver_pool_workers = None
+solver_pool_max_jobs = 50
+solver_job_timeout = 600
+# Log the solve status, times, nodes, MIP gap and model size of every solve to
+# amplData/telemetry.jsonl (summary: `python -m solver.telemetry`)
+solver_telemetry = True
+# `python -m pipeline.watch`: seconds a saved workbook must stay unchanged
+# before it is re-solved, and between checks when watchdog is not installed
+watch_debounce = 0.2
+watch_poll_interval = 0.1
+
+# TODO(USER): Seat availability feed
+# Url template for section availability, eg.
+# "http://localhost:8000/sections/{course_code}" (None keeps the seat
+# numbers in rawData/course_data.json)
+seat_feed_url = None
+seat_feed_pool_size = 8  # open connections to the feed
+# "filter" removes closed/full sections, "penalize" lowers their ranking
+seat_policy = "filter"
+seat_penalty = 5
+
+# TODO(USER): Parameter sweep grid (python -m solver.sweep)
+# Every combination is solved. Empty lists keep the values above/in the sheet.
+sweep_enrollment_bounds = [(4, 4), (5, 5), (6, 6)]  # (min, max) courses
+sweep_requirement_targets = []  # eg. [[1, 0, 0, 0, 0, 0, 1, 0, 0, 1]]
+# {course code prefix or "HSA": factor}, only the most specific matching key
+# (longest prefix, then "HSA") scales a course, factors do not multiply
+sweep_cost_scalings = [{}, {"HSA": 2}]
+
+# TODO(USER): Cohort allocation (python -m enrollment.cohort_allocation)
+cohort_dir = "cohort"  # one workbook (excel_sheet_name sheet) per student
+cohort_iterations = 20  # price updates before repairing the allocation
+# Format of the cohort demand tables (`python -m enrollment.demand`):
+# "parquet" or "arrow" (needs pyarrow), or "npz"
+demand_export_format = "parquet"